@@ -0,0 +1,168 @@
+# Busca de candidatos da listagem administrativa (filtro `busca` do InscricaoFilter).
+#
+# Nome, nome social, CPF e e-mail de cada candidato são quebrados em termos sem acentos nem caixa,
+# só com [0-9a-z], e gravados na tabela candidato_termo, atualizada pelos signals do Candidato.
+# Cada palavra da consulta casa com o início de um termo por uma faixa do índice (termo, candidato):
+#   termo >= 'silv' AND termo < 'silw'
+# e o candidato precisa casar com todas as palavras. O custo acompanha o número de candidatos
+# encontrados, não o tamanho da tabela. Dados gravados fora do ORM (ex.: initial_setup.sql)
+# devem ser seguidos de `manage.py reindexar_busca`.
+import re
+
+from django.db import transaction
+from django.db.models import Case, Exists, F, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+
+from .models import CandidatoTermo
+from .referencias import normalizar_busca
+
+ALFABETO = '0123456789abcdefghijklmnopqrstuvwxyz'
+TAMANHO_TERMO = 64
+
+# Peso de cada campo (CandidatoTermo.CAMPO_CHOICES) na relevância
+PESOS = {0: 4, 1: 3, 2: 3, 3: 2}
+
+_PALAVRA = re.compile(r'[0-9a-z]+')
+_CPF = re.compile(r'[\d.\-/\s]+')
+
+
+def termos(texto):
+    if not texto:
+        return []
+    return [palavra[:TAMANHO_TERMO] for palavra in _PALAVRA.findall(normalizar_busca(texto))]
+
+
+def termos_candidato(candidato):
+    """
+    Termos de um candidato, {termo: campo}; um termo presente em mais de um campo fica com o de maior peso.
+    """
+    encontrados = {}
+    valores = (
+        (0, termos(candidato.nome_completo)),
+        (1, termos(candidato.nome_social)),
+        (2, [re.sub(r'\D', '', candidato.cpf or '')[:TAMANHO_TERMO]]),
+        (3, termos(candidato.email)),
+    )
+    for campo, lista in valores:
+        for termo in lista:
+            if termo and PESOS[campo] > PESOS.get(encontrados.get(termo), 0):
+                encontrados[termo] = campo
+    return encontrados
+
+
+def indexar(candidato, novo=False):
+    """
+    Atualiza os termos de um candidato; não escreve nada se eles não mudaram.
+    """
+    novos = termos_candidato(candidato)
+    atuais = {} if novo else dict(CandidatoTermo.objects.filter(candidato_id=candidato.id).values_list('termo', 'campo'))
+    if atuais == novos:
+        return
+    with transaction.atomic():
+        if atuais:
+            CandidatoTermo.objects.filter(candidato_id=candidato.id).delete()
+        CandidatoTermo.objects.bulk_create([
+            CandidatoTermo(candidato_id=candidato.id, termo=termo, campo=campo) for termo, campo in novos.items()
+        ])
+
+
+def reindexar(candidatos, lote=1000):
+    """
+    Recria os termos dos candidatos informados (queryset), em lotes por id.
+    """
+    total = 0
+    ultimo = 0
+    while True:
+        bloco = list(candidatos.filter(id__gt=ultimo).order_by('id')[:lote])
+        if not bloco:
+            return total
+        with transaction.atomic():
+            CandidatoTermo.objects.filter(candidato_id__in=[candidato.id for candidato in bloco]).delete()
+            CandidatoTermo.objects.bulk_create([
+                CandidatoTermo(candidato_id=candidato.id, termo=termo, campo=campo)
+                for candidato in bloco
+                for termo, campo in termos_candidato(candidato).items()
+            ])
+        total += len(bloco)
+        ultimo = bloco[-1].id
+
+
+def termos_consulta(consulta):
+    # CPF digitado com pontuação ("123.456.789-00" ou só "123.456") é um termo só, com os dígitos
+    if consulta and _CPF.fullmatch(consulta.strip()):
+        digitos = re.sub(r'\D', '', consulta)
+        return [digitos[:TAMANHO_TERMO]] if digitos else []
+    # Palavras repetidas não mudam o resultado
+    return list(dict.fromkeys(termos(consulta)))
+
+
+def _prefixo(termo):
+    """
+    Condição "termo começa com" como faixa do índice: funciona igual em qualquer collation,
+    já que os termos só têm caracteres do ALFABETO.
+    """
+    final = termo
+    while final and final[-1] == ALFABETO[-1]:
+        final = final[:-1]
+    if not final:
+        return Q(termo__gte=termo)
+    proximo = ALFABETO[ALFABETO.index(final[-1]) + 1]
+    return Q(termo__gte=termo, termo__lt=final[:-1] + proximo)
+
+
+def _relevancia(palavras):
+    """
+    Relevância de cada candidato: por palavra, o peso do campo em que ela aparece, em dobro
+    quando o termo é idêntico à palavra.
+    """
+    pontos = {}
+    for indice, palavra in enumerate(palavras):
+        pontos[f'p{indice}'] = Max(Case(
+            *(When(Q(campo=campo, termo=palavra), then=Value(peso * 2)) for campo, peso in PESOS.items()),
+            *(When(_prefixo(palavra) & Q(campo=campo), then=Value(peso)) for campo, peso in PESOS.items()),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+    filtro = Q()
+    for palavra in palavras:
+        filtro |= _prefixo(palavra)
+    return (
+        CandidatoTermo.objects.filter(filtro)
+        .values('candidato_id')
+        .annotate(**pontos)
+        .annotate(relevancia=sum((F(nome) for nome in pontos), Value(0)))
+    )
+
+
+def candidatos_encontrados(consulta):
+    """
+    Ids (subconsulta) dos candidatos que casam com todas as palavras da consulta, ou None se
+    ela não tiver palavras. A busca parte da palavra mais longa, em geral a mais seletiva, e
+    confirma as demais no índice (candidato, termo) apenas para os candidatos encontrados,
+    sem percorrer os termos de palavras comuns como "silva" ou "gmail".
+    """
+    palavras = termos_consulta(consulta)
+    if not palavras:
+        return None
+
+    primeira, *demais = sorted(palavras, key=len, reverse=True)
+    encontrados = CandidatoTermo.objects.filter(_prefixo(primeira))
+    for palavra in demais:
+        encontrados = encontrados.filter(Exists(
+            CandidatoTermo.objects.filter(_prefixo(palavra), candidato_id=OuterRef('candidato_id'))
+        ))
+    return encontrados.values('candidato_id')
+
+
+def filtrar_inscricoes(queryset, consulta):
+    """
+    Inscrições dos candidatos encontrados, das mais relevantes para as menos relevantes.
+    """
+    encontrados = candidatos_encontrados(consulta)
+    if encontrados is None:
+        return queryset
+    relevancia = _relevancia(termos_consulta(consulta)).filter(candidato_id=OuterRef('candidato_id')).values('relevancia')[:1]
+    return (
+        queryset.filter(candidato_id__in=encontrados)
+        .annotate(relevancia=Subquery(relevancia))
+        .order_by('-relevancia', 'id')
+    )
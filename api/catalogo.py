@@ -0,0 +1,109 @@
+# Cache das respostas públicas do catálogo (cursos, polos e cidades) usadas pelo formulário de inscrição.
+#
+# Cada resposta é guardada já renderizada em JSON, com um ETag calculado do conteúdo, em
+# CACHES[CATALOGO_CACHE_ALIAS]. As chaves incluem uma versão única do catálogo, trocada (signals)
+# a cada escrita em cursos, polos, cidades e estados; as entradas antigas simplesmente expiram.
+# Nada fica na memória do processo: com o cache compartilhado (REDIS_URL) a troca de versão feita
+# por um worker vale para todos. Sem ele o cache fica desligado por padrão (CATALOGO_CACHE).
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+CHAVE_VERSAO = 'catalogo:versao'
+
+
+class MetricasCache:
+    """
+    Contadores de acertos, falhas e respostas 304 de um cache, neste processo.
+    """
+
+    def __init__(self):
+        self.acertos = 0
+        self.falhas = 0
+        self.nao_modificados = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def resumo(self):
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'nao_modificados': self.nao_modificados,
+            'taxa_acerto': round(self.acertos / total, 4) if total else None,
+        }
+
+
+_metricas = MetricasCache()
+
+
+def _cache():
+    return caches[settings.CATALOGO_CACHE_ALIAS]
+
+
+def _versao():
+    versao = _cache().get(CHAVE_VERSAO)
+    if versao is None:
+        versao = uuid.uuid4().hex
+        if not _cache().add(CHAVE_VERSAO, versao, None):
+            versao = _cache().get(CHAVE_VERSAO, versao)
+    return versao
+
+
+def invalidar():
+    """
+    Troca a versão do catálogo, descartando todas as respostas cacheadas.
+    """
+    _cache().set(CHAVE_VERSAO, uuid.uuid4().hex, None)
+
+
+def chave(caminho, parametros):
+    """
+    Chave da resposta por rota e parâmetros normalizados (ordenados, sem valores vazios).
+    """
+    normalizados = sorted(
+        (nome, valor.strip())
+        for nome, valores in parametros.lists()
+        for valor in valores
+        if valor.strip()
+    )
+    resumo = hashlib.sha1(repr((caminho, normalizados)).encode('utf-8')).hexdigest()
+    return f'catalogo:{_versao()}:{resumo}'
+
+
+def obter(chave):
+    """
+    Retorna (conteúdo JSON, ETag, expira_em) da resposta cacheada, ou None.
+    """
+    entrada = _cache().get(chave)
+    _metricas.registrar('acertos' if entrada is not None else 'falhas')
+    return entrada
+
+
+def guardar(chave, conteudo, timeout):
+    entrada = (conteudo, '"%s"' % hashlib.sha1(conteudo).hexdigest(), time.time() + timeout)
+    if timeout > 0:
+        _cache().set(chave, entrada, timeout)
+    return entrada
+
+
+def max_age(entrada):
+    """
+    Tempo (s) que proxies e navegadores podem reutilizar a resposta sem revalidar.
+    """
+    return max(0, min(settings.CATALOGO_CACHE_MAX_AGE, int(entrada[2] - time.time())))
+
+
+def registrar_nao_modificado():
+    _metricas.registrar('nao_modificados')
+
+
+def metricas():
+    return _metricas.resumo()
@@ -0,0 +1,409 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from io import BytesIO
+
+from django.conf import settings
+
+# Arquivos dos classificadores de documentos, relativos à pasta `models`
+MODELOS = {
+    'rg': 'modelo_final_rg.h5',
+    'cpf': 'modelo_final_cpf.h5',
+}
+
+# Resolução de entrada dos classificadores
+TAMANHO_ENTRADA = (224, 224)
+
+# Cache por processo dos modelos já carregados: nome -> (modelo, versão do arquivo carregado)
+_modelos_carregados = {}
+_lock = threading.Lock()
+
+# Versão atual de cada arquivo de modelo: nome -> (versão, momento da última verificação)
+_versoes = {}
+
+
+class ModeloTFLite:
+    """
+    Executa um classificador exportado para TFLite com a mesma interface `predict` do Keras.
+    Usa o interpretador leve do LiteRT (`ai-edge-litert`, sucessor do `tflite-runtime`) ou do
+    `tflite_runtime` quando instalado, sem depender do TensorFlow completo.
+    """
+
+    def __init__(self, model_path):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                from tensorflow.lite import Interpreter
+
+        self._interpreter = Interpreter(model_path=model_path)
+        self._entrada = self._interpreter.get_input_details()[0]['index']
+        self._saida = self._interpreter.get_output_details()[0]['index']
+        self._tamanho_lote = None
+
+    def predict(self, lote, verbose=0):
+        # Redimensiona a entrada apenas quando o tamanho do lote muda
+        if self._tamanho_lote != len(lote):
+            self._interpreter.resize_tensor_input(self._entrada, lote.shape)
+            self._interpreter.allocate_tensors()
+            self._tamanho_lote = len(lote)
+        self._interpreter.set_tensor(self._entrada, lote.astype('float32'))
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._saida)
+
+
+def caminho_modelo(nome, runtime):
+    arquivo = MODELOS[nome]
+    if runtime == 'tflite':
+        arquivo = os.path.splitext(arquivo)[0] + '.tflite'
+    return os.path.join(settings.BASE_DIR, 'models', arquivo)
+
+
+def carregar_modelo(nome, runtime):
+    if runtime == 'tflite':
+        return ModeloTFLite(caminho_modelo(nome, runtime))
+
+    import tensorflow as tf
+
+    return tf.keras.models.load_model(caminho_modelo(nome, runtime))
+
+
+def versao_modelo(nome):
+    """
+    Runtime + data de modificação do arquivo do modelo. O arquivo é consultado de novo a cada
+    CLASSIFICADORES_VERSAO_VERIFICAR_SEGUNDOS, então reexportar/trocar o modelo muda a versão sem reiniciar.
+    """
+    agora = time.monotonic()
+    versao, verificado_em = _versoes.get(nome, (None, 0.0))
+    if versao is None or agora - verificado_em >= settings.CLASSIFICADORES_VERSAO_VERIFICAR_SEGUNDOS:
+        runtime = settings.CLASSIFICADORES_RUNTIME
+        caminho = caminho_modelo(nome, runtime)
+        mtime = os.path.getmtime(caminho) if os.path.exists(caminho) else 0
+        versao = f'{runtime}:{mtime:.0f}'
+        _versoes[nome] = (versao, agora)
+    return versao
+
+
+def get_modelo(nome):
+    """
+    Retorna (modelo, versão) do classificador `nome` ('rg' ou 'cpf') no runtime de
+    CLASSIFICADORES_RUNTIME, carregando-o na primeira chamada e de novo quando a versão do
+    arquivo muda. Nada de TensorFlow/TFLite é importado antes disso.
+    """
+    versao = versao_modelo(nome)
+    carregado = _modelos_carregados.get(nome)
+    if carregado is not None and carregado[1] == versao:
+        return carregado
+
+    with _lock:
+        # Outra thread pode ter carregado o modelo enquanto aguardávamos o lock
+        carregado = _modelos_carregados.get(nome)
+        if carregado is None or carregado[1] != versao:
+            carregado = (carregar_modelo(nome, settings.CLASSIFICADORES_RUNTIME), versao)
+            _modelos_carregados[nome] = carregado
+    return carregado
+
+
+def carregar_modelos():
+    """
+    Carrega antecipadamente todos os classificadores (warm-up na subida do worker).
+    """
+    for nome in MODELOS:
+        get_modelo(nome)
+
+
+def _interpolacao(tamanho_entrada, tamanho_saida):
+    """
+    Índices vizinhos e pesos da interpolação bilinear do `tf.image.resize` (centros de pixel em
+    +0,5, sem antialias), em float32 como no TensorFlow.
+    """
+    import numpy as np
+
+    escala = np.float32(tamanho_entrada / tamanho_saida)
+    posicoes = (np.arange(tamanho_saida, dtype=np.float32) + np.float32(0.5)) * escala - np.float32(0.5)
+    base = np.floor(posicoes)
+    inferior = np.clip(base, 0, tamanho_entrada - 1).astype(np.intp)
+    superior = np.clip(np.ceil(posicoes), 0, tamanho_entrada - 1).astype(np.intp)
+    return inferior, superior, (posicoes - base).astype(np.float32)
+
+
+def preparar_imagem(image):
+    """
+    Converte uma imagem PIL RGB no tensor 224x224x3 normalizado esperado pelos classificadores.
+    Reproduz com NumPy o pré-processamento com que os modelos foram validados
+    (img_to_array + tf.image.resize bilinear + /255): o resize do Pillow faz antialias e muda
+    a entrada da CNN em imagens grandes. Nada de TensorFlow é importado.
+    """
+    import numpy as np
+
+    pixels = np.asarray(image.convert('RGB'), dtype=np.float32)
+    altura, largura = TAMANHO_ENTRADA
+    linhas_inf, linhas_sup, peso_y = _interpolacao(pixels.shape[0], altura)
+    colunas_inf, colunas_sup, peso_x = _interpolacao(pixels.shape[1], largura)
+    peso_x = peso_x[np.newaxis, :, np.newaxis]
+
+    cima, baixo = pixels[linhas_inf], pixels[linhas_sup]
+    cima = cima[:, colunas_inf] + (cima[:, colunas_sup] - cima[:, colunas_inf]) * peso_x
+    baixo = baixo[:, colunas_inf] + (baixo[:, colunas_sup] - baixo[:, colunas_inf]) * peso_x
+    return (cima + (baixo - cima) * peso_y[:, np.newaxis, np.newaxis]) / np.float32(255.0)
+
+
+class AgendadorLotes:
+    """
+    Agrupa as imagens pendentes de um classificador por alguns milissegundos e executa
+    um único `predict` vetorizado para o lote, devolvendo a cada requisição o resultado
+    e a versão do modelo que o calculou.
+    """
+
+    def __init__(self, nome, tamanho_maximo, espera_maxima):
+        self.nome = nome
+        self.tamanho_maximo = tamanho_maximo
+        self.espera_maxima = espera_maxima
+        self._fila = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.histograma_lotes = Counter()
+        self.requisicoes = 0
+        self.espera_total = 0.0
+        self.espera_maior = 0.0
+
+    def prever(self, tensor):
+        self._iniciar()
+        future = Future()
+        self._fila.put((tensor, time.monotonic(), future))
+        return future.result()
+
+    def metricas(self):
+        with self._lock:
+            return {
+                'fila': self._fila.qsize(),
+                'requisicoes': self.requisicoes,
+                'histograma_lotes': dict(sorted(self.histograma_lotes.items())),
+                'espera_media_ms': round(self.espera_total / self.requisicoes * 1000, 3) if self.requisicoes else 0.0,
+                'espera_maxima_ms': round(self.espera_maior * 1000, 3),
+            }
+
+    def _iniciar(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._executar, name=f'classificador-{self.nome}', daemon=True
+                )
+                self._thread.start()
+
+    def _coletar_lote(self):
+        # Bloqueia até a primeira imagem e espera no máximo `espera_maxima` pelas demais;
+        # com o prazo vencido (fila acumulada durante o lote anterior) leva só o que já está na fila
+        itens = [self._fila.get()]
+        prazo = itens[0][1] + self.espera_maxima
+        while len(itens) < self.tamanho_maximo:
+            restante = prazo - time.monotonic()
+            try:
+                if restante > 0:
+                    itens.append(self._fila.get(timeout=restante))
+                else:
+                    itens.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return itens
+
+    def _executar(self):
+        import numpy as np
+
+        while True:
+            itens = self._coletar_lote()
+            inicio_lote = time.monotonic()
+            try:
+                lote = np.stack([tensor for tensor, _, _ in itens])
+                modelo, versao = get_modelo(self.nome)
+                predicoes = modelo.predict(lote, verbose=0)
+            except Exception as e:
+                for _, _, future in itens:
+                    future.set_exception(e)
+                continue
+
+            esperas = [inicio_lote - enfileirado_em for _, enfileirado_em, _ in itens]
+            with self._lock:
+                self.histograma_lotes[len(itens)] += 1
+                self.requisicoes += len(itens)
+                self.espera_total += sum(esperas)
+                self.espera_maior = max(self.espera_maior, *esperas)
+            for (_, _, future), predicao in zip(itens, predicoes):
+                future.set_result((bool(predicao[0] > 0.5), versao))
+
+
+_agendadores = {
+    nome: AgendadorLotes(
+        nome,
+        tamanho_maximo=settings.CLASSIFICADORES_LOTE_MAXIMO,
+        espera_maxima=settings.CLASSIFICADORES_ESPERA_MAXIMA_MS / 1000,
+    )
+    for nome in MODELOS
+}
+
+
+class CacheMemoria:
+    """
+    Cache LRU local ao processo, com tamanho máximo e expiração por TTL.
+    """
+
+    def __init__(self, tamanho_maximo, ttl):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+
+    def __len__(self):
+        return len(self._itens)
+
+
+class CacheDjango:
+    """
+    Usa um alias de `settings.CACHES`, compartilhando os resultados entre processos.
+    """
+
+    def __init__(self, alias, ttl):
+        from django.core.cache import caches
+
+        self._cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, chave):
+        return self._cache.get(f'classificador:{chave}')
+
+    def set(self, chave, valor):
+        self._cache.set(f'classificador:{chave}', valor, self.ttl)
+
+
+class CachePredicoes:
+    """
+    Guarda o resultado da classificação por hash SHA-256 dos bytes da imagem e versão do modelo,
+    evitando decodificar e rodar a CNN novamente quando o candidato reenvia a mesma foto.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if settings.CLASSIFICADORES_CACHE == 'django':
+                self._backend = CacheDjango(
+                    settings.CLASSIFICADORES_CACHE_ALIAS, settings.CLASSIFICADORES_CACHE_TTL
+                )
+            else:
+                self._backend = CacheMemoria(
+                    settings.CLASSIFICADORES_CACHE_TAMANHO, settings.CLASSIFICADORES_CACHE_TTL
+                )
+        return self._backend
+
+    def chave(self, img_data, nome, versao):
+        # Modelo trocado = versão nova: as entradas calculadas pelo modelo antigo deixam de ser lidas
+        return f'{nome}:{versao}:{hashlib.sha256(img_data).hexdigest()}'
+
+    def get(self, chave):
+        valor = self.backend.get(chave)
+        with self._lock:
+            if valor is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+        return valor
+
+    def set(self, chave, valor):
+        self.backend.set(chave, valor)
+
+    def metricas(self):
+        with self._lock:
+            acertos, falhas = self.acertos, self.falhas
+        total = acertos + falhas
+        dados = {
+            'backend': settings.CLASSIFICADORES_CACHE,
+            'acertos': acertos,
+            'falhas': falhas,
+            'taxa_acerto': round(acertos / total, 4) if total else 0.0,
+        }
+        if isinstance(self._backend, CacheMemoria):
+            dados['itens'] = len(self._backend)
+        return dados
+
+
+_cache_predicoes = CachePredicoes()
+
+
+def metricas():
+    """
+    Retorna profundidade da fila, histograma de tamanho de lote e tempo de espera por classificador,
+    além dos contadores do cache de predições.
+    """
+    return {
+        'lotes': {nome: agendador.metricas() for nome, agendador in _agendadores.items()},
+        'cache': _cache_predicoes.metricas(),
+    }
+
+
+def prever_local(tensor, nome):
+    return _agendadores[nome].prever(tensor)
+
+
+def validate_image(image, nome):
+    """
+    Classifica uma imagem PIL e retorna (resultado, versão do modelo que a classificou).
+    """
+    # O pré-processamento fica no worker web: o serviço de classificadores recebe só o tensor 224x224
+    tensor = preparar_imagem(image)
+    if settings.CLASSIFICADORES_SOCKET:
+        from .servico_classificadores import prever_remoto
+
+        return prever_remoto(tensor, nome)
+    return prever_local(tensor, nome)
+
+
+def validar_documento(img_data, nome):
+    """
+    Classifica os bytes de uma imagem de documento, consultando antes o cache de predições.
+    """
+    from PIL import Image
+
+    if not settings.CLASSIFICADORES_CACHE:
+        return validate_image(Image.open(BytesIO(img_data)).convert('RGB'), nome)[0]
+
+    resultado = _cache_predicoes.get(_cache_predicoes.chave(img_data, nome, versao_modelo(nome)))
+    if resultado is None:
+        resultado, versao = validate_image(Image.open(BytesIO(img_data)).convert('RGB'), nome)
+        # Gravado com a versão que de fato calculou o resultado: se o modelo foi trocado durante a
+        # inferência, a entrada fica com a versão antiga e não é servida para o modelo novo
+        _cache_predicoes.set(_cache_predicoes.chave(img_data, nome, versao), resultado)
+    return resultado
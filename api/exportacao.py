@@ -0,0 +1,432 @@
+# Exportação das inscrições (listagem administrativa): geração das linhas e processamento em
+# segundo plano das exportações solicitadas em /api/admin/exportacoes/.
+#
+# O worker (`manage.py processar_exportacoes`) lê as inscrições em lotes por id e acrescenta
+# cada lote a um CSV parcial, registrando no banco o último id e o tamanho do arquivo. Se o
+# worker cair, a reserva expira e outro worker retoma do último lote confirmado. Concluída a
+# leitura, o CSV parcial vira o arquivo final no formato pedido (CSV, XLSX ou Parquet).
+import csv
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q, Sum
+from django.utils import timezone
+
+from . import referencias
+from .filtros import InscricaoFilter, inscricoes_listagem
+from .models import Endereco, Exportacao, HistoricoEducacional
+
+# Colunas da exportação, na ordem das chaves de linha_inscricao()
+COLUNAS = (
+    'nome_completo', 'nome_social', 'nome_mae', 'cpf', 'registro_geral', 'data_nascimento', 'genero',
+    'telefone', 'estado_civil', 'portador_necessidades_especiais', 'necessidade_especial',
+    'renda_percapita', 'nacionalidade', 'naturalidade', 'cep', 'cidade', 'estado', 'bairro',
+    'logradouro', 'numero', 'complemento', 'tipo_escola', 'nivel_escolaridade', 'curso',
+    'prazo_inscricoes', 'polo',
+)
+
+# Rótulos dos campos codificados do candidato e do histórico
+GENEROS = {0: 'Não informado', 1: 'Masculino', 2: 'Feminino', 3: 'Outro'}
+ESTADOS_CIVIS = {0: 'Solteiro(a)', 1: 'Casado(a)', 2: 'Divorciado(a)', 3: 'Viúvo(a)'}
+RENDAS_PER_CAPITA = {
+    0: 'Prefiro não informar',
+    1: 'Até 0,5 salário mínimo',
+    2: '0,5 a 1,0 salário mínimo',
+    3: '1,0 a 1,5 salário mínimo',
+    4: '1,5 a 2,5 salários mínimos',
+    5: '2,5 a 3,5 salários mínimos',
+    6: 'Acima de 3,5 salários mínimos',
+}
+NIVEIS_ESCOLARIDADE = {
+    0: 'Fundamental I - Completo (1º a 5º)',
+    1: 'Fundamental I - Incompleto (1º a 5º)',
+    2: 'Fundamental II - Completo (6º a 9º)',
+    3: 'Fundamental II - Incompleto (6º a 9º)',
+    4: 'Médio - Completo',
+    5: 'Médio - Incompleto',
+    6: 'Superior - Completo',
+    7: 'Superior - Incompleto',
+    8: 'Pós-graduação - Completo',
+    9: 'Pós-graduação - Incompleto',
+}
+
+# Limite de linhas de uma planilha XLSX, descontado o cabeçalho
+XLSX_MAXIMO_LINHAS = 1048575
+
+
+class EcoCSV:
+    """
+    Pseudo-arquivo para o csv.writer: devolve a linha formatada em vez de guardá-la.
+    """
+
+    def write(self, valor):
+        return valor
+
+
+def lotes(queryset, tamanho, depois_de=None):
+    """
+    Percorre o queryset em lotes por chave primária (WHERE id > último ORDER BY id LIMIT n),
+    a partir do id `depois_de`. Cada lote roda os próprios prefetch_related e a memória fica
+    limitada a um lote, independente do driver do banco manter ou não o resultado inteiro no cliente.
+    """
+    ultimo = depois_de
+    while True:
+        lote = queryset.order_by('pk')
+        if ultimo is not None:
+            lote = lote.filter(pk__gt=ultimo)
+        lote = list(lote[:tamanho])
+        if not lote:
+            return
+        yield lote
+        ultimo = lote[-1].pk
+
+
+def iterar_em_lotes(queryset, tamanho):
+    for lote in lotes(queryset, tamanho):
+        yield from lote
+
+
+def linha_inscricao(instance):
+    """
+    Linha da exportação de uma inscrição do queryset do InscricaoViewSet.
+    """
+    candidato = instance.candidato
+    # Usa os dados do prefetch do lote (first()/exists() fariam novas consultas por linha)
+    enderecos = candidato.endereco_set.all()
+    endereco = enderecos[0] if enderecos else None
+    historicos = candidato.historicoeducacional_set.all()
+    historico = historicos[0] if historicos else None
+    polo = referencias.polo(instance.polo_ofertante_id)
+    nacionalidade = referencias.pais(candidato.nacionalidade_id)
+    naturalidade = referencias.cidade(candidato.naturalidade_id)
+    curso = instance.curso
+
+    cidade_nome = None
+    if endereco and endereco.cidade:
+        if isinstance(endereco.cidade, str):
+            cidade_nome = endereco.cidade 
+        elif hasattr(endereco.cidade, 'nome'):
+            cidade_nome = endereco.cidade.nome  
+
+    estado_nome = None
+    if endereco and hasattr(endereco.cidade, 'estado'):
+        estado = endereco.cidade.estado
+        estado_nome = estado.nome if hasattr(estado, 'nome') else None
+
+    return {
+        # Dados pessoais
+        'nome_completo': candidato.nome_completo,
+        'nome_social': candidato.nome_social,
+        'nome_mae': candidato.nome_mae,
+        'cpf': candidato.cpf,
+        'registro_geral': candidato.registro_geral,
+        'data_nascimento': candidato.data_nascimento,
+        'genero': GENEROS.get(candidato.genero, 'Desconhecido'),
+        'telefone': candidato.telefone_celular,
+        'estado_civil': ESTADOS_CIVIS.get(candidato.estado_civil),
+        'portador_necessidades_especiais': 'Sim' if candidato.portador_necessidades_especiais else 'Não',
+        'necessidade_especial': candidato.necessidade_especial if  candidato.necessidade_especial else 'Nenhuma',
+        'renda_percapita': RENDAS_PER_CAPITA.get(candidato.renda_per_capita),
+        'nacionalidade': nacionalidade.nome,
+        'naturalidade': naturalidade.nome,
+
+        # Endereço
+        'cep': endereco.cep if endereco else "Não informado",
+        'cidade': cidade_nome if cidade_nome else "Não informado",
+        'estado': estado_nome if estado_nome else "Não informado",
+        'bairro': endereco.bairro if endereco else "Não informado",
+        'logradouro': endereco.logradouro if endereco else "Não informado",
+        'numero': endereco.numero if endereco else "Não informado",
+        'complemento': endereco.complemento if endereco else "Não informado",
+
+        # Histórico educacional
+        'tipo_escola': historico.tipo_escola if historico else "Não informado",
+        'nivel_escolaridade': NIVEIS_ESCOLARIDADE.get(historico.nivel_escolaridade) if historico else None,
+
+        # Curso
+        'curso': curso.nome if curso else None,
+        'prazo_inscricoes': curso.prazo_inscricoes if curso else None,
+
+        # Polo
+        'polo': polo.nome if polo else None,
+    }
+
+
+def com_relacionados(queryset):
+    # Endereço e histórico de cada lote em uma consulta por tabela, o mais recente primeiro
+    return queryset.prefetch_related(
+        Prefetch('candidato__endereco_set', queryset=Endereco.objects.order_by('-id')),
+        Prefetch('candidato__historicoeducacional_set', queryset=HistoricoEducacional.objects.order_by('-id')),
+    )
+
+
+def linhas_inscricoes(queryset):
+    for instance in iterar_em_lotes(com_relacionados(queryset), settings.EXPORTACAO_LOTE):
+        yield linha_inscricao(instance)
+
+
+def consulta_inscricoes(filtros):
+    """
+    Queryset da listagem administrativa com os mesmos filtros (InscricaoFilter) da requisição.
+    """
+    return com_relacionados(InscricaoFilter(filtros, queryset=inscricoes_listagem()).qs)
+
+
+# Solicitação e acompanhamento
+
+def formato_disponivel(formato):
+    # XLSX e Parquet dependem de openpyxl e pyarrow (requirements.txt), importados só quando usados
+    modulo = {'xlsx': 'openpyxl', 'parquet': 'pyarrow'}.get(formato)
+    if modulo is None:
+        return formato == 'csv'
+    try:
+        __import__(modulo)
+    except ImportError:
+        return False
+    return True
+
+
+def chave(formato, filtros):
+    conteudo = json.dumps({'formato': formato, 'filtros': filtros}, sort_keys=True)
+    return hashlib.sha256(conteudo.encode()).hexdigest()
+
+
+def solicitar(formato, filtros, usuario=None):
+    """
+    Retorna (exportacao, criada). Pedidos repetidos com o mesmo formato e filtros reaproveitam a
+    exportação em andamento ou a concluída há menos de EXPORTACAO_REAPROVEITAR_SEGUNDOS.
+    """
+    chave_pedido = chave(formato, filtros)
+    limite = timezone.now() - timedelta(seconds=settings.EXPORTACAO_REAPROVEITAR_SEGUNDOS)
+    existente = (
+        Exportacao.objects
+        .filter(chave=chave_pedido)
+        .filter(Q(status__in=(0, 1)) | Q(status=2, data_conclusao__gte=limite))
+        .order_by('-id')
+        .first()
+    )
+    if existente is not None:
+        Exportacao.objects.filter(id=existente.id).update(reaproveitamentos=F('reaproveitamentos') + 1)
+        return existente, False
+
+    exportacao = Exportacao.objects.create(formato=formato, filtros=filtros, chave=chave_pedido, usuario=usuario)
+    return exportacao, True
+
+
+def metricas():
+    """
+    Totais por formato e status e tempos médios das exportações concluídas.
+    """
+    resultado = {}
+    for formato, _ in Exportacao.FORMATO_CHOICES:
+        exportacoes = Exportacao.objects.filter(formato=formato)
+        por_status = dict(exportacoes.values_list('status').annotate(total=Count('id')).order_by())
+        concluidas = exportacoes.filter(status__in=(2, 4)).aggregate(
+            total=Count('id'),
+            linhas=Sum('linhas'),
+            tempo_extracao=Sum('tempo_extracao'),
+            tempo_conversao=Sum('tempo_conversao'),
+            reaproveitamentos=Sum('reaproveitamentos'),
+        )
+        total = concluidas['total']
+        tempo_extracao = concluidas['tempo_extracao'] or 0
+        resultado[formato] = {
+            'status': {str(rotulo): por_status.get(valor, 0) for valor, rotulo in Exportacao.STATUS_CHOICES},
+            'reaproveitamentos': concluidas['reaproveitamentos'] or 0,
+            'tempo_extracao_medio': round(tempo_extracao / total, 3) if total else None,
+            'tempo_conversao_medio': round((concluidas['tempo_conversao'] or 0) / total, 3) if total else None,
+            'linhas_por_segundo': round((concluidas['linhas'] or 0) / tempo_extracao, 1) if tempo_extracao else None,
+        }
+    return resultado
+
+
+# Processamento (worker)
+
+def _caminho(nome):
+    return os.path.join(settings.MEDIA_ROOT, nome)
+
+
+def _nome_parcial(exportacao):
+    return f'exportacoes/{exportacao.id}.parcial.csv'
+
+
+def reservar():
+    """
+    Reserva a próxima exportação pendente, ou uma em processamento cuja reserva expirou
+    (worker interrompido), e retorna a instância com o token da reserva.
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        exportacao = (
+            Exportacao.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=0) | Q(status=1, reservada_ate__lt=agora))
+            .order_by('id')
+            .first()
+        )
+        if exportacao is None:
+            return None
+        exportacao.status = 1
+        exportacao.reserva = uuid.uuid4().hex
+        exportacao.reservada_ate = agora + timedelta(seconds=settings.EXPORTACAO_RESERVA_SEGUNDOS)
+        exportacao.tentativas += 1
+        exportacao.data_inicio = exportacao.data_inicio or agora
+        exportacao.save(update_fields=['status', 'reserva', 'reservada_ate', 'tentativas', 'data_inicio'])
+    return exportacao
+
+
+class ReservaPerdida(Exception):
+    """
+    A reserva expirou e a exportação foi assumida por outro worker.
+    """
+
+
+def _confirmar(exportacao, **campos):
+    # Grava o progresso e renova a reserva, desde que ela ainda seja deste worker
+    campos['reservada_ate'] = timezone.now() + timedelta(seconds=settings.EXPORTACAO_RESERVA_SEGUNDOS)
+    atualizadas = Exportacao.objects.filter(id=exportacao.id, reserva=exportacao.reserva).update(**campos)
+    if not atualizadas:
+        raise ReservaPerdida(exportacao.id)
+    for campo, valor in campos.items():
+        setattr(exportacao, campo, valor)
+
+
+def processar(exportacao):
+    """
+    Executa (ou retoma) uma exportação reservada. Falhas ficam registradas em `ultimo_erro` e a
+    exportação volta para a fila até EXPORTACAO_MAX_TENTATIVAS.
+    """
+    try:
+        _extrair(exportacao)
+        _converter(exportacao)
+    except ReservaPerdida:
+        raise
+    except Exception as e:
+        falhou = exportacao.tentativas >= settings.EXPORTACAO_MAX_TENTATIVAS
+        Exportacao.objects.filter(id=exportacao.id, reserva=exportacao.reserva).update(
+            status=3 if falhou else 1,
+            reservada_ate=timezone.now(),
+            ultimo_erro=str(e),
+        )
+        if falhou:
+            _remover(_nome_parcial(exportacao))
+        raise
+
+
+def _extrair(exportacao):
+    if exportacao.total is None:
+        _confirmar(exportacao, total=consulta_inscricoes(exportacao.filtros).count())
+
+    caminho = _caminho(_nome_parcial(exportacao))
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    if exportacao.bytes_parciais and (not os.path.exists(caminho) or os.path.getsize(caminho) < exportacao.bytes_parciais):
+        # O CSV parcial se perdeu (ex.: outro servidor): recomeça do início
+        _confirmar(exportacao, ultimo_id=0, linhas=0, bytes_parciais=0, tempo_extracao=0)
+    writer = csv.writer(EcoCSV())
+    with open(caminho, 'ab') as arquivo:
+        # Descarta o que foi escrito depois do último lote confirmado
+        arquivo.truncate(exportacao.bytes_parciais)
+        arquivo.seek(exportacao.bytes_parciais)
+        if not exportacao.bytes_parciais:
+            arquivo.write(writer.writerow(COLUNAS).encode('utf-8'))
+
+        queryset = consulta_inscricoes(exportacao.filtros)
+        inicio = time.monotonic()
+        for lote in lotes(queryset, settings.EXPORTACAO_LOTE, depois_de=exportacao.ultimo_id or None):
+            linhas = (linha_inscricao(instance) for instance in lote)
+            arquivo.write(''.join(writer.writerow([linha[coluna] for coluna in COLUNAS]) for linha in linhas).encode('utf-8'))
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+            agora = time.monotonic()
+            _confirmar(
+                exportacao,
+                ultimo_id=lote[-1].pk,
+                linhas=exportacao.linhas + len(lote),
+                bytes_parciais=arquivo.tell(),
+                tempo_extracao=exportacao.tempo_extracao + (agora - inicio),
+            )
+            inicio = agora
+
+
+def _converter(exportacao):
+    inicio = time.monotonic()
+    parcial = _caminho(_nome_parcial(exportacao))
+    nome = f'exportacoes/inscricoes-{exportacao.id}-{uuid.uuid4().hex[:8]}.{exportacao.formato}'
+    destino = _caminho(nome)
+
+    if exportacao.formato == 'csv':
+        os.replace(parcial, destino)
+    else:
+        temporario = destino + '.tmp'
+        if exportacao.formato == 'xlsx':
+            _csv_para_xlsx(parcial, temporario, exportacao.linhas)
+        else:
+            _csv_para_parquet(parcial, temporario)
+        os.replace(temporario, destino)
+        os.remove(parcial)
+
+    _confirmar(
+        exportacao,
+        status=2,
+        arquivo=nome,
+        tempo_conversao=time.monotonic() - inicio,
+        data_conclusao=timezone.now(),
+        ultimo_erro=None,
+    )
+
+
+def _csv_para_xlsx(origem, destino, linhas):
+    from openpyxl import Workbook
+
+    if linhas > XLSX_MAXIMO_LINHAS:
+        raise ValueError(f'{linhas} linhas excedem o limite do XLSX ({XLSX_MAXIMO_LINHAS}); use CSV ou Parquet.')
+
+    # write_only grava as linhas em disco à medida que são adicionadas
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet('inscricoes')
+    with open(origem, newline='', encoding='utf-8') as arquivo:
+        for linha in csv.reader(arquivo):
+            aba.append(linha)
+    planilha.save(destino)
+
+
+def _csv_para_parquet(origem, destino):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    # Todas as colunas como texto: evita que a inferência de tipos varie entre os blocos lidos
+    leitor = pa_csv.open_csv(
+        origem,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={coluna: pa.string() for coluna in COLUNAS},
+            strings_can_be_null=True,
+        ),
+    )
+    with pq.ParquetWriter(destino, leitor.schema, compression='zstd') as parquet:
+        for bloco in leitor:
+            parquet.write_batch(bloco)
+
+
+def _remover(nome):
+    try:
+        os.remove(_caminho(nome))
+    except FileNotFoundError:
+        pass
+
+
+def expirar_antigas():
+    """
+    Apaga os arquivos das exportações concluídas há mais de EXPORTACAO_RETENCAO_SEGUNDOS.
+    """
+    limite = timezone.now() - timedelta(seconds=settings.EXPORTACAO_RETENCAO_SEGUNDOS)
+    antigas = list(Exportacao.objects.filter(status=2, data_conclusao__lt=limite))
+    for exportacao in antigas:
+        _remover(exportacao.arquivo.name)
+    Exportacao.objects.filter(id__in=[exportacao.id for exportacao in antigas]).update(status=4, arquivo=None)
+    return len(antigas)
@@ -0,0 +1,33 @@
+# Filtros e queryset da listagem administrativa de inscrições, usados pelo InscricaoViewSet
+# (api/views.py) e pelas exportações em segundo plano (api/exportacao.py).
+from django_filters import rest_framework as filters
+
+from .busca import filtrar_inscricoes
+from .models import Inscricao
+
+
+def inscricoes_listagem():
+    # Só os JOINs 1:1 de candidato e curso: o COUNT da paginação não precisa de JOIN nenhum.
+    # Polo, país e cidade vêm do cache de referência e os rótulos da exportação de api/exportacao.py.
+    return Inscricao.objects.select_related('candidato', 'curso')
+
+
+class InscricaoFilter(filters.FilterSet):
+    """
+    Filtros para buscar inscrições com base no candidato, curso, polo e data.
+    """
+
+    nome = filters.CharFilter(field_name='candidato__nome_completo', lookup_expr='icontains')
+    # Nome, nome social, CPF ou e-mail pelo índice de busca (api/busca.py), por início de palavra
+    busca = filters.CharFilter(method='filtrar_busca')
+    curso = filters.NumberFilter(field_name='curso__id')
+    polo = filters.NumberFilter(field_name='polo_ofertante__id')
+    data_inicial = filters.DateFilter(field_name='data_criacao', lookup_expr='gte')
+    data_final = filters.DateFilter(field_name='data_criacao', lookup_expr='lte')
+
+    class Meta:
+        model = Inscricao
+        fields = ['status']
+
+    def filtrar_busca(self, queryset, name, value):
+        return filtrar_inscricoes(queryset, value)
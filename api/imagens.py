@@ -0,0 +1,113 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+
+# Campos de imagem dos documentos enviados pelos candidatos, por modelo
+CAMPOS_DOCUMENTOS = {
+    'Inscricao': ('anexo_cpf', 'anexo_rg', 'anexo_historico_escolar'),
+}
+
+EXTENSOES_FORMATO = {'WEBP': '.webp', 'JPEG': '.jpg', 'PNG': '.png'}
+
+# Sufixo da miniatura de revisão gravada ao lado do arquivo principal
+VARIANTE_REVISAO = 'revisao'
+
+
+def nome_variante(nome, variante):
+    base = os.path.splitext(nome)[0]
+    return f'{base}_{variante}{EXTENSOES_FORMATO[settings.DOCUMENTOS_FORMATO]}'
+
+
+def url_revisao(arquivo, request=None):
+    """
+    URL da miniatura de revisão de um anexo na MediaImageView, que serve o original quando
+    a miniatura não existe (ex.: anexos gravados antes da normalização).
+    """
+    if not arquivo:
+        return None
+    url = reverse('media-image', kwargs={'filename': arquivo.name}) + f'?variante={VARIANTE_REVISAO}'
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _codificar(image, formato, qualidade):
+    buffer = BytesIO()
+    image.save(buffer, format=formato, quality=qualidade, optimize=True)
+    return buffer.getvalue()
+
+
+def normalizar_documento(conteudo):
+    """
+    Corrige a orientação EXIF, limita a resolução e recomprime a imagem enviada.
+    Retorna (bytes normalizados, miniatura de revisão).
+    """
+    from PIL import Image, ImageOps
+
+    image = Image.open(conteudo)
+    image = ImageOps.exif_transpose(image).convert('RGB')
+
+    formato = settings.DOCUMENTOS_FORMATO
+    qualidade = settings.DOCUMENTOS_QUALIDADE
+
+    maximo = settings.DOCUMENTOS_RESOLUCAO_MAXIMA
+    image.thumbnail((maximo, maximo), Image.LANCZOS)
+    normalizado = _codificar(image, formato, qualidade)
+
+    revisao = image.copy()
+    revisao.thumbnail((settings.DOCUMENTOS_TAMANHO_REVISAO,) * 2, Image.LANCZOS)
+    miniatura = _codificar(revisao, formato, qualidade)
+
+    return normalizado, miniatura
+
+
+def processar_documentos(instance):
+    """
+    Normaliza os anexos ainda não gravados da instância e grava a miniatura de revisão ao lado deles.
+    Chamada no pre_save, antes que o FileField grave o arquivo original.
+    """
+    for campo in CAMPOS_DOCUMENTOS.get(type(instance).__name__, ()):
+        arquivo = getattr(instance, campo)
+        if not arquivo or arquivo._committed:
+            continue
+
+        try:
+            arquivo.seek(0)
+            normalizado, miniatura = normalizar_documento(arquivo)
+        except Exception:
+            # Se a imagem não puder ser processada, grava o arquivo como foi enviado
+            arquivo.seek(0)
+            continue
+
+        nome = os.path.splitext(os.path.basename(arquivo.name))[0]
+        nome += EXTENSOES_FORMATO[settings.DOCUMENTOS_FORMATO]
+        arquivo.save(nome, ContentFile(normalizado), save=False)
+
+        default_storage.save(nome_variante(arquivo.name, VARIANTE_REVISAO), ContentFile(miniatura))
+
+
+def remover_documento(nome):
+    """
+    Apaga o arquivo de um anexo e as variantes gravadas ao lado dele.
+    """
+    # `_classificador.png`: entrada 224x224 gravada por versões anteriores e nunca lida
+    base = os.path.splitext(nome)[0]
+    for caminho in (nome, nome_variante(nome, VARIANTE_REVISAO), f'{base}_classificador.png'):
+        default_storage.delete(caminho)
+
+
+def remover_anexos_substituidos(instance, dados):
+    """
+    Agenda, para depois do commit, a remoção dos anexos atuais da instância que serão
+    substituídos pelos arquivos enviados em `dados`.
+    """
+    nomes = [
+        getattr(instance, campo).name
+        for campo in CAMPOS_DOCUMENTOS.get(type(instance).__name__, ())
+        if dados.get(campo) and getattr(instance, campo)
+    ]
+    if nomes:
+        transaction.on_commit(lambda: [remover_documento(nome) for nome in nomes])
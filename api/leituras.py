@@ -0,0 +1,193 @@
+# Modelos de leitura das páginas do candidato: montam a resposta a partir de um único
+# carregamento das linhas necessárias, sem consultas por campo relacionado.
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Prefetch
+
+from . import referencias
+from .catalogo import MetricasCache
+from .imagens import url_revisao
+from .models import Endereco, HistoricoEducacional, Inscricao
+from .serializers import ANEXOS_INSCRICAO, CandidatoSerializer
+
+
+def _url_anexo(anexo):
+    # Nome do arquivo para a MediaImageView (a URL sem o prefixo /media/)
+    return anexo.url.replace('/media/', '') if anexo else None
+
+
+def detalhe_inscricao(inscricao_id, hash):
+    """
+    Dados da página de detalhe da inscrição (InscricaoDetailView), ou None se a inscrição não
+    existir. Três consultas: inscrição com candidato e curso, endereço e histórico; países,
+    cidades e polos do curso vêm do cache de referência.
+    """
+    inscricao = (
+        Inscricao.objects
+        .select_related('candidato', 'curso')
+        .prefetch_related(
+            Prefetch('candidato__endereco_set', queryset=Endereco.objects.order_by('-id')),
+            Prefetch('candidato__historicoeducacional_set', queryset=HistoricoEducacional.objects.order_by('-id')),
+        )
+        .filter(id=inscricao_id, hash=hash)
+        .first()
+    )
+    if inscricao is None:
+        return None
+
+    candidato = inscricao.candidato
+    curso = inscricao.curso
+
+    candidato_data = CandidatoSerializer(candidato).data
+    # Polo e anexos são desta inscrição; a resposta mantém o formato, dentro de `candidato`
+    candidato_data['polo_ofertante'] = inscricao.polo_ofertante_id
+    candidato_data['anexo_cpf'] = _url_anexo(inscricao.anexo_cpf)
+    candidato_data['anexo_rg'] = _url_anexo(inscricao.anexo_rg)
+    candidato_data['validacao_anexo_cpf'] = inscricao.validacao_anexo_cpf
+    candidato_data['validacao_anexo_rg'] = inscricao.validacao_anexo_rg
+
+    pais = referencias.pais(candidato.nacionalidade_id)
+    candidato_data['nacionalidade'] = pais.sigla if pais else None
+    cidade = referencias.cidade(candidato.naturalidade_id)
+    candidato_data['naturalidade'] = cidade.nome if cidade else None
+
+    enderecos = candidato.endereco_set.all()
+    endereco = enderecos[0] if enderecos else None
+    candidato_data['endereco'] = {
+        "logradouro": endereco.logradouro,
+        "numero": endereco.numero,
+        "bairro": endereco.bairro,
+        "cidade": endereco.cidade,
+        "estado": endereco.estado,
+        "cep": endereco.cep,
+        "area": endereco.area,
+        "complemento": endereco.complemento
+    } if endereco else None
+
+    historicos = candidato.historicoeducacional_set.all()
+    historico = historicos[0] if historicos else None
+    candidato_data['historico_educacional'] = {
+        "tipo_escola": historico.tipo_escola,
+        "nivel_escolaridade": historico.nivel_escolaridade,
+        "anexo_historico_escolar": _url_anexo(inscricao.anexo_historico_escolar)
+    } if historico else None
+
+    return {
+        "id": inscricao.id,
+        "candidato": candidato_data,
+        # Mesmo formato do InscricaoSerializer (campos declarados como CharField)
+        "hash": inscricao.hash,
+        "status": str(inscricao.status),
+        "curso": {
+            "id": curso.id,
+            "nome": curso.nome,
+        },
+        "data_criacao": str(inscricao.data_criacao),
+        "data_modificacao": str(inscricao.data_modificacao),
+        # Mesmo formato do InscricaoSerializer: miniaturas de revisão dos documentos
+        "anexos_revisao": {campo: url_revisao(getattr(inscricao, campo)) for campo in ANEXOS_INSCRICAO},
+        "polo_options": [
+            {
+                "id": polo.id,
+                "label": polo.nome,
+                "selected": polo.id == inscricao.polo_ofertante_id,
+                "logradouro": polo.logradouro or "não definido",
+                "numero": polo.numero or 0,
+                "bairro": polo.bairro or "não definido",
+                "cidade": polo.cidade_id
+            }
+            for polo in referencias.polos_do_curso(curso.id)
+        ],
+    }
+
+
+def resumo_candidato(hash):
+    """
+    Resumo do portal do candidato (CandidatoPorHashView): o candidato da inscrição e todas as
+    inscrições dele, em uma lista com um único item. None se a hash não existir.
+    """
+    inscricao = Inscricao.objects.select_related('candidato').filter(hash=hash).first()
+    if inscricao is None:
+        return None
+
+    candidato = inscricao.candidato
+    inscricoes = Inscricao.objects.filter(candidato_id=candidato.id).select_related('curso')
+    return [{
+        "id": candidato.id,
+        "nome": candidato.nome_completo,
+        "cpf": candidato.cpf,
+        "inscricoes": [
+            {
+                "id": inscricao.id,
+                "curso": inscricao.curso.nome,
+                "descricao": inscricao.curso.descricao,
+                "data_inscricao": inscricao.data_criacao,
+                "status": inscricao.status,
+                "carga_horaria": inscricao.curso.carga_horaria
+            }
+            for inscricao in inscricoes
+        ]
+    }]
+
+
+# Cache do portal por hash. As entradas de um candidato são apagadas quando as inscrições
+# ou os dados dele mudam; alterações de cursos trocam a versão e descartam todas.
+CHAVE_VERSAO_PORTAL = 'portal:versao'
+
+_metricas_portal = MetricasCache()
+
+
+def _cache_portal():
+    return caches[settings.PORTAL_CACHE_ALIAS]
+
+
+def _versao_portal():
+    versao = _cache_portal().get(CHAVE_VERSAO_PORTAL)
+    if versao is None:
+        versao = uuid.uuid4().hex
+        if not _cache_portal().add(CHAVE_VERSAO_PORTAL, versao, None):
+            versao = _cache_portal().get(CHAVE_VERSAO_PORTAL, versao)
+    return versao
+
+
+def _chave_portal(versao, hash):
+    return f'portal:{versao}:{hash}'
+
+
+def resumo_candidato_cacheado(hash):
+    if not settings.PORTAL_CACHE:
+        return resumo_candidato(hash)
+
+    chave = _chave_portal(_versao_portal(), hash)
+    dados = _cache_portal().get(chave)
+    if dados is not None:
+        _metricas_portal.registrar('acertos')
+        return dados
+
+    _metricas_portal.registrar('falhas')
+    dados = resumo_candidato(hash)
+    if dados is not None:
+        _cache_portal().set(chave, dados, settings.PORTAL_CACHE_TTL)
+    return dados
+
+
+def invalidar_portal(candidatos_ids):
+    """
+    Apaga os resumos em cache de todas as inscrições dos candidatos informados.
+    """
+    candidatos_ids = set(candidatos_ids)
+    if not settings.PORTAL_CACHE or not candidatos_ids:
+        return
+    versao = _versao_portal()
+    hashes = Inscricao.objects.filter(candidato_id__in=candidatos_ids).values_list('hash', flat=True)
+    _cache_portal().delete_many([_chave_portal(versao, hash) for hash in hashes])
+
+
+def invalidar_portal_todos():
+    _cache_portal().set(CHAVE_VERSAO_PORTAL, uuid.uuid4().hex, None)
+
+
+def metricas_portal():
+    return _metricas_portal.resumo()
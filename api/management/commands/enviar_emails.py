@@ -0,0 +1,65 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import EmailFila
+from api.utils import ConexaoEmail, enviar_emails_fila
+
+
+class Command(BaseCommand):
+    help = 'Envia os e-mails pendentes da fila (email_fila), com novas tentativas e backoff exponencial.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='Continua processando a fila indefinidamente.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos de espera quando a fila está vazia.')
+        parser.add_argument('--lote', type=int, default=50, help='Quantidade de e-mails reservados por vez.')
+
+    def handle(self, *args, **options):
+        # A mesma conexão SMTP é reaproveitada entre os lotes
+        self.conexao = ConexaoEmail()
+        try:
+            self._executar(options)
+        finally:
+            self.conexao.fechar()
+
+    def _executar(self, options):
+        while True:
+            try:
+                processados = self._processar_lote(options['lote'])
+            except Exception as e:
+                # Ex.: banco indisponível; no modo contínuo tenta novamente no próximo ciclo
+                if not options['continuo']:
+                    raise
+                self.stderr.write(f'Erro ao processar a fila de e-mails: {e}')
+                processados = 0
+
+            if not options['continuo']:
+                break
+            if not processados:
+                time.sleep(options['intervalo'])
+
+    def _reservar(self, lote):
+        # Reserva o lote adiando a próxima tentativa; se o worker cair, os e-mails voltam à fila
+        agora = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                EmailFila.objects.select_for_update(skip_locked=True)
+                .filter(status=0, proxima_tentativa__lte=agora)
+                .order_by('proxima_tentativa')
+                .values_list('id', flat=True)[:lote]
+            )
+            EmailFila.objects.filter(id__in=ids).update(
+                proxima_tentativa=agora + timedelta(seconds=settings.EMAIL_FILA_RESERVA_SEGUNDOS)
+            )
+        return list(EmailFila.objects.filter(id__in=ids).order_by('id'))
+
+    def _processar_lote(self, lote):
+        emails = self._reservar(lote)
+        enviados = enviar_emails_fila(emails, self.conexao)
+        if emails:
+            self.stdout.write(f'{enviados} de {len(emails)} e-mails enviados')
+        return len(emails)
@@ -0,0 +1,110 @@
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.classificadores import MODELOS, carregar_modelo, caminho_modelo, preparar_imagem
+
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+RUNTIMES = ('keras', 'tflite')
+
+
+def medir_runtime(nome, runtime, arquivos):
+    """
+    Roda em um processo novo por runtime: o pico de memória (ru_maxrss) não mistura Keras e TFLite.
+    Retorna as predições, a latência média por imagem (ms) e a memória do modelo carregado (MB).
+    """
+    import numpy as np
+    from PIL import Image
+
+    tensores = np.stack([preparar_imagem(Image.open(arquivo).convert('RGB')) for arquivo in arquivos])
+    memoria_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    modelo = carregar_modelo(nome, runtime)
+    modelo.predict(tensores[:1], verbose=0)  # Aquecimento
+
+    inicio = time.perf_counter()
+    predicoes = np.concatenate([modelo.predict(tensor[np.newaxis], verbose=0) for tensor in tensores])
+    latencia = (time.perf_counter() - inicio) / len(tensores) * 1000
+
+    # ru_maxrss vem em KB no Linux
+    memoria = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memoria_inicial) / 1024
+    return predicoes[:, 0], latencia, memoria
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta os classificadores de RG/CPF (.h5) para TFLite e, opcionalmente, compara acurácia, '
+        'latência e memória dos runtimes Keras e TFLite em um conjunto de imagens.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantizar', action='store_true', help='Aplica quantização dinâmica de pesos.')
+        parser.add_argument(
+            '--verificar',
+            metavar='PASTA',
+            help='Pasta com subpastas rg/ e cpf/ de imagens para a comparação Keras x TFLite.',
+        )
+        parser.add_argument('--somente-verificar', action='store_true', help='Não reexporta os modelos.')
+
+    def handle(self, *args, **options):
+        if not options['somente_verificar']:
+            for nome in MODELOS:
+                self._exportar(nome, options['quantizar'])
+
+        if options['verificar']:
+            for nome in MODELOS:
+                self._verificar(nome, os.path.join(options['verificar'], nome))
+
+    def _exportar(self, nome, quantizar):
+        import tensorflow as tf
+
+        origem = caminho_modelo(nome, 'keras')
+        destino = caminho_modelo(nome, 'tflite')
+        if not os.path.exists(origem):
+            raise CommandError(f'Modelo não encontrado: {origem}')
+
+        converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(origem))
+        if quantizar:
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        with open(destino, 'wb') as arquivo:
+            arquivo.write(converter.convert())
+
+        self.stdout.write(
+            f'{nome}: {os.path.getsize(origem) / 1e6:.1f} MB -> {os.path.getsize(destino) / 1e6:.1f} MB ({destino})'
+        )
+
+    def _verificar(self, nome, pasta):
+        import numpy as np
+
+        if not os.path.isdir(pasta):
+            self.stdout.write(self.style.WARNING(f'{nome}: pasta {pasta} não encontrada, verificação ignorada'))
+            return
+
+        arquivos = [
+            os.path.join(pasta, arquivo) for arquivo in sorted(os.listdir(pasta))
+            if arquivo.lower().endswith(EXTENSOES_IMAGEM)
+        ]
+        if not arquivos:
+            self.stdout.write(self.style.WARNING(f'{nome}: nenhuma imagem em {pasta}'))
+            return
+
+        resultados = {}
+        for runtime in RUNTIMES:
+            # spawn: o processo do comando pode já ter importado o TensorFlow na exportação
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                resultados[runtime] = executor.submit(medir_runtime, nome, runtime, arquivos).result()
+            _, latencia, memoria = resultados[runtime]
+            self.stdout.write(f'{nome}: {runtime} {latencia:.2f} ms/imagem, {memoria:.0f} MB')
+
+        keras_pred, tflite_pred = resultados['keras'][0], resultados['tflite'][0]
+        concordancia = np.mean((keras_pred > 0.5) == (tflite_pred > 0.5)) * 100
+        self.stdout.write(
+            f'{nome}: {len(arquivos)} imagens, concordância {concordancia:.2f}%, '
+            f'diferença máxima {np.max(np.abs(keras_pred - tflite_pred)):.4f}'
+        )
+        if concordancia < 100:
+            raise CommandError(f'{nome}: o modelo TFLite diverge do Keras em {100 - concordancia:.2f}% das imagens')
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api import referencias
+
+
+class Command(BaseCommand):
+    help = (
+        'Invalida o cache de dados de referência (países, estados, cidades e polos) em todos os processos. '
+        'Use após carregar essas tabelas fora do ORM, como no initial_setup.sql.'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.CACHE_COMPARTILHADO:
+            raise CommandError(
+                'Sem cache compartilhado (REDIS_URL) a nova versão não chega aos outros processos; '
+                f'eles recarregam sozinhos em até REFERENCIAS_TTL ({settings.REFERENCIAS_TTL} s).'
+            )
+        referencias.invalidar()
+        self.stdout.write(self.style.SUCCESS('Nova versão dos dados de referência publicada.'))
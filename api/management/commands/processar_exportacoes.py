@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import exportacao
+
+
+class Command(BaseCommand):
+    help = 'Gera os arquivos das exportações de inscrições pendentes, retomando as interrompidas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='Continua processando a fila indefinidamente.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos de espera quando a fila está vazia.')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                processada = self._processar_proxima()
+                expiradas = exportacao.expirar_antigas()
+                if expiradas:
+                    self.stdout.write(f'{expiradas} exportações expiradas removidas')
+            except Exception as e:
+                # Ex.: banco indisponível; no modo contínuo tenta novamente no próximo ciclo
+                if not options['continuo']:
+                    raise
+                self.stderr.write(f'Erro ao processar as exportações: {e}')
+                processada = False
+
+            if not options['continuo'] and not processada:
+                break
+            if not processada:
+                time.sleep(options['intervalo'])
+
+    def _processar_proxima(self):
+        pedido = exportacao.reservar()
+        if pedido is None:
+            return False
+        exportacao.processar(pedido)
+        self.stdout.write(
+            f'Exportação {pedido.id} ({pedido.formato}): {pedido.linhas} linhas em '
+            f'{pedido.tempo_extracao:.1f}s + {pedido.tempo_conversao:.1f}s de conversão'
+        )
+        return True
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.busca import reindexar
+from api.models import Candidato
+
+
+class Command(BaseCommand):
+    help = 'Recria os termos da busca de candidatos (tabela candidato_termo), ex.: após cargas feitas fora do ORM.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Candidatos reindexados por transação.')
+
+    def handle(self, *args, **options):
+        total = reindexar(Candidato.objects.all(), lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{total} candidatos reindexados.'))
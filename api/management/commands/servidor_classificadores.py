@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.servico_classificadores import servir
+
+
+class Command(BaseCommand):
+    help = 'Inicia o serviço de inferência dos classificadores de RG/CPF em processos dedicados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Número de processos de inferência.')
+        parser.add_argument(
+            '--socket',
+            default=settings.CLASSIFICADORES_SOCKET,
+            help='Caminho do socket Unix (padrão: CLASSIFICADORES_SOCKET).',
+        )
+
+    def handle(self, *args, **options):
+        caminho_socket = options['socket']
+        if not caminho_socket:
+            raise CommandError('Informe --socket ou defina CLASSIFICADORES_SOCKET.')
+        if options['workers'] < 1:
+            raise CommandError('--workers deve ser maior que zero.')
+
+        self.stdout.write(f"Servindo classificadores em {caminho_socket} com {options['workers']} workers")
+        servir(caminho_socket, options['workers'])
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-18 08:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usuarioadmin',
+            name='data_modificacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='EmailFila',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('assunto', models.CharField(max_length=255)),
+                ('mensagem', models.TextField()),
+                ('mensagem_html', models.TextField(blank=True, null=True)),
+                ('remetente', models.CharField(blank=True, max_length=255, null=True)),
+                ('destinatarios', models.JSONField()),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Pendente'), (1, 'Enviado'), (2, 'Falhou')], default=0)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_erro', models.TextField(blank=True, null=True)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_envio', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'email_fila',
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='email_fila_status_prox_idx')],
+            },
+        ),
+    ]
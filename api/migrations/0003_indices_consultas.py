@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_email_fila'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inscricao',
+            name='hash',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='candidato',
+            index=models.Index(fields=['cpf'], name='candidato_cpf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cidade',
+            index=models.Index(fields=['nome'], name='cidade_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscricao',
+            index=models.Index(fields=['status', 'curso'], name='inscricao_status_curso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscricao',
+            index=models.Index(fields=['data_criacao'], name='inscricao_data_criacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuarioadmin',
+            index=models.Index(fields=['token_recuperacao_senha'], name='usuario_admin_token_idx'),
+        ),
+    ]
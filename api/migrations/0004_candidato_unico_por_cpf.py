@@ -0,0 +1,131 @@
+# Generated by Django 5.1.2 on 2026-10-18 08:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.migrations.exceptions import IrreversibleError
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+import api.models
+
+# Campos que passam do candidato e do histórico educacional para cada inscrição
+CAMPOS_CANDIDATO = ('polo_ofertante', 'anexo_cpf', 'anexo_rg', 'validacao_anexo_cpf', 'validacao_anexo_rg')
+CAMPOS_HISTORICO = ('anexo_historico_escolar',)
+
+
+def mover_dados_e_deduplicar(apps, schema_editor):
+    """
+    Copia polo, anexos e validações do candidato (e o anexo do histórico) para cada inscrição
+    e depois mantém um único candidato por CPF, o mais recente. Inscrições, endereços e
+    históricos dos demais passam para ele; nenhum arquivo é apagado. Só as linhas duplicadas
+    de candidato, com os dados pessoais já substituídos pelos mais recentes, são removidas.
+    """
+    Candidato = apps.get_model('api', 'Candidato')
+    Endereco = apps.get_model('api', 'Endereco')
+    HistoricoEducacional = apps.get_model('api', 'HistoricoEducacional')
+    Inscricao = apps.get_model('api', 'Inscricao')
+
+    # Antes desta migração cada inscrição tinha o próprio candidato: um UPDATE copia os dados dele
+    candidato = Candidato.objects.filter(id=OuterRef('candidato_id'))
+    historico = HistoricoEducacional.objects.filter(candidato_id=OuterRef('candidato_id')).order_by('-id')
+    campos = {campo: Subquery(candidato.values(campo)[:1]) for campo in CAMPOS_CANDIDATO}
+    # Sem histórico o anexo fica vazio, como os demais anexos não enviados
+    campos.update({campo: Coalesce(Subquery(historico.values(campo)[:1]), Value('')) for campo in CAMPOS_HISTORICO})
+    Inscricao.objects.update(**campos)
+
+    cpfs = Candidato.objects.values('cpf').annotate(total=Count('id')).filter(total__gt=1).values_list('cpf', flat=True)
+    for cpf in cpfs.iterator():
+        candidato, *duplicados = Candidato.objects.filter(cpf=cpf).order_by('-id')
+        ids_duplicados = [duplicado.id for duplicado in duplicados]
+        for modelo in (Inscricao, Endereco, HistoricoEducacional):
+            modelo.objects.filter(candidato_id__in=ids_duplicados).update(candidato_id=candidato.id)
+        Candidato.objects.filter(id__in=ids_duplicados).delete()
+
+
+def impedir_reversao(apps, schema_editor):
+    raise IrreversibleError(
+        'api.0004 juntou os candidatos de mesmo CPF: as linhas duplicadas removidas não podem ser '
+        'recriadas. Restaure o backup do banco feito antes da migração.'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inscricao',
+            name='polo_ofertante',
+            field=models.ForeignKey(db_column='polo_ofertante', null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='api.polo'),
+        ),
+        migrations.AddField(
+            model_name='inscricao',
+            name='anexo_cpf',
+            field=models.ImageField(blank=True, upload_to=api.models.file_location),
+        ),
+        migrations.AddField(
+            model_name='inscricao',
+            name='anexo_rg',
+            field=models.ImageField(blank=True, upload_to=api.models.file_location),
+        ),
+        migrations.AddField(
+            model_name='inscricao',
+            name='validacao_anexo_cpf',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='inscricao',
+            name='validacao_anexo_rg',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='inscricao',
+            name='anexo_historico_escolar',
+            field=models.ImageField(blank=True, upload_to=api.models.file_location),
+        ),
+        migrations.RunPython(mover_dados_e_deduplicar),
+        migrations.AlterField(
+            model_name='inscricao',
+            name='polo_ofertante',
+            field=models.ForeignKey(db_column='polo_ofertante', on_delete=django.db.models.deletion.DO_NOTHING, to='api.polo'),
+        ),
+        migrations.RemoveField(
+            model_name='candidato',
+            name='polo_ofertante',
+        ),
+        migrations.RemoveField(
+            model_name='candidato',
+            name='anexo_cpf',
+        ),
+        migrations.RemoveField(
+            model_name='candidato',
+            name='anexo_rg',
+        ),
+        migrations.RemoveField(
+            model_name='candidato',
+            name='validacao_anexo_cpf',
+        ),
+        migrations.RemoveField(
+            model_name='candidato',
+            name='validacao_anexo_rg',
+        ),
+        migrations.RemoveField(
+            model_name='historicoeducacional',
+            name='anexo_historico_escolar',
+        ),
+        migrations.RemoveIndex(
+            model_name='candidato',
+            name='candidato_cpf_idx',
+        ),
+        migrations.AlterField(
+            model_name='candidato',
+            name='cpf',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        # Primeira operação desfeita na reversão: falha antes de qualquer mudança no esquema
+        # (no MySQL o DDL não é transacional e uma reversão pela metade não seria desfeita)
+        migrations.RunPython(migrations.RunPython.noop, impedir_reversao),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_candidato_unico_por_cpf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exportacao',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('formato', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'XLSX'), ('parquet', 'Parquet')], max_length=10)),
+                ('filtros', models.JSONField(default=dict)),
+                ('chave', models.CharField(max_length=64)),
+                ('status', models.PositiveSmallIntegerField(choices=[(0, 'Pendente'), (1, 'Processando'), (2, 'Concluída'), (3, 'Falhou'), (4, 'Expirada')], default=0)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('reserva', models.CharField(blank=True, max_length=32, null=True)),
+                ('reservada_ate', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_id', models.BigIntegerField(default=0)),
+                ('bytes_parciais', models.BigIntegerField(default=0)),
+                ('linhas', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(blank=True, null=True)),
+                ('arquivo', models.FileField(blank=True, max_length=255, null=True, upload_to='exportacoes/')),
+                ('reaproveitamentos', models.PositiveIntegerField(default=0)),
+                ('tempo_extracao', models.FloatField(default=0)),
+                ('tempo_conversao', models.FloatField(blank=True, null=True)),
+                ('ultimo_erro', models.TextField(blank=True, null=True)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_inicio', models.DateTimeField(blank=True, null=True)),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'exportacao',
+                'indexes': [models.Index(fields=['chave', 'status'], name='exportacao_chave_status_idx'), models.Index(fields=['status', 'reservada_ate'], name='exportacao_status_reserva_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_exportacao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inscricao',
+            index=models.Index(fields=['status', 'data_criacao'], name='inscricao_status_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscricao',
+            index=models.Index(fields=['curso', 'data_criacao'], name='inscricao_curso_data_idx'),
+        ),
+    ]
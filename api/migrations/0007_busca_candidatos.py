@@ -0,0 +1,80 @@
+# Generated by Django 5.1.2 on 2026-10-18 09:35
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Cópia congelada de api.busca e api.referencias.normalizar_busca como estavam nesta migração:
+# mudanças futuras na geração dos termos não alteram o que ela grava (use `manage.py reindexar_busca`).
+TAMANHO_TERMO = 64
+PESOS = {0: 4, 1: 3, 2: 3, 3: 2}
+LOTE = 1000
+
+
+def termos(texto):
+    if not texto:
+        return []
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere)).casefold()
+    return [palavra[:TAMANHO_TERMO] for palavra in re.findall(r'[0-9a-z]+', texto)]
+
+
+def termos_candidato(candidato):
+    encontrados = {}
+    valores = (
+        (0, termos(candidato.nome_completo)),
+        (1, termos(candidato.nome_social)),
+        (2, [re.sub(r'\D', '', candidato.cpf or '')[:TAMANHO_TERMO]]),
+        (3, termos(candidato.email)),
+    )
+    for campo, lista in valores:
+        for termo in lista:
+            if termo and PESOS[campo] > PESOS.get(encontrados.get(termo), 0):
+                encontrados[termo] = campo
+    return encontrados
+
+
+def indexar_candidatos(apps, schema_editor):
+    """
+    Gera os termos de busca dos candidatos já cadastrados, em lotes por id.
+    """
+    Candidato = apps.get_model('api', 'Candidato')
+    CandidatoTermo = apps.get_model('api', 'CandidatoTermo')
+    candidatos = Candidato.objects.only('id', 'nome_completo', 'nome_social', 'cpf', 'email').order_by('id')
+    ultimo = 0
+    while True:
+        bloco = list(candidatos.filter(id__gt=ultimo)[:LOTE])
+        if not bloco:
+            return
+        CandidatoTermo.objects.bulk_create([
+            CandidatoTermo(candidato_id=candidato.id, termo=termo, campo=campo)
+            for candidato in bloco
+            for termo, campo in termos_candidato(candidato).items()
+        ])
+        ultimo = bloco[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_indices_paginacao_inscricoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidatoTermo',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('termo', models.CharField(max_length=64)),
+                ('campo', models.PositiveSmallIntegerField(choices=[(0, 'Nome'), (1, 'Nome social'), (2, 'CPF'), (3, 'E-mail')])),
+                ('candidato', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='api.candidato')),
+            ],
+            options={
+                'db_table': 'candidato_termo',
+                'indexes': [models.Index(fields=['termo', 'candidato'], name='candidato_termo_busca_idx'), models.Index(fields=['candidato', 'termo'], name='candidato_termo_cand_idx')],
+            },
+        ),
+        migrations.RunPython(indexar_candidatos, migrations.RunPython.noop),
+    ]
@@ -44,17 +44,12 @@ class Candidato(models.Model):
     nome_completo = models.CharField(max_length=255)
     nome_social = models.CharField(max_length=255, blank=True, null=True)
     nome_mae = models.CharField(max_length=255)
-    cpf = models.CharField(max_length=50)
+    cpf = models.CharField(max_length=50, unique=True)  # Um candidato por pessoa; as inscrições apontam para ele
     registro_geral = models.CharField(max_length=50)
-    anexo_cpf = models.ImageField(upload_to=file_location, null=False, blank=True)
-    anexo_rg = models.ImageField(upload_to=file_location, null=False, blank=True)
-    validacao_anexo_cpf = models.PositiveSmallIntegerField(default=0)
-    validacao_anexo_rg = models.PositiveSmallIntegerField(default=0)
     nacionalidade = models.ForeignKey('Pais', models.DO_NOTHING, db_column='nacionalidade')
     naturalidade = models.ForeignKey('Cidade', models.DO_NOTHING, db_column='naturalidade')
     data_nascimento = models.DateField()
     telefone_celular = models.CharField(max_length=11)
-    polo_ofertante = models.ForeignKey('Polo', models.DO_NOTHING, db_column='polo_ofertante')
     genero = models.IntegerField()
     estado_civil = models.IntegerField()
     portador_necessidades_especiais = models.IntegerField()
@@ -79,6 +74,9 @@ class Cidade(models.Model):
         # managed = False
         db_table = 'cidade'
         db_table_comment = 'Municipios das Unidades Federativas'
+        indexes = [
+            models.Index(fields=['nome'], name='cidade_nome_idx'),
+        ]
 
 
 class Curso(models.Model):
@@ -144,7 +142,6 @@ class HistoricoEducacional(models.Model):
     candidato = models.ForeignKey(Candidato, models.DO_NOTHING)
     tipo_escola = models.IntegerField()
     nivel_escolaridade = models.IntegerField()
-    anexo_historico_escolar = models.ImageField(upload_to=file_location, null=False, blank=True)
 
     class Meta:
         # managed = False
@@ -155,14 +152,28 @@ class Inscricao(models.Model):
     id = models.BigAutoField(primary_key=True)
     candidato = models.ForeignKey(Candidato, models.DO_NOTHING)
     curso = models.ForeignKey(Curso, models.DO_NOTHING)
-    hash = models.CharField(max_length=128)
+    hash = models.CharField(max_length=128, unique=True)
     status = models.IntegerField()
     data_criacao = models.DateTimeField()
     data_modificacao = models.DateTimeField()
+    # Polo e documentos são de cada inscrição: uma nova inscrição do mesmo CPF não altera as anteriores
+    polo_ofertante = models.ForeignKey('Polo', models.DO_NOTHING, db_column='polo_ofertante')
+    anexo_cpf = models.ImageField(upload_to=file_location, null=False, blank=True)
+    anexo_rg = models.ImageField(upload_to=file_location, null=False, blank=True)
+    validacao_anexo_cpf = models.PositiveSmallIntegerField(default=0)
+    validacao_anexo_rg = models.PositiveSmallIntegerField(default=0)
+    anexo_historico_escolar = models.ImageField(upload_to=file_location, null=False, blank=True)
 
     class Meta:
         # managed = False
         db_table = 'inscricao'
+        indexes = [
+            models.Index(fields=['status', 'curso'], name='inscricao_status_curso_idx'),
+            models.Index(fields=['data_criacao'], name='inscricao_data_criacao_idx'),
+            # Paginação por cursor com filtro de status ou curso, na ordem (data_criacao, id)
+            models.Index(fields=['status', 'data_criacao'], name='inscricao_status_data_idx'),
+            models.Index(fields=['curso', 'data_criacao'], name='inscricao_curso_data_idx'),
+        ]
 
 
 class Pais(models.Model):
@@ -216,6 +227,9 @@ class UsuarioAdmin(AbstractBaseUser):
     class Meta:
         # managed = False
         db_table = 'usuario_admin'
+        indexes = [
+            models.Index(fields=['token_recuperacao_senha'], name='usuario_admin_token_idx'),
+        ]
 
     def gerar_token_recuperacao_senha(self):
         self.token_recuperacao_senha = str(uuid.uuid4())
@@ -262,4 +276,97 @@ class InscricaoLog(models.Model):
     usuario = models.ForeignKey(UsuarioAdmin, null=True, blank=True, on_delete=models.SET_NULL)
 
     class Meta:
-        db_table = 'inscricao_log'
\ No newline at end of file
+        db_table = 'inscricao_log'
+
+class EmailFila(models.Model):
+    STATUS_CHOICES = (
+        (0, 'Pendente'),
+        (1, 'Enviado'),
+        (2, 'Falhou'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    assunto = models.CharField(max_length=255)
+    mensagem = models.TextField()
+    mensagem_html = models.TextField(null=True, blank=True)
+    remetente = models.CharField(max_length=255, null=True, blank=True)
+    destinatarios = models.JSONField()
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=0)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    ultimo_erro = models.TextField(null=True, blank=True)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_fila'
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='email_fila_status_prox_idx'),
+        ]
+
+class Exportacao(models.Model):
+    FORMATO_CHOICES = (
+        ('csv', 'CSV'),
+        ('xlsx', 'XLSX'),
+        ('parquet', 'Parquet'),
+    )
+    STATUS_CHOICES = (
+        (0, 'Pendente'),
+        (1, 'Processando'),
+        (2, 'Concluída'),
+        (3, 'Falhou'),
+        (4, 'Expirada'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    usuario = models.ForeignKey(UsuarioAdmin, null=True, blank=True, on_delete=models.SET_NULL)
+    formato = models.CharField(max_length=10, choices=FORMATO_CHOICES)
+    filtros = models.JSONField(default=dict)
+    # Hash de formato + filtros, usado para reaproveitar pedidos idênticos
+    chave = models.CharField(max_length=64)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=0)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    reserva = models.CharField(max_length=32, null=True, blank=True)
+    reservada_ate = models.DateTimeField(null=True, blank=True)
+    # Progresso confirmado: último id exportado e tamanho do CSV parcial até ele
+    ultimo_id = models.BigIntegerField(default=0)
+    bytes_parciais = models.BigIntegerField(default=0)
+    linhas = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    arquivo = models.FileField(upload_to='exportacoes/', max_length=255, null=True, blank=True)
+    reaproveitamentos = models.PositiveIntegerField(default=0)
+    tempo_extracao = models.FloatField(default=0)
+    tempo_conversao = models.FloatField(null=True, blank=True)
+    ultimo_erro = models.TextField(null=True, blank=True)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_inicio = models.DateTimeField(null=True, blank=True)
+    data_conclusao = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'exportacao'
+        indexes = [
+            models.Index(fields=['chave', 'status'], name='exportacao_chave_status_idx'),
+            models.Index(fields=['status', 'reservada_ate'], name='exportacao_status_reserva_idx'),
+        ]
+
+class CandidatoTermo(models.Model):
+    CAMPO_CHOICES = (
+        (0, 'Nome'),
+        (1, 'Nome social'),
+        (2, 'CPF'),
+        (3, 'E-mail'),
+    )
+
+    # Índice invertido da busca de candidatos (api/busca.py), mantido pelos signals do Candidato
+    id = models.BigAutoField(primary_key=True)
+    candidato = models.ForeignKey(Candidato, on_delete=models.CASCADE, db_index=False)
+    termo = models.CharField(max_length=64)
+    campo = models.PositiveSmallIntegerField(choices=CAMPO_CHOICES)
+
+    class Meta:
+        db_table = 'candidato_termo'
+        indexes = [
+            # Busca pelo início do termo e confirmação das demais palavras de um candidato
+            models.Index(fields=['termo', 'candidato'], name='candidato_termo_busca_idx'),
+            models.Index(fields=['candidato', 'termo'], name='candidato_termo_cand_idx'),
+        ]
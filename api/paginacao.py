@@ -0,0 +1,117 @@
+# Paginação por cursor (keyset) da listagem administrativa de inscrições.
+#
+# Em vez de OFFSET, cada página continua a partir da última linha da anterior:
+#   WHERE data_criacao >= d AND (data_criacao > d OR id > i) ORDER BY data_criacao, id LIMIT n
+# o que percorre o índice de data_criacao (que no InnoDB já termina no id) a partir da posição,
+# com o mesmo custo em qualquer profundidade. O total vem de um COUNT cacheado por filtros.
+import base64
+import hashlib
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class PaginacaoCursorInscricoes(BasePagination):
+    """
+    Páginas ordenadas por (data_criacao, id), navegadas pelos links `next` e `previous`.
+    O `count` é aproximado: fica em cache por INSCRICOES_CONTAGEM_TTL segundos por combinação de filtros.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.count = self._contagem(queryset, request, view)
+
+        posicao = self._decodificar(request.query_params.get(self.cursor_query_param))
+        voltando = posicao is not None and posicao[2]
+        if posicao is None:
+            pagina = queryset.order_by('data_criacao', 'id')
+        elif voltando:
+            data, id, _ = posicao
+            pagina = queryset.filter(data_criacao__lte=data).filter(Q(data_criacao__lt=data) | Q(id__lt=id))
+            pagina = pagina.order_by('-data_criacao', '-id')
+        else:
+            data, id, _ = posicao
+            pagina = queryset.filter(data_criacao__gte=data).filter(Q(data_criacao__gt=data) | Q(id__gt=id))
+            pagina = pagina.order_by('data_criacao', 'id')
+
+        # Uma linha a mais indica se existe outra página na mesma direção
+        itens = list(pagina[:self.page_size + 1])
+        tem_mais = len(itens) > self.page_size
+        itens = itens[:self.page_size]
+        if voltando:
+            itens.reverse()
+
+        self.proximo = self.anterior = None
+        if itens:
+            if tem_mais or voltando:
+                self.proximo = self._cursor(itens[-1], voltar=False)
+            if posicao is not None and (tem_mais or not voltando):
+                self.anterior = self._cursor(itens[0], voltar=True)
+        elif posicao is not None:
+            # Depois da última linha: volta a partir da mesma posição
+            self.anterior = self._codificar(posicao[0], posicao[1], voltar=True)
+        return itens
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'count_aproximado': True,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        return replace_query_param(self.base_url, self.cursor_query_param, self.proximo) if self.proximo else None
+
+    def get_previous_link(self):
+        if self.anterior is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.anterior)
+
+    def _cursor(self, inscricao, voltar):
+        return self._codificar(inscricao.data_criacao, inscricao.id, voltar)
+
+    def _codificar(self, data, id, voltar):
+        conteudo = json.dumps({'d': data.isoformat(), 'i': id, 'v': int(voltar)})
+        return base64.urlsafe_b64encode(conteudo.encode()).decode()
+
+    def _decodificar(self, cursor):
+        if not cursor:
+            return None
+        try:
+            dados = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(dados['d']), int(dados['i']), bool(dados['v'])
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _contagem(self, queryset, request, view):
+        # Só os parâmetros de filtro entram na chave (cursor e paginação não mudam o total)
+        filtros = getattr(view, 'filterset_class', None)
+        nomes = filtros.base_filters if filtros else ()
+        parametros = sorted(
+            (nome, valor.strip())
+            for nome in nomes
+            for valor in request.query_params.getlist(nome)
+            if valor.strip()
+        )
+        chave = 'inscricoes:contagem:' + hashlib.sha1(repr(parametros).encode('utf-8')).hexdigest()
+
+        cache = caches[settings.INSCRICOES_CONTAGEM_CACHE_ALIAS]
+        total = cache.get(chave)
+        if total is None:
+            total = queryset.count()
+            cache.set(chave, total, settings.INSCRICOES_CONTAGEM_TTL)
+        return total
@@ -0,0 +1,260 @@
+# Cache local ao processo dos dados de referência (países, estados, cidades, polos e polos de cada curso).
+#
+# As tabelas são carregadas inteiras na primeira consulta e servidas de dicionários em memória.
+# A invalidação é versionada: cada escrita (signals) grava uma nova versão em
+# CACHES[REFERENCIAS_CACHE_ALIAS] (Redis, ver REDIS_URL); os processos comparam a versão local com a
+# compartilhada a cada REFERENCIAS_VERIFICAR_SEGUNDOS e recarregam quando ela muda. Cargas feitas fora
+# do ORM (ex.: initial_setup.sql) devem ser seguidas de `manage.py invalidar_referencias`.
+import bisect
+import heapq
+import threading
+import time
+import unicodedata
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+CHAVE_VERSAO = 'referencias:versao'
+
+
+class DadosReferencia:
+    """
+    Retrato das tabelas de referência, indexado pelas chaves usadas nas buscas.
+    """
+
+    def __init__(self, versao):
+        from .models import Cidade, CursoPolo, Estado, Pais, Polo
+
+        self.versao = versao
+        self.carregado_em = time.monotonic()
+
+        self.paises = {pais.pk: pais for pais in Pais.objects.all()}
+        self.estados = {estado.pk: estado for estado in Estado.objects.all()}
+        self.cidades = {}
+        for cidade in Cidade.objects.all():
+            # Preenche as FKs a partir dos próprios dicionários, sem consultas extras
+            cidade.uf = self.estados.get(cidade.uf_id)
+            self.cidades[cidade.pk] = cidade
+        self.polos = {}
+        for polo in Polo.objects.all():
+            polo.cidade = self.cidades.get(polo.cidade_id)
+            self.polos[polo.pk] = polo
+        self.polos_por_curso = defaultdict(list)
+        for curso_id, polo_id in CursoPolo.objects.order_by('id').values_list('curso_id', 'polo_id'):
+            if polo_id in self.polos:
+                self.polos_por_curso[curso_id].append(self.polos[polo_id])
+
+        self.paises_sigla = _indexar(self.paises.values(), lambda pais: pais.sigla and pais.sigla.upper())
+        self.estados_uf = _indexar(self.estados.values(), lambda estado: estado.uf and estado.uf.upper())
+        self.cidades_nome = _indexar(self.cidades.values(), lambda cidade: _chave_nome(cidade.nome))
+        self.cidades_ibge = _indexar(self.cidades.values(), lambda cidade: cidade.ibge)
+        self.polos_nome = _indexar(self.polos.values(), lambda polo: _chave_nome(polo.nome))
+        self._indice_cidades = None
+
+    @property
+    def indice_cidades(self):
+        # Construído na primeira busca e descartado junto com o retrato quando a versão muda
+        if self._indice_cidades is None:
+            self._indice_cidades = IndiceCidades(self.cidades.values())
+        return self._indice_cidades
+
+
+def normalizar_busca(texto):
+    """
+    Remove acentos, caixa e espaços repetidos, para buscas como "sao joao" -> "São João".
+    """
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    return ' '.join(texto.casefold().split())
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceCidades:
+    """
+    Índice de autocompletar dos nomes de cidades, sem acentos nem caixa.
+
+    Guarda em uma lista ordenada os sufixos de cada nome que começam em uma palavra
+    ("porto alegre", "alegre"), o que resolve por busca binária tanto o início do nome
+    quanto o início de qualquer palavra. Trechos no meio das palavras caem em um índice
+    de trigramas. O resultado é ordenado por tipo de casamento, UF preferida e nome.
+    """
+
+    def __init__(self, cidades):
+        self._cidades = {}
+        entradas = []
+        self._trigramas = defaultdict(set)
+        for cidade in cidades:
+            nome = normalizar_busca(cidade.nome or '')
+            if not nome:
+                continue
+            self._cidades[cidade.pk] = (cidade, nome)
+            inicio = 0
+            for palavra in nome.split(' '):
+                # Tipo de casamento: 0 no início do nome, 1 no início de outra palavra
+                entradas.append((nome[inicio:], cidade.pk, 0 if inicio == 0 else 1))
+                inicio += len(palavra) + 1
+            for trigrama in _trigramas(nome):
+                self._trigramas[trigrama].add(cidade.pk)
+        entradas.sort()
+        self._sufixos = [sufixo for sufixo, _, _ in entradas]
+        self._casamentos = [(pk, tipo) for _, pk, tipo in entradas]
+
+    def _por_prefixo(self, termo):
+        inicio = bisect.bisect_left(self._sufixos, termo)
+        fim = bisect.bisect_left(self._sufixos, termo + '\uffff', inicio)
+        encontrados = {}
+        for pk, tipo in self._casamentos[inicio:fim]:
+            if encontrados.get(pk, 2) > tipo:
+                encontrados[pk] = tipo
+        return encontrados
+
+    def _por_trecho(self, termo):
+        conjuntos = sorted((self._trigramas.get(trigrama, set()) for trigrama in _trigramas(termo)), key=len)
+        if not conjuntos:
+            return set()
+        candidatos = set.intersection(*conjuntos)
+        return {pk: 2 for pk in candidatos if termo in self._cidades[pk][1]}
+
+    def buscar(self, termo, uf=None, limite=10):
+        termo = normalizar_busca(termo)
+        if not termo:
+            return []
+
+        # Tipo de casamento por cidade: 0 início do nome, 1 início de outra palavra, 2 trecho no meio
+        encontrados = self._por_prefixo(termo)
+        if len(encontrados) < limite and len(termo) >= 3:
+            encontrados = {**self._por_trecho(termo), **encontrados}
+
+        def ordem(pk):
+            cidade, nome = self._cidades[pk]
+            return (encontrados[pk], uf is not None and cidade.uf_id != uf, len(nome), nome)
+
+        return [self._cidades[pk][0] for pk in heapq.nsmallest(limite, encontrados, key=ordem)]
+
+
+def _chave_nome(nome):
+    return str(nome).strip().casefold() if nome else None
+
+
+def _indexar(instancias, chave):
+    # Em chaves repetidas (ex.: cidades homônimas) prevalece o menor id
+    indice = {}
+    for instancia in sorted(instancias, key=lambda instancia: instancia.pk):
+        valor = chave(instancia)
+        if valor is not None:
+            indice.setdefault(valor, instancia)
+    return indice
+
+
+_dados = None
+_verificado_em = 0
+_lock = threading.Lock()
+
+
+def _cache():
+    return caches[settings.REFERENCIAS_CACHE_ALIAS]
+
+
+def _versao_atual():
+    versao = _cache().get(CHAVE_VERSAO)
+    if versao is None:
+        versao = uuid.uuid4().hex
+        # add() evita que dois processos subindo juntos gravem versões diferentes
+        if not _cache().add(CHAVE_VERSAO, versao, None):
+            versao = _cache().get(CHAVE_VERSAO, versao)
+    return versao
+
+
+def get_dados():
+    """
+    Retorna o retrato atual, recarregando-o se a versão compartilhada mudou ou se o
+    retrato passou de REFERENCIAS_TTL segundos.
+    """
+    global _dados, _verificado_em
+
+    agora = time.monotonic()
+    dados = _dados
+    if dados is not None and agora - _verificado_em < settings.REFERENCIAS_VERIFICAR_SEGUNDOS:
+        return dados
+
+    with _lock:
+        dados = _dados
+        if dados is None or time.monotonic() - _verificado_em >= settings.REFERENCIAS_VERIFICAR_SEGUNDOS:
+            versao = _versao_atual()
+            expirado = dados is not None and agora - dados.carregado_em >= settings.REFERENCIAS_TTL
+            if dados is None or dados.versao != versao or expirado:
+                dados = _dados = DadosReferencia(versao)
+            _verificado_em = time.monotonic()
+    return dados
+
+
+def invalidar():
+    """
+    Publica uma nova versão dos dados de referência e descarta o retrato deste processo.
+    """
+    global _dados
+
+    _cache().set(CHAVE_VERSAO, uuid.uuid4().hex, None)
+    with _lock:
+        _dados = None
+
+
+def _pk(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+# Buscas tipadas: retornam a instância ou None, sem consultar o banco
+
+def pais(pk):
+    return get_dados().paises.get(_pk(pk))
+
+
+def pais_por_sigla(sigla):
+    return get_dados().paises_sigla.get(str(sigla).strip().upper()) if sigla else None
+
+
+def estado(pk):
+    return get_dados().estados.get(_pk(pk))
+
+
+def estado_por_uf(uf):
+    return get_dados().estados_uf.get(str(uf).strip().upper()) if uf else None
+
+
+def cidade(pk):
+    return get_dados().cidades.get(_pk(pk))
+
+
+def cidade_por_nome(nome):
+    return get_dados().cidades_nome.get(_chave_nome(nome))
+
+
+def cidade_por_ibge(ibge):
+    return get_dados().cidades_ibge.get(_pk(ibge))
+
+
+def buscar_cidades(termo, uf=None, limite=10):
+    """
+    Autocompletar de cidades pelo nome; `uf` (id do estado) coloca as cidades dele primeiro.
+    """
+    return get_dados().indice_cidades.buscar(termo, uf=uf, limite=limite)
+
+
+def polo(pk):
+    return get_dados().polos.get(_pk(pk))
+
+
+def polo_por_nome(nome):
+    return get_dados().polos_nome.get(_chave_nome(nome))
+
+
+def polos_do_curso(curso_id):
+    return list(get_dados().polos_por_curso.get(_pk(curso_id), ()))
@@ -1,12 +1,16 @@
 import base64
 
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
+from django.urls import reverse
 from rest_framework import serializers
 
+from . import referencias
+from .imagens import url_revisao
 from .models import (
     Candidato,
     Cidade,
     Curso,
+    Exportacao,
     HistoricoEducacional,
     Inscricao,
     InscricaoLog,
@@ -28,60 +32,99 @@ class PoloSerializer(serializers.ModelSerializer):
         model = Polo
         fields = ['id', 'nome', 'logradouro', 'numero', 'bairro', 'cidade', 'cidade_nome']
         
+class ReferenciaRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField resolvido pelo cache de dados de referência, sem consultar o banco.
+    """
+
+    def __init__(self, buscar, **kwargs):
+        self.buscar = buscar
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        instance = self.buscar(data)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+def arquivo_enviado(valor, nome):
+    """
+    Anexo enviado em base64 (data URL) ou como arquivo multipart; None se não for nenhum dos dois.
+    """
+    # Upload multipart: o arquivo já chega gravado em disco pelos upload handlers
+    if isinstance(valor, File):
+        return valor
+    if valor and isinstance(valor, str) and valor.startswith('data:'):
+        try:
+            format, imgstr = valor.split(';base64,')
+            ext = format.split('/')[-1]
+            return ContentFile(base64.b64decode(imgstr), name=f"{nome}.{ext}")
+        except Exception:
+            # Se houver qualquer erro no processamento, retornamos None
+            return None
+    return None
+
 class CandidatoSerializer(serializers.ModelSerializer):
+    nacionalidade = ReferenciaRelatedField(referencias.pais, queryset=Pais.objects.all())
+    naturalidade = ReferenciaRelatedField(referencias.cidade, queryset=Cidade.objects.all())
+
     class Meta:
         model = Candidato
         fields = '__all__'
-        extra_fields = ['anexo_cpf_base64', 'anexo_rg_base64']
+
+    def get_extra_kwargs(self):
+        extra_kwargs = super().get_extra_kwargs()
+        if self.instance is None:
+            # Um CPF já cadastrado reaproveita o candidato existente em uma nova inscrição;
+            # na atualização o CPF continua único (o validador ignora o próprio candidato)
+            extra_kwargs['cpf'] = {**extra_kwargs.get('cpf', {}), 'validators': []}
+        return extra_kwargs
 
     def to_internal_value(self, data):
         # Converte a sigla da nacionalidade em PK antes de validar
         nacionalidade_sigla = data.get('nacionalidade')
         if nacionalidade_sigla:
-            try:
-                pais_instance = Pais.objects.get(sigla=nacionalidade_sigla)
-                data['nacionalidade'] = pais_instance.pk
-            except Pais.DoesNotExist:
+            pais_instance = referencias.pais_por_sigla(nacionalidade_sigla)
+            if pais_instance is None:
                 raise serializers.ValidationError({"nacionalidade": "Pais com essa sigla não existe."})
+            data['nacionalidade'] = pais_instance.pk
 
-        # Verifica e converte o ID do polo em PK
+        return super().to_internal_value(data)
+
+# Anexos de cada inscrição, enviados em base64 ou como arquivos multipart
+ANEXOS_INSCRICAO = ['anexo_cpf', 'anexo_rg', 'anexo_historico_escolar']
+
+class DocumentosInscricaoSerializer(serializers.ModelSerializer):
+    """
+    Polo e anexos de uma inscrição. Chegam junto com os dados do candidato, mas são guardados
+    na inscrição: uma nova inscrição ou alteração do mesmo CPF não muda as outras.
+    """
+    polo_ofertante = ReferenciaRelatedField(referencias.polo, queryset=Polo.objects.all())
+
+    class Meta:
+        model = Inscricao
+        fields = ['polo_ofertante'] + ANEXOS_INSCRICAO
+
+    def to_internal_value(self, data):
+        dados = {}
+
+        # Verifica e converte o nome do polo em PK
         polo_sigla = data.get('polo_ofertante')
         if polo_sigla:
-            try:
-                polo_instance = Polo.objects.get(nome=polo_sigla)
-                data['polo_ofertante'] = polo_instance.pk
-            except Polo.DoesNotExist:
+            polo_instance = referencias.polo_por_nome(polo_sigla)
+            if polo_instance is None:
                 raise serializers.ValidationError({"polo_ofertante": "Polo com esse nome não existe."})
+            dados['polo_ofertante'] = polo_instance.pk
 
-        # Função auxiliar para processar anexos base64
-        def process_base64_file(base64_data, field_name):
-            if base64_data and isinstance(base64_data, str) and base64_data.startswith('data:'):
-                try:
-                    format, imgstr = base64_data.split(';base64,')
-                    ext = format.split('/')[-1]
-                    file_name = f"{field_name}_{data.get('cpf', 'unknown')}.{ext}"
-                    file = ContentFile(base64.b64decode(imgstr), name=file_name)
-                    return file
-                except Exception:
-                    # Se houver qualquer erro no processamento, retornamos None
-                    return None
-            return None
+        # Anexos que não forem base64 válido nem arquivo são ignorados
+        for campo in ANEXOS_INSCRICAO:
+            arquivo = arquivo_enviado(data.get(campo), f"{campo}_{data.get('cpf', 'unknown')}")
+            if arquivo:
+                dados[campo] = arquivo
 
-        # Processar anexo_cpf (base64)
-        anexo_cpf = process_base64_file(data.get('anexo_cpf'), 'anexo_cpf')
-        if anexo_cpf:
-            data['anexo_cpf'] = anexo_cpf
-        elif 'anexo_cpf' in data:
-            del data['anexo_cpf']  # Remove o campo se não for um base64 válido
-
-        # Processar anexo_rg (base64)
-        anexo_rg = process_base64_file(data.get('anexo_rg'), 'anexo_rg')
-        if anexo_rg:
-            data['anexo_rg'] = anexo_rg
-        elif 'anexo_rg' in data:
-            del data['anexo_rg']  # Remove o campo se não for um base64 válido
-
-        return super().to_internal_value(data)
+        return super().to_internal_value(dados)
 
 class PaisSerializer(serializers.ModelSerializer):
     class Meta:
@@ -99,6 +142,8 @@ class InscricaoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Inscricao
         fields = '__all__'
+        # Gravados a partir do DocumentosInscricaoSerializer
+        read_only_fields = ['polo_ofertante', 'validacao_anexo_cpf', 'validacao_anexo_rg'] + ANEXOS_INSCRICAO
         
     # Torna o campo 'hash' opcional (não exigido no POST)
     hash = serializers.CharField(required=False, allow_blank=True)
@@ -106,38 +151,25 @@ class InscricaoSerializer(serializers.ModelSerializer):
     curso = serializers.CharField(required=False, allow_blank=True)
     data_criacao = serializers.CharField(required=False, allow_blank=True)
     data_modificacao = serializers.CharField(required=False, allow_blank=True)
+    # Miniaturas leves dos documentos para as telas de revisão, campo -> URL
+    anexos_revisao = serializers.SerializerMethodField()
+
+    def get_anexos_revisao(self, obj):
+        request = self.context.get('request')
+        return {campo: url_revisao(getattr(obj, campo), request) for campo in ANEXOS_INSCRICAO}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Mesmo formato de antes da mudança para a inscrição: polo e anexos também dentro de `candidato`
+        data['candidato'].update({campo: data[campo] for campo in self.Meta.read_only_fields})
+        return data
 
 class HistoricoEducacionalSerializer(serializers.ModelSerializer):
     class Meta:
         model = HistoricoEducacional
         fields = '__all__'
-        extra_fields = ['anexo_historico_escolar_base64']
         extra_kwargs = {'candidato': {'required': False}}
 
-    def to_internal_value(self, data):
-        # Função auxiliar para processar anexos base64
-        def process_base64_file(base64_data, field_name):
-            if base64_data and isinstance(base64_data, str) and base64_data.startswith('data:'):
-                try:
-                    format, imgstr = base64_data.split(';base64,')
-                    ext = format.split('/')[-1]
-                    file_name = f"{field_name}_{data.get('id', 'unknown')}.{ext}"
-                    file = ContentFile(base64.b64decode(imgstr), name=file_name)
-                    return file
-                except Exception:
-                    # Se houver qualquer erro no processamento, retornamos None
-                    return None
-            return None
-
-        # Processar anexo_historico_escolar (base64)
-        anexo_historico_escolar = process_base64_file(data.get('anexo_historico_escolar'), 'anexo_historico_escolar')
-        if anexo_historico_escolar:
-            data['anexo_historico_escolar'] = anexo_historico_escolar
-        elif 'anexo_historico_escolar' in data:
-            del data['anexo_historico_escolar']  # Remove o campo se não for um base64 válido
-
-        return super().to_internal_value(data)
-
 class UsuarioAdminRegistroSerializer(serializers.ModelSerializer):
     class Meta:
         model = UsuarioAdmin
@@ -201,4 +233,29 @@ class InscricaoLogSerializer(serializers.ModelSerializer):
 class EstatisticasSerializer(serializers.Serializer):
     total_inscricoes = serializers.IntegerField()
     media_idade = serializers.DecimalField(max_digits=5, decimal_places=2)
-    faixa_renda = serializers.CharField()
\ No newline at end of file
+    faixa_renda = serializers.CharField()
+
+class ExportacaoSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progresso = serializers.SerializerMethodField()
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Exportacao
+        fields = [
+            'id', 'formato', 'filtros', 'status', 'status_display', 'linhas', 'total', 'progresso',
+            'tentativas', 'reaproveitamentos', 'tempo_extracao', 'tempo_conversao', 'ultimo_erro',
+            'data_criacao', 'data_inicio', 'data_conclusao', 'download',
+        ]
+
+    def get_progresso(self, obj):
+        if obj.status == 2:
+            return 1.0
+        return round(obj.linhas / obj.total, 4) if obj.total else 0.0
+
+    def get_download(self, obj):
+        if obj.status != 2:
+            return None
+        url = reverse('exportacao-download', args=[obj.id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,159 @@
+# Serviço de inferência fora do processo web: N processos mantêm os classificadores de RG/CPF
+# carregados e atendem, por um socket Unix, as imagens enviadas pelos workers do Django.
+# O cliente é usado por ValidateRGView/ValidateCPFView (via classificadores.validate_image);
+# o fluxo de inscrição (PostInscricao) não classifica documentos e não chama o serviço.
+#
+# Protocolo (por mensagem, em uma conexão persistente):
+#   requisição: cabeçalho `!3s` (nome do modelo) + tensor float32 224x224x3 já redimensionado
+#               e normalizado pelo cliente (preparar_imagem), ~600 KB independente da foto original
+#   resposta:   b'1' / b'0' com o resultado + tamanho `!B` + versão do modelo que o calculou,
+#               ou b'E' + tamanho `!I` + mensagem de erro
+import multiprocessing
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+
+from django.conf import settings
+
+from .classificadores import TAMANHO_ENTRADA
+
+CABECALHO = struct.Struct('!3s')
+TAMANHO_ERRO = struct.Struct('!I')
+TAMANHO_VERSAO = struct.Struct('!B')
+# float32 em ordem de bytes little-endian, largura x altura x 3 canais
+FORMATO_TENSOR = '<f4'
+TAMANHO_TENSOR = TAMANHO_ENTRADA[0] * TAMANHO_ENTRADA[1] * 3 * 4
+
+
+class ErroServicoClassificadores(Exception):
+    pass
+
+
+def _receber_exato(conexao, tamanho):
+    partes = []
+    restante = tamanho
+    while restante:
+        parte = conexao.recv(min(restante, 1 << 20))
+        if not parte:
+            raise ConnectionError('Conexão encerrada pelo outro lado.')
+        partes.append(parte)
+        restante -= len(parte)
+    return b''.join(partes)
+
+
+# Cliente (workers do Django)
+
+_conexoes = threading.local()
+
+
+def _conectar():
+    conexao = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conexao.settimeout(settings.CLASSIFICADORES_TIMEOUT)
+    conexao.connect(settings.CLASSIFICADORES_SOCKET)
+    return conexao
+
+
+def _enviar(conexao, mensagem):
+    conexao.sendall(mensagem)
+    status = _receber_exato(conexao, 1)
+    if status == b'E':
+        (tamanho,) = TAMANHO_ERRO.unpack(_receber_exato(conexao, TAMANHO_ERRO.size))
+        raise ErroServicoClassificadores(_receber_exato(conexao, tamanho).decode('utf-8'))
+    (tamanho,) = TAMANHO_VERSAO.unpack(_receber_exato(conexao, TAMANHO_VERSAO.size))
+    return status == b'1', _receber_exato(conexao, tamanho).decode('ascii')
+
+
+def prever_remoto(tensor, nome):
+    """
+    Envia o tensor de entrada (saída de preparar_imagem) ao serviço de classificadores,
+    reaproveitando uma conexão por thread. Retorna (resultado, versão do modelo).
+    """
+    mensagem = CABECALHO.pack(nome.encode('ascii')) + tensor.astype(FORMATO_TENSOR, copy=False).tobytes()
+
+    conexao = getattr(_conexoes, 'conexao', None)
+    if conexao is not None:
+        try:
+            return _enviar(conexao, mensagem)
+        except (ConnectionError, OSError):
+            # Conexão antiga caiu (ex.: reinício do serviço); tenta novamente com uma nova
+            conexao.close()
+
+    conexao = _conectar()
+    _conexoes.conexao = conexao
+    try:
+        return _enviar(conexao, mensagem)
+    except (ConnectionError, OSError):
+        conexao.close()
+        _conexoes.conexao = None
+        raise
+
+
+# Servidor (manage.py servidor_classificadores)
+
+def _atender(conexao):
+    import numpy as np
+
+    from .classificadores import prever_local
+
+    with conexao:
+        while True:
+            try:
+                cabecalho = _receber_exato(conexao, CABECALHO.size)
+            except ConnectionError:
+                return
+            (nome,) = CABECALHO.unpack(cabecalho)
+            dados = _receber_exato(conexao, TAMANHO_TENSOR)
+            try:
+                tensor = np.frombuffer(dados, dtype=FORMATO_TENSOR).reshape(*TAMANHO_ENTRADA, 3)
+                resultado, versao = prever_local(tensor, nome.rstrip(b'\x00').decode('ascii'))
+                versao = versao.encode('ascii')
+                conexao.sendall((b'1' if resultado else b'0') + TAMANHO_VERSAO.pack(len(versao)) + versao)
+            except Exception as e:
+                erro = str(e).encode('utf-8')
+                conexao.sendall(b'E' + TAMANHO_ERRO.pack(len(erro)) + erro)
+
+
+def _processo_worker(servidor):
+    from .classificadores import carregar_modelos
+
+    carregar_modelos()
+    # Uma thread por conexão; as imagens simultâneas são agrupadas pelo AgendadorLotes
+    while True:
+        conexao, _ = servidor.accept()
+        threading.Thread(target=_atender, args=(conexao,), daemon=True).start()
+
+
+def servir(caminho_socket, workers):
+    """
+    Abre o socket Unix e inicia `workers` processos que aceitam conexões nele (pre-fork).
+    """
+    if os.path.exists(caminho_socket):
+        os.unlink(caminho_socket)
+    os.makedirs(os.path.dirname(caminho_socket) or '.', exist_ok=True)
+
+    servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    servidor.bind(caminho_socket)
+    servidor.listen(128)
+
+    contexto = multiprocessing.get_context('fork')
+    processos = [
+        contexto.Process(target=_processo_worker, args=(servidor,), name=f'classificadores-{i}')
+        for i in range(workers)
+    ]
+    for processo in processos:
+        processo.start()
+
+    # Garante que um SIGTERM no processo pai também encerre os workers
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for processo in processos:
+            processo.join()
+    finally:
+        for processo in processos:
+            processo.terminate()
+        servidor.close()
+        if os.path.exists(caminho_socket):
+            os.unlink(caminho_socket)
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import busca, catalogo, referencias
+from .imagens import processar_documentos
+from .leituras import invalidar_portal, invalidar_portal_todos
+from .models import Candidato, Cidade, Curso, CursoPolo, Estado, Inscricao, Pais, Polo
+
+
+@receiver(pre_save, sender=Inscricao)
+def normalizar_anexos(sender, instance, **kwargs):
+    # Normaliza os documentos enviados e gera a miniatura de revisão
+    if settings.DOCUMENTOS_NORMALIZAR:
+        processar_documentos(instance)
+
+
+@receiver([post_save, post_delete], sender=Pais)
+@receiver([post_save, post_delete], sender=Estado)
+@receiver([post_save, post_delete], sender=Cidade)
+@receiver([post_save, post_delete], sender=Polo)
+@receiver([post_save, post_delete], sender=CursoPolo)
+def invalidar_referencias(sender, **kwargs):
+    # Publica uma nova versão do cache de referência depois que a alteração for confirmada
+    transaction.on_commit(referencias.invalidar)
+
+
+@receiver([post_save, post_delete], sender=Curso)
+@receiver([post_save, post_delete], sender=CursoPolo)
+@receiver([post_save, post_delete], sender=Polo)
+@receiver([post_save, post_delete], sender=Cidade)
+@receiver([post_save, post_delete], sender=Estado)
+def invalidar_catalogo(sender, **kwargs):
+    # Cursos, polos e cidades mudaram: descarta as respostas públicas cacheadas após o commit
+    transaction.on_commit(catalogo.invalidar)
+
+
+@receiver([post_save, post_delete], sender=Inscricao)
+def invalidar_portal_inscricao(sender, instance, **kwargs):
+    # Status, curso ou nova inscrição: o resumo do portal do candidato mudou
+    candidato_id = instance.candidato_id
+    transaction.on_commit(lambda: invalidar_portal([candidato_id]))
+
+
+@receiver(post_save, sender=Candidato)
+def invalidar_portal_candidato(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: invalidar_portal([instance.id]))
+
+
+@receiver([post_save, post_delete], sender=Curso)
+def invalidar_portal_cursos(sender, **kwargs):
+    # O resumo mostra nome, descrição e carga horária dos cursos
+    transaction.on_commit(invalidar_portal_todos)
+
+
+@receiver(post_save, sender=Candidato)
+def indexar_busca_candidato(sender, instance, created, **kwargs):
+    # Na mesma transação do save, para a busca nunca ver um candidato sem os termos atuais
+    busca.indexar(instance, novo=created)
@@ -1,5 +1,6 @@
 from django.db import transaction
 from django.utils import timezone
+from .leituras import invalidar_portal
 from .models import Inscricao, InscricaoLog
 from zoneinfo import ZoneInfo
 
@@ -31,6 +32,10 @@ def update_expired_inscricoes():
             if logs:
                 InscricaoLog.objects.bulk_create(logs)
 
+            # O update() não dispara signals: limpa o cache do portal desses candidatos após o commit
+            candidatos_ids = {log.inscricao.candidato_id for log in logs}
+            transaction.on_commit(lambda: invalidar_portal(candidatos_ids))
+
             # Atualizar status das inscrições
             inscricoes_expiradas.update(
                 status='3',
@@ -1,3 +1,1229 @@
-from django.test import TestCase
+import base64
+import csv
+import importlib.util
+import json
+import multiprocessing
+import os
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import get_connection
+from django.core.management import CommandError, call_command
+from django.core.signals import request_started
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from api import classificadores, referencias, servico_classificadores
+from api.management.commands.exportar_classificadores import EXTENSOES_IMAGEM
+from api.models import (
+    Candidato, Cidade, Curso, CursoPolo, EmailFila, Estado, HistoricoEducacional, Inscricao, Pais, Polo, UsuarioAdmin,
+)
+from api.paginacao import PaginacaoCursorInscricoes
+from api.utils import ConexaoEmail, _montar_mensagem
+
+
+class RegistroClassificadoresTests(SimpleTestCase):
+    def test_views_e_comandos_nao_importam_tensorflow(self):
+        # Processo novo: o que o cron e os workers sem ML carregam na subida
+        codigo = (
+            'import sys, django; django.setup(); '
+            'import api.urls, api.views, api.tasks; '
+            'sys.exit(1 if "tensorflow" in sys.modules else 0)'
+        )
+        processo = subprocess.run(
+            [sys.executable, '-c', codigo], cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True
+        )
+        self.assertEqual(processo.returncode, 0, processo.stderr.decode())
+
+    def test_modelo_carregado_uma_vez_por_processo(self):
+        modelo = object()
+        with mock.patch.dict(classificadores._modelos_carregados, clear=True), \
+                mock.patch.object(classificadores, 'carregar_modelo', return_value=modelo) as carregar:
+            resultados = []
+            threads = [
+                threading.Thread(target=lambda: resultados.append(classificadores.get_modelo('rg')[0]))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(carregar.call_count, 1)
+            self.assertEqual(resultados, [modelo] * 8)
+            self.assertIs(classificadores.get_modelo('rg')[0], modelo)
+
+
+class ModeloFalso:
+    """
+    Classificador com custo fixo por chamada de `predict`, como o overhead do Keras por lote.
+    """
+
+    def __init__(self, custo=0.005):
+        self.custo = custo
+        self.lotes = []
+
+    def predict(self, lote, verbose=0):
+        self.lotes.append(len(lote))
+        time.sleep(self.custo)
+        return lote[:, :1, 0, 0]
+
+
+class AgendadorLotesTests(SimpleTestCase):
+    def prever_em_paralelo(self, agendador, tensores):
+        resultados = [None] * len(tensores)
+
+        def prever(i):
+            resultados[i] = agendador.prever(tensores[i])
+
+        threads = [threading.Thread(target=prever, args=(i,)) for i in range(len(tensores))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return resultados
+
+    def test_agrupa_requisicoes_concorrentes(self):
+        modelo = ModeloFalso()
+        agendador = classificadores.AgendadorLotes('rg', tamanho_maximo=8, espera_maxima=0.05)
+        # Primeiro pixel 1.0 = documento válido, 0.0 = inválido
+        tensores = [np.full((2, 2, 3), float(i % 2), dtype=np.float32) for i in range(16)]
+
+        with mock.patch.object(classificadores, 'get_modelo', return_value=(modelo, 'keras:1')):
+            resultados = self.prever_em_paralelo(agendador, tensores)
+
+        self.assertEqual(resultados, [(bool(i % 2), 'keras:1') for i in range(16)])
+        self.assertLess(len(modelo.lotes), 16)
+        self.assertTrue(all(tamanho <= 8 for tamanho in modelo.lotes))
+
+        metricas = agendador.metricas()
+        self.assertEqual(metricas['requisicoes'], 16)
+        self.assertEqual(sum(t * n for t, n in metricas['histograma_lotes'].items()), 16)
+        self.assertEqual(metricas['fila'], 0)
+
+    def test_lotes_aumentam_vazao(self):
+        tensores = [np.zeros((2, 2, 3), dtype=np.float32) for _ in range(64)]
+
+        modelo = ModeloFalso()
+        inicio = time.perf_counter()
+        for tensor in tensores:
+            modelo.predict(tensor[np.newaxis])
+        individual = time.perf_counter() - inicio
+
+        agendador = classificadores.AgendadorLotes('cpf', tamanho_maximo=16, espera_maxima=0.005)
+        with mock.patch.object(classificadores, 'get_modelo', return_value=(ModeloFalso(), 'keras:1')):
+            inicio = time.perf_counter()
+            self.prever_em_paralelo(agendador, tensores)
+            em_lotes = time.perf_counter() - inicio
+
+        self.assertLess(em_lotes, individual / 2)
+
+    def test_erro_do_modelo_chega_a_todas_as_requisicoes_do_lote(self):
+        modelo = mock.Mock()
+        modelo.predict.side_effect = RuntimeError('falhou')
+        agendador = classificadores.AgendadorLotes('rg', tamanho_maximo=4, espera_maxima=0.001)
+
+        with mock.patch.object(classificadores, 'get_modelo', return_value=(modelo, 'keras:1')):
+            with self.assertRaises(RuntimeError):
+                agendador.prever(np.zeros((2, 2, 3), dtype=np.float32))
+        self.assertEqual(agendador.metricas()['requisicoes'], 0)
+
+
+class ServicoClassificadoresTests(SimpleTestCase):
+    def setUp(self):
+        pasta = tempfile.mkdtemp()
+        self.socket = os.path.join(pasta, 'classificadores.sock')
+        # Modelos e agendadores novos, herdados pelos processos do serviço no fork
+        modelos = {'rg': ModeloFalso(custo=0), 'cpf': ModeloFalso(custo=0)}
+        agendadores = {nome: classificadores.AgendadorLotes(nome, 4, 0.001) for nome in modelos}
+        for patcher in (
+            mock.patch.dict(classificadores._modelos_carregados, clear=True),
+            mock.patch.dict(classificadores._agendadores, agendadores, clear=True),
+            mock.patch.object(classificadores, 'carregar_modelo', lambda nome, runtime: modelos[nome]),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.servidor = multiprocessing.get_context('fork').Process(
+            target=servico_classificadores.servir, args=(self.socket, 2)
+        )
+        self.servidor.start()
+        self.addCleanup(self.servidor.join)
+        self.addCleanup(self.servidor.terminate)
+        while not os.path.exists(self.socket):
+            time.sleep(0.01)
+
+    def test_cliente_envia_apenas_o_tensor_preprocessado(self):
+        enviar = mock.Mock(wraps=servico_classificadores._enviar)
+        with override_settings(CLASSIFICADORES_SOCKET=self.socket), \
+                mock.patch.object(servico_classificadores, '_enviar', enviar):
+            # Foto grande: os pixels crus teriam 36 MB
+            clara = classificadores.validate_image(Image.new('RGB', (4000, 3000), (230, 230, 230)), 'rg')
+            escura = classificadores.validate_image(Image.new('RGB', (4000, 3000), (10, 10, 10)), 'cpf')
+
+            with self.assertRaises(servico_classificadores.ErroServicoClassificadores):
+                classificadores.validate_image(Image.new('RGB', (10, 10)), 'xx')
+
+        # A versão vem do processo do serviço, que carregou o modelo
+        versoes = [classificadores.versao_modelo(nome) for nome in ('rg', 'cpf')]
+        self.assertEqual((clara, escura), ((True, versoes[0]), (False, versoes[1])))
+        mensagem = enviar.call_args_list[0].args[1]
+        self.assertEqual(len(mensagem), servico_classificadores.CABECALHO.size + 224 * 224 * 3 * 4)
+
+
+def imagens_sinteticas(quantidade=32):
+    # Conjunto fixo de fotos "lisas com ruído" em tamanhos variados, maiores e menores que 224x224
+    gerador = np.random.default_rng(0)
+    imagens = []
+    for _ in range(quantidade):
+        altura, largura = gerador.integers(100, 1200, size=2)
+        cor = gerador.integers(0, 256, size=3)
+        ruido = gerador.normal(0, 25, size=(altura, largura, 3))
+        pixels = np.clip(cor + ruido, 0, 255).astype(np.uint8)
+        imagens.append(Image.fromarray(pixels, 'RGB'))
+    return imagens
+
+
+class PreparacaoImagemTests(SimpleTestCase):
+    def test_tensor_de_entrada(self):
+        tensor = classificadores.preparar_imagem(Image.new('L', (640, 480), 255))
+        self.assertEqual(tensor.shape, (224, 224, 3))
+        self.assertEqual(tensor.dtype, np.float32)
+        self.assertTrue(np.all(tensor == 1.0))
+
+    @mock.patch.object(classificadores, 'TAMANHO_ENTRADA', (4, 4))
+    def test_bilinear_como_tf_image_resize(self):
+        # Valores do tf.image.resize (bilinear, sem antialias): [0, 255] -> [0, 63.75, 191.25, 255]
+        ampliada = classificadores.preparar_imagem(Image.fromarray(np.array([[0, 255]] * 2, dtype=np.uint8)))
+        np.testing.assert_allclose(ampliada[0, :, 0], [0, 0.25, 0.75, 1])
+        # Redução 8 -> 4 sem antialias: média só dos dois vizinhos, não da faixa inteira
+        faixa = np.array([[0, 0, 255, 255, 0, 0, 255, 255]] * 8, dtype=np.uint8)
+        reduzida = classificadores.preparar_imagem(Image.fromarray(faixa))
+        np.testing.assert_allclose(reduzida[0, :, 0], [0, 1, 0, 1])
+
+    @skipUnless(importlib.util.find_spec('tensorflow'), 'TensorFlow não instalado')
+    def test_concorda_com_preprocessamento_tensorflow(self):
+        import tensorflow as tf
+
+        for image in imagens_sinteticas():
+            # Caminho original das views: img_to_array + tf.image.resize + /255
+            original = tf.image.resize(tf.keras.utils.img_to_array(image), classificadores.TAMANHO_ENTRADA).numpy() / 255.0
+            np.testing.assert_allclose(classificadores.preparar_imagem(image), original, atol=1e-5)
+
+
+@skipUnless(importlib.util.find_spec('tensorflow'), 'TensorFlow não instalado')
+class ParidadeClassificadoresTests(SimpleTestCase):
+    """
+    Compara o TFLite exportado por `manage.py exportar_classificadores` com os modelos Keras originais.
+    Usa as imagens de models/paridade/<rg|cpf>/ quando existirem; senão, um conjunto sintético fixo.
+    """
+
+    def pasta(self):
+        return os.path.join(settings.BASE_DIR, 'models', 'paridade')
+
+    def imagens(self, nome):
+        pasta = os.path.join(self.pasta(), nome)
+        if os.path.isdir(pasta):
+            arquivos = sorted(f for f in os.listdir(pasta) if f.lower().endswith(EXTENSOES_IMAGEM))
+            if arquivos:
+                return [Image.open(os.path.join(pasta, arquivo)).convert('RGB') for arquivo in arquivos]
+        return imagens_sinteticas()
+
+    def modelos(self, nome):
+        caminhos = [classificadores.caminho_modelo(nome, runtime) for runtime in ('keras', 'tflite')]
+        faltando = [caminho for caminho in caminhos if not os.path.exists(caminho)]
+        if faltando:
+            self.skipTest(f'Modelos não encontrados: {", ".join(faltando)}')
+        return [classificadores.carregar_modelo(nome, runtime) for runtime in ('keras', 'tflite')]
+
+    def test_tflite_concorda_com_keras(self):
+        for nome in classificadores.MODELOS:
+            with self.subTest(nome=nome):
+                keras, tflite = self.modelos(nome)
+                tensores = np.stack([classificadores.preparar_imagem(image) for image in self.imagens(nome)])
+
+                predicoes_keras = keras.predict(tensores, verbose=0)[:, 0]
+                predicoes_tflite = np.concatenate([tflite.predict(tensor[np.newaxis]) for tensor in tensores])[:, 0]
+
+                np.testing.assert_array_equal(predicoes_keras > 0.5, predicoes_tflite > 0.5)
+                self.assertLess(np.max(np.abs(predicoes_keras - predicoes_tflite)), 0.05)
+
+    def test_comparacao_de_runtimes(self):
+        for nome in classificadores.MODELOS:
+            self.modelos(nome)
+        if not os.path.isdir(self.pasta()):
+            self.skipTest(f'Imagens não encontradas: {self.pasta()}')
+        saida = StringIO()
+        call_command('exportar_classificadores', verificar=self.pasta(), somente_verificar=True, stdout=saida)
+        for nome in classificadores.MODELOS:
+            self.assertIn(f'{nome}: keras ', saida.getvalue())
+            self.assertIn(f'{nome}: tflite ', saida.getvalue())
+
+
+@override_settings(
+    CLASSIFICADORES_CACHE='memoria', CLASSIFICADORES_SOCKET='', CLASSIFICADORES_VERSAO_VERIFICAR_SEGUNDOS=0
+)
+class CachePredicoesTests(SimpleTestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        self.arquivo = os.path.join(self.pasta, 'modelo_final_rg.h5')
+        open(self.arquivo, 'wb').close()
+        os.utime(self.arquivo, (1000, 1000))
+
+        self.modelos = []
+
+        def carregar_modelo(nome, runtime):
+            self.modelos.append(ModeloFalso(custo=0))
+            return self.modelos[-1]
+
+        for patcher in (
+            mock.patch.dict(classificadores._modelos_carregados, clear=True),
+            mock.patch.dict(classificadores._versoes, clear=True),
+            mock.patch.dict(classificadores._agendadores, {'rg': classificadores.AgendadorLotes('rg', 4, 0.001)}),
+            mock.patch.object(classificadores, '_cache_predicoes', classificadores.CachePredicoes()),
+            mock.patch.object(classificadores, 'caminho_modelo', lambda nome, runtime: self.arquivo),
+            mock.patch.object(classificadores, 'carregar_modelo', carregar_modelo),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        buffer = BytesIO()
+        Image.new('RGB', (300, 200), (240, 240, 240)).save(buffer, 'PNG')
+        self.imagem = buffer.getvalue()
+
+    def test_reenvio_da_mesma_imagem_nao_roda_o_modelo(self):
+        self.assertTrue(classificadores.validar_documento(self.imagem, 'rg'))
+        self.assertTrue(classificadores.validar_documento(self.imagem, 'rg'))
+
+        self.assertEqual(sum(len(modelo.lotes) for modelo in self.modelos), 1)
+        metricas = classificadores._cache_predicoes.metricas()
+        self.assertEqual((metricas['acertos'], metricas['falhas']), (1, 1))
+
+    def test_modelo_trocado_recarrega_e_ignora_o_cache(self):
+        classificadores.validar_documento(self.imagem, 'rg')
+        os.utime(self.arquivo, (2000, 2000))
+        classificadores.validar_documento(self.imagem, 'rg')
+
+        # Segundo modelo carregado sem reiniciar o processo, e a predição refeita com ele
+        self.assertEqual(len(self.modelos), 2)
+        self.assertEqual([len(modelo.lotes) for modelo in self.modelos], [1, 1])
+        self.assertEqual(classificadores._cache_predicoes.acertos, 0)
+
+    def test_resultado_gravado_com_a_versao_que_o_calculou(self):
+        # O serviço ainda roda o modelo antigo enquanto este processo já vê o arquivo novo
+        antigo = ModeloFalso(custo=0)
+        with mock.patch.object(classificadores, 'get_modelo', return_value=(antigo, 'keras:antigo')):
+            classificadores.validar_documento(self.imagem, 'rg')
+        classificadores.validar_documento(self.imagem, 'rg')
+        classificadores.validar_documento(self.imagem, 'rg')
+
+        # O resultado do modelo antigo não é servido como se fosse do atual, que roda uma vez
+        self.assertEqual(len(antigo.lotes), 1)
+        self.assertEqual(sum(len(modelo.lotes) for modelo in self.modelos), 1)
+        metricas = classificadores._cache_predicoes.metricas()
+        self.assertEqual((metricas['acertos'], metricas['falhas']), (1, 2))
+
+    def test_contadores_com_acessos_concorrentes(self):
+        cache = classificadores._cache_predicoes
+        cache.set('existe', True)
+
+        def consultar():
+            for i in range(2000):
+                cache.get('existe' if i % 2 else 'falta')
+
+        threads = [threading.Thread(target=consultar) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual((cache.acertos, cache.falhas), (8000, 8000))
+
+    def test_versao_consultada_a_cada_intervalo(self):
+        with override_settings(CLASSIFICADORES_VERSAO_VERIFICAR_SEGUNDOS=3600):
+            versao = classificadores.versao_modelo('rg')
+            os.utime(self.arquivo, (2000, 2000))
+            self.assertEqual(classificadores.versao_modelo('rg'), versao)
+
+            with mock.patch.object(classificadores.time, 'monotonic', return_value=time.monotonic() + 3600):
+                self.assertNotEqual(classificadores.versao_modelo('rg'), versao)
+
+
+def imagem_png(tamanho=(60, 40), ruido=False):
+    if ruido:
+        pixels = np.random.default_rng(0).integers(0, 256, size=(tamanho[1], tamanho[0], 3), dtype=np.uint8)
+        image = Image.fromarray(pixels, 'RGB')
+    else:
+        image = Image.new('RGB', tamanho, (10, 120, 200))
+    buffer = BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def anexo_base64(conteudo):
+    return 'data:image/png;base64,' + base64.b64encode(conteudo).decode()
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    DOCUMENTOS_NORMALIZAR=False,
+)
+class InscricoesTestCase(TestCase):
+    """
+    Catálogo mínimo (país, estado, cidades, polo e cursos) e payloads de inscrição para os testes das views.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estado = Estado.objects.create(id=1, nome='Rio Grande do Sul', uf='RS')
+        cls.brasil = Pais.objects.create(id=1, nome='Brasil', nome_pt='Brasil', sigla='BR')
+        cls.cidade = Cidade.objects.create(nome='Porto Alegre', ibge=4314902, uf=cls.estado)
+        cls.outra_cidade = Cidade.objects.create(nome='Pelotas', ibge=4314407, uf=cls.estado)
+        cls.polo = Polo.objects.create(nome='Polo Centro', logradouro='Rua', numero=1, bairro='Centro', cidade=cls.cidade)
+        prazo = timezone.now() + timedelta(days=3)
+        cls.cursos = [
+            Curso.objects.create(
+                nome=f'Curso {i}', prazo_inscricoes=prazo, prazo_validacao=prazo + timedelta(days=2), carga_horaria=40
+            )
+            for i in range(4)
+        ]
+        cls.curso = cls.cursos[0]
+        for curso in cls.cursos:
+            CursoPolo.objects.create(curso=curso, polo=cls.polo)
+
+    def setUp(self):
+        # Caches locais e compartilhados começam vazios: os signals de invalidação só rodam no commit
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        referencias.invalidar()
+        patcher = mock.patch.dict(os.environ, {'FRONT_END_URL': 'http://localhost:3000'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def payload_candidato(self, cpf='12345678900', anexos=True, **campos):
+        dados = {
+            'email': 'candidato@example.com', 'nome_completo': 'Fulano da Silva', 'nome_mae': 'Maria da Silva',
+            'cpf': cpf, 'registro_geral': '1234567', 'nacionalidade': 'BR', 'naturalidade': self.cidade.id,
+            'data_nascimento': '2000-01-01', 'telefone_celular': '51999999999', 'polo_ofertante': 'Polo Centro',
+            'genero': 1, 'estado_civil': 0, 'portador_necessidades_especiais': 0, 'renda_per_capita': 1, 'etnia': 1,
+            'cpf_cedula_estrangeira': 0, 'rg_cedula_estrangeira': 0, 'area': 0, 'cep': '90000000', 'estado': 'RS',
+            'cidade': 'Porto Alegre', 'bairro': 'Centro', 'logradouro': 'Rua X', 'numero': '10',
+            'tipo_escola': 0, 'nivel_escolaridade': 4,
+        }
+        if anexos:
+            dados.update({campo: anexo_base64(imagem_png()) for campo in ANEXOS})
+        dados.update(campos)
+        return dados
+
+    def inscrever(self, cpf='12345678900', curso=None, **campos):
+        resposta = self.client.post(
+            '/api/inscricao/',
+            {'candidato': self.payload_candidato(cpf, **campos), 'curso': (curso or self.curso).id},
+            format='json',
+        )
+        self.assertEqual(resposta.status_code, 201, resposta.data)
+        return resposta
+
+
+ANEXOS = ('anexo_cpf', 'anexo_rg', 'anexo_historico_escolar')
+
+
+class PicoMemoriaRequisicao:
+    """
+    Pico de memória Python (tracemalloc) alocada durante o tratamento da requisição,
+    descontando o corpo já montado pelo cliente de teste.
+    """
+
+    def __enter__(self):
+        self.pico = None
+        tracemalloc.start()
+        request_started.connect(self._inicio)
+        return self
+
+    def _inicio(self, **kwargs):
+        tracemalloc.reset_peak()
+        self._base = tracemalloc.get_traced_memory()[0]
+
+    def __exit__(self, *exc):
+        request_started.disconnect(self._inicio)
+        self.pico = tracemalloc.get_traced_memory()[1] - self._base
+        tracemalloc.stop()
+
+
+class UploadMultipartTests(InscricoesTestCase):
+    def setUp(self):
+        super().setUp()
+        # ~1 MB por documento (ruído não comprime)
+        self.arquivo = imagem_png((600, 600), ruido=True)
+
+    def post_multipart(self, cpf):
+        dados = {'candidato': self.payload_candidato(cpf, anexos=False), 'curso': self.curso.id}
+        corpo = {'dados': json.dumps(dados)}
+        corpo.update({campo: SimpleUploadedFile(f'{campo}.png', self.arquivo, 'image/png') for campo in ANEXOS})
+        return self.client.post('/api/inscricao/', corpo, format='multipart')
+
+    def post_json(self, cpf):
+        candidato = self.payload_candidato(cpf, anexos=False)
+        candidato.update({campo: anexo_base64(self.arquivo) for campo in ANEXOS})
+        return self.client.post('/api/inscricao/', {'candidato': candidato, 'curso': self.curso.id}, format='json')
+
+    def test_multipart_grava_os_anexos(self):
+        resposta = self.post_multipart('11111111111')
+
+        self.assertEqual(resposta.status_code, 201, resposta.data)
+        inscricao = Inscricao.objects.get(candidato__cpf='11111111111')
+        for campo in ANEXOS:
+            with getattr(inscricao, campo).open('rb') as conteudo:
+                self.assertEqual(conteudo.read(), self.arquivo)
+
+    def test_json_base64_continua_aceito(self):
+        resposta = self.post_json('22222222222')
+
+        self.assertEqual(resposta.status_code, 201, resposta.data)
+        with Inscricao.objects.get(candidato__cpf='22222222222').anexo_rg.open('rb') as conteudo:
+            self.assertEqual(conteudo.read(), self.arquivo)
+
+    def test_multipart_usa_menos_memoria_que_base64(self):
+        # Aquecimento: caches globais do interpretador (ex.: a tabela de strings internadas) crescem
+        # uma vez por processo e não devem cair na medição
+        self.assertEqual(self.post_multipart('55555555555').status_code, 201)
+        with PicoMemoriaRequisicao() as json_base64:
+            self.assertEqual(self.post_json('33333333333').status_code, 201)
+        with PicoMemoriaRequisicao() as multipart:
+            self.assertEqual(self.post_multipart('44444444444').status_code, 201)
+
+        tamanho_anexos = len(self.arquivo) * len(ANEXOS)
+        # Base64 segura o texto, a string e os bytes decodificados; multipart só os chunks do upload
+        self.assertGreater(json_base64.pico, 2 * tamanho_anexos)
+        self.assertLess(multipart.pico, tamanho_anexos / 4)
+
+    def test_dados_invalidos_no_multipart(self):
+        resposta = self.client.post('/api/inscricao/', {'dados': '{'}, format='multipart')
+        self.assertEqual(resposta.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), MEDIA_ACCEL='')
+class MediaImageTests(SimpleTestCase):
+    def setUp(self):
+        self.nome = 'a1b2c3.png'
+        self.caminho = os.path.join(settings.MEDIA_ROOT, self.nome)
+        with open(self.caminho, 'wb') as arquivo:
+            arquivo.write(imagem_png())
+        self.url = f'/api/media-image/{self.nome}/'
+
+    def test_etag_e_304(self):
+        resposta = self.client.get(self.url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta['ETag'], f'"{self.nome}"')
+
+        resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.nome}"')
+        self.assertEqual(resposta.status_code, 304)
+        self.assertIn('Last-Modified', resposta)
+
+    def test_arquivo_removido_responde_404_mesmo_com_etag(self):
+        os.remove(self.caminho)
+        resposta = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.nome}"')
+        self.assertEqual(resposta.status_code, 404)
+
+    def test_range(self):
+        resposta = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(resposta.status_code, 206)
+        self.assertEqual(b''.join(resposta.streaming_content), imagem_png()[:10])
+
+
+class ServidorSMTPFalso(socketserver.ThreadingTCPServer):
+    """
+    Servidor SMTP mínimo que conta conexões e mensagens; `atraso` simula o handshake TLS + login.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, atraso=0.0):
+        self.atraso = atraso
+        self.conexoes = 0
+        self.mensagens = 0
+        self._lock = threading.Lock()
+        super().__init__(('127.0.0.1', 0), AtendimentoSMTP)
+
+
+class AtendimentoSMTP(socketserver.StreamRequestHandler):
+    def responder(self, linha):
+        self.wfile.write(linha.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        servidor = self.server
+        with servidor._lock:
+            servidor.conexoes += 1
+        time.sleep(servidor.atraso)
+        self.responder('220 falso')
+        for linha in self.rfile:
+            comando = linha.decode('ascii', 'replace').strip().upper()
+            if comando.startswith('EHLO'):
+                self.responder('250-falso')
+                self.responder('250 8BITMIME')
+            elif comando == 'DATA':
+                self.responder('354 fim com <CRLF>.<CRLF>')
+                for conteudo in self.rfile:
+                    if conteudo == b'.\r\n':
+                        break
+                with servidor._lock:
+                    servidor.mensagens += 1
+                self.responder('250 ok')
+            elif comando == 'QUIT':
+                self.responder('221 tchau')
+                return
+            else:
+                self.responder('250 ok')
+
+
+class EnvioEmailsTests(TestCase):
+    def setUp(self):
+        self.servidor = ServidorSMTPFalso(atraso=0.02)
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+
+        configuracao = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.servidor.server_address[1], EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='', DEFAULT_FROM_EMAIL='naoresponda@example.com',
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def enfileirar(self, quantidade):
+        return [
+            EmailFila.objects.create(assunto=f'Assunto {i}', mensagem='Texto', destinatarios=[f'c{i}@example.com'])
+            for i in range(quantidade)
+        ]
+
+    def test_fila_enviada_por_uma_conexao(self):
+        self.enfileirar(20)
+        call_command('enviar_emails', stdout=StringIO())
+
+        self.assertEqual(EmailFila.objects.filter(status=1).count(), 20)
+        self.assertEqual((self.servidor.conexoes, self.servidor.mensagens), (1, 20))
+
+    @override_settings(EMAIL_CONEXAO_MAX_MENSAGENS=5)
+    def test_conexao_renovada_apos_o_limite_de_mensagens(self):
+        self.enfileirar(12)
+        call_command('enviar_emails', stdout=StringIO())
+
+        self.assertEqual((self.servidor.conexoes, self.servidor.mensagens), (3, 12))
+
+    def test_conexao_persistente_aumenta_a_vazao(self):
+        mensagens = [_montar_mensagem(email) for email in self.enfileirar(20)]
+
+        # Antes: uma conexão (handshake + login) por e-mail
+        inicio = time.perf_counter()
+        for mensagem in mensagens:
+            get_connection(fail_silently=False).send_messages([mensagem])
+        por_email = time.perf_counter() - inicio
+
+        conexao = ConexaoEmail()
+        inicio = time.perf_counter()
+        for mensagem in mensagens:
+            conexao.enviar(mensagem)
+        conexao.fechar()
+        persistente = time.perf_counter() - inicio
+
+        self.assertEqual(self.servidor.mensagens, 40)
+        self.assertLess(persistente, por_email / 3)
+
+
+def consultas_criticas():
+    """
+    Consultas dos caminhos quentes e a tabela que cada uma precisa acessar por índice.
+    """
+    agora = timezone.now()
+    return [
+        ('Inscrição por hash (CandidatoPorHashView, InscricaoDetailView)', 'inscricao',
+         Inscricao.objects.filter(hash='0' * 128)),
+        ('Candidatos por CPF (PostInscricao)', 'candidato',
+         Candidato.objects.filter(cpf='00000000000')),
+        ('Inscrição duplicada por CPF e curso (PostInscricao)', 'candidato',
+         Inscricao.objects.filter(candidato__cpf='00000000000', curso_id=1)),
+        ('Inscrições pendentes por curso (filtros do admin)', 'inscricao',
+         Inscricao.objects.filter(status=0, curso_id=1)),
+        ('Inscrições pendentes expiradas (update_expired_inscricoes)', 'inscricao',
+         Inscricao.objects.filter(status=0, curso__prazo_validacao__lt=agora)),
+        ('Inscrições por data de criação', 'inscricao',
+         Inscricao.objects.filter(data_criacao__gte=agora - timedelta(days=1))),
+        ('Cidade por nome (PostInscricao, UpdateInscricao)', 'cidade',
+         Cidade.objects.filter(nome='Porto Alegre')),
+        ('Usuário por token de recuperação (AlterarSenhaView)', 'usuario_admin',
+         UsuarioAdmin.objects.filter(token_recuperacao_senha='token')),
+    ]
+
+
+def acessos_plano(no):
+    # Entradas de tabela ("table_name", "possible_keys", "key"...) em qualquer nível do EXPLAIN FORMAT=JSON
+    if isinstance(no, dict):
+        if 'table_name' in no:
+            yield no
+        for valor in no.values():
+            yield from acessos_plano(valor)
+    elif isinstance(no, list):
+        for item in no:
+            yield from acessos_plano(item)
+
+
+@skipUnless(connection.vendor in ('mysql', 'sqlite'), 'Planos verificados apenas no MySQL e no SQLite')
+class PlanosConsultasTests(TestCase):
+    """
+    EXPLAIN das consultas críticas. No MySQL a tabela precisa ter um índice utilizável
+    (`possible_keys`): com o banco de teste quase vazio o otimizador pode preferir varrer,
+    mas um índice removido ou uma condição que o impeça (ex.: função na coluna) falha aqui.
+    """
+
+    def test_consultas_criticas_usam_indice(self):
+        for descricao, tabela, queryset in consultas_criticas():
+            with self.subTest(descricao):
+                if connection.vendor == 'mysql':
+                    plano = queryset.explain(format='json')
+                    acessos = [acesso for acesso in acessos_plano(json.loads(plano)) if acesso['table_name'] == tabela]
+                    self.assertTrue(acessos, plano)
+                    for acesso in acessos:
+                        self.assertTrue(acesso.get('possible_keys') or acesso.get('key'), plano)
+                else:
+                    self.assertNotRegex(queryset.explain(), rf'\bSCAN {tabela}\b')
+
+
+class PostInscricaoTests(InscricoesTestCase):
+    # Contagem da configuração de produção, com o cache do portal ligado (Redis)
+    @override_settings(PORTAL_CACHE=True)
+    def test_consultas_por_inscricao(self):
+        # Primeira inscrição do processo: 5 das 18 consultas carregam o cache de referência
+        # (países, estados, cidades, polos e polos por curso); inclui a fila de e-mail e a
+        # invalidação do portal, que rodam no commit
+        with self.assertNumQueries(18), self.captureOnCommitCallbacks(execute=True):
+            self.inscrever(curso=self.cursos[0])
+        # Candidato que volta: atualiza candidato, endereço e histórico em vez de inserir
+        with self.assertNumQueries(14), self.captureOnCommitCallbacks(execute=True):
+            self.inscrever(curso=self.cursos[1])
+
+    def test_inscricao_duplicada_no_mesmo_curso(self):
+        self.inscrever()
+        resposta = self.client.post(
+            '/api/inscricao/', {'candidato': self.payload_candidato(), 'curso': self.curso.id}, format='json'
+        )
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(resposta.data['error'], 'O CPF já está inscrito nesse curso.')
+
+    def test_limite_de_tres_cursos(self):
+        for curso in self.cursos[:3]:
+            self.inscrever(curso=curso)
+        resposta = self.client.post(
+            '/api/inscricao/', {'candidato': self.payload_candidato(), 'curso': self.cursos[3].id}, format='json'
+        )
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(resposta.data['error'], 'CPF já inscrito em 3 ou mais cursos.')
+        self.assertEqual(Inscricao.objects.count(), 3)
+
+    def test_nova_inscricao_nao_altera_polo_nem_anexos_das_anteriores(self):
+        polo_norte = Polo.objects.create(nome='Polo Norte', logradouro='Rua', numero=2, bairro='Norte', cidade=self.cidade)
+        CursoPolo.objects.create(curso=self.cursos[1], polo=polo_norte)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inscrever(curso=self.cursos[0])
+            self.inscrever(curso=self.cursos[1], polo_ofertante='Polo Norte', nome_completo='Fulano Atualizado')
+
+        primeira, segunda = Inscricao.objects.order_by('id')
+        self.assertEqual(primeira.candidato_id, segunda.candidato_id)
+        self.assertEqual(primeira.candidato.nome_completo, 'Fulano Atualizado')
+        self.assertEqual((primeira.polo_ofertante, segunda.polo_ofertante), (self.polo, polo_norte))
+        for campo in ANEXOS:
+            self.assertNotEqual(getattr(primeira, campo).name, getattr(segunda, campo).name)
+            self.assertTrue(default_storage.exists(getattr(primeira, campo).name))
+
+        detalhe = self.client.get(f'/api/inscricoes/{primeira.id}/{primeira.hash}/').json()
+        self.assertEqual([polo['label'] for polo in detalhe['polo_options'] if polo['selected']], ['Polo Centro'])
+        self.assertEqual(detalhe['candidato']['anexo_rg'], primeira.anexo_rg.name)
+
+    def test_polo_inexistente(self):
+        resposta = self.client.post(
+            '/api/inscricao/',
+            {'candidato': self.payload_candidato(polo_ofertante='Polo Sul'), 'curso': self.curso.id},
+            format='json',
+        )
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('polo_ofertante', resposta.data['candidato'])
+        self.assertFalse(Inscricao.objects.exists())
+
+
+# Aplica api.0004 em um banco SQLite próprio, a partir de dados no formato da 0003
+MIGRACAO_0004 = r"""
+import json, sys
+import django
+from django.conf import settings
+settings.DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': sys.argv[1]}}
+django.setup()
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.exceptions import IrreversibleError
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+
+def modelos(migracao):
+    return MigrationExecutor(connection).loader.project_state(('api', migracao)).apps
+
+call_command('migrate', 'api', '0003', verbosity=0)
+apps = modelos('0003_indices_consultas')
+Pais, Estado, Cidade, Polo, Curso = (apps.get_model('api', nome) for nome in ('Pais', 'Estado', 'Cidade', 'Polo', 'Curso'))
+Candidato, Endereco, HistoricoEducacional, Inscricao = (
+    apps.get_model('api', nome) for nome in ('Candidato', 'Endereco', 'HistoricoEducacional', 'Inscricao')
+)
+pais = Pais.objects.create(id=1, sigla='BR')
+cidade = Cidade.objects.create(nome='Porto Alegre', uf=Estado.objects.create(id=1, uf='RS'))
+polos = [Polo.objects.create(nome=nome, logradouro='Rua', numero=1, bairro='Centro', cidade=cidade) for nome in ('Centro', 'Norte', 'Sul')]
+agora = timezone.now()
+for i, (cpf, polo) in enumerate((('111', polos[0]), ('111', polos[1]), ('222', polos[2]))):
+    candidato = Candidato.objects.create(
+        email='a@example.com', nome_completo=f'Pessoa {i}', nome_mae='Mae', cpf=cpf, registro_geral='1',
+        anexo_cpf=f'cpf{i}.png', anexo_rg=f'rg{i}.png', validacao_anexo_rg=i, nacionalidade=pais, naturalidade=cidade,
+        data_nascimento='2000-01-01', telefone_celular='1', polo_ofertante=polo, genero=0, estado_civil=0,
+        portador_necessidades_especiais=0, renda_per_capita=0, etnia=0, cpf_cedula_estrangeira=0, rg_cedula_estrangeira=0,
+    )
+    Endereco.objects.create(candidato=candidato, area=0, cep='1', estado='RS', cidade='Porto Alegre', cidade_id=cidade,
+                            bairro='Centro', logradouro=f'Rua {i}', numero='1')
+    if i < 2:
+        HistoricoEducacional.objects.create(candidato=candidato, tipo_escola=0, nivel_escolaridade=i, anexo_historico_escolar=f'historico{i}.png')
+    curso = Curso.objects.create(nome=f'Curso {i}', prazo_inscricoes=agora, prazo_validacao=agora, carga_horaria=10)
+    Inscricao.objects.create(candidato=candidato, curso=curso, hash=f'h{i}', status=0, data_criacao=agora, data_modificacao=agora)
+
+call_command('migrate', 'api', '0004', verbosity=0)
+apps = modelos('0004_candidato_unico_por_cpf')
+Candidato, Endereco, Inscricao = (apps.get_model('api', nome) for nome in ('Candidato', 'Endereco', 'Inscricao'))
+resultado = {
+    'candidatos': list(Candidato.objects.order_by('cpf').values_list('cpf', 'nome_completo')),
+    'inscricoes': list(Inscricao.objects.order_by('id').values_list(
+        'candidato__cpf', 'polo_ofertante__nome', 'anexo_cpf', 'anexo_rg', 'validacao_anexo_rg', 'anexo_historico_escolar'
+    )),
+    'enderecos': list(Endereco.objects.order_by('id').values_list('candidato__cpf', 'logradouro')),
+}
+try:
+    call_command('migrate', 'api', '0003', verbosity=0)
+    resultado['reversao'] = 'aplicada'
+except IrreversibleError:
+    resultado['reversao'] = 'bloqueada'
+print(json.dumps(resultado))
+"""
+
+
+class MigracaoCandidatoUnicoTests(SimpleTestCase):
+    def test_cada_inscricao_mantem_polo_e_anexos(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            processo = subprocess.run(
+                [sys.executable, '-c', MIGRACAO_0004, os.path.join(diretorio, 'banco.sqlite3')],
+                cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True,
+            )
+        self.assertEqual(processo.returncode, 0, processo.stderr.decode())
+        resultado = json.loads(processo.stdout)
+
+        # O candidato mais recente de cada CPF fica; as inscrições guardam o que cada uma enviou
+        self.assertEqual(resultado['candidatos'], [['111', 'Pessoa 1'], ['222', 'Pessoa 2']])
+        self.assertEqual(resultado['inscricoes'], [
+            ['111', 'Centro', 'cpf0.png', 'rg0.png', 0, 'historico0.png'],
+            ['111', 'Norte', 'cpf1.png', 'rg1.png', 1, 'historico1.png'],
+            ['222', 'Sul', 'cpf2.png', 'rg2.png', 2, ''],
+        ])
+        # Endereços dos duplicados passam para o candidato mantido
+        self.assertEqual(resultado['enderecos'], [['111', 'Rua 0'], ['111', 'Rua 1'], ['222', 'Rua 2']])
+        self.assertEqual(resultado['reversao'], 'bloqueada')
+
+
+class UpdateInscricaoTests(InscricoesTestCase):
+    def alterar(self, inscricao, **campos):
+        campos.setdefault('cpf', inscricao.candidato.cpf)
+        candidato = self.payload_candidato(anexos=False, **campos)
+        return self.client.put(
+            '/api/inscricao/alterar/', {'inscricao_id': inscricao.id, 'candidato': candidato}, format='json'
+        )
+
+    def test_alterar_mantendo_o_proprio_cpf(self):
+        self.inscrever('11111111111')
+        inscricao = Inscricao.objects.get()
+
+        resposta = self.alterar(inscricao, nome_completo='Fulano Atualizado')
+
+        self.assertEqual(resposta.status_code, 200, resposta.data)
+        self.assertEqual(Candidato.objects.get(cpf='11111111111').nome_completo, 'Fulano Atualizado')
+
+    def test_cpf_de_outro_candidato_responde_400(self):
+        self.inscrever('11111111111')
+        self.inscrever('22222222222', curso=self.cursos[1])
+        inscricao = Inscricao.objects.get(candidato__cpf='11111111111')
+
+        resposta = self.alterar(inscricao, cpf='22222222222')
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn('cpf', resposta.data)
+        self.assertEqual(Candidato.objects.filter(cpf='11111111111').count(), 1)
+
+    def test_anexo_substituido_so_nesta_inscricao(self):
+        self.inscrever('11111111111')
+        self.inscrever('11111111111', curso=self.cursos[1])
+        primeira, segunda = Inscricao.objects.order_by('id')
+        anexo_anterior, anexo_da_outra = primeira.anexo_rg.name, segunda.anexo_rg.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resposta = self.alterar(primeira, anexo_rg=anexo_base64(imagem_png((80, 50))))
+
+        self.assertEqual(resposta.status_code, 200, resposta.data)
+        primeira.refresh_from_db()
+        segunda.refresh_from_db()
+        self.assertNotEqual(primeira.anexo_rg.name, anexo_anterior)
+        self.assertFalse(default_storage.exists(anexo_anterior))
+        self.assertEqual(segunda.anexo_rg.name, anexo_da_outra)
+        self.assertTrue(default_storage.exists(anexo_da_outra))
+
+
+class ReferenciasTests(InscricoesTestCase):
+    @override_settings(REFERENCIAS_VERIFICAR_SEGUNDOS=0)
+    def test_versao_publicada_por_outro_processo_recarrega(self):
+        self.assertIsNone(referencias.cidade_por_nome('Canoas'))
+        Cidade.objects.create(nome='Canoas', ibge=4304606, uf=self.estado)
+        # Mesma versão no cache compartilhado: o retrato local continua valendo
+        self.assertIsNone(referencias.cidade_por_nome('Canoas'))
+
+        # Outro processo (signal após o commit ou manage.py invalidar_referencias) só troca a versão compartilhada
+        caches[settings.REFERENCIAS_CACHE_ALIAS].set(referencias.CHAVE_VERSAO, 'versao-de-outro-processo', None)
+        self.assertEqual(referencias.cidade_por_nome('Canoas').ibge, 4304606)
+
+    def test_comando_exige_cache_compartilhado(self):
+        with override_settings(CACHE_COMPARTILHADO=False):
+            with self.assertRaises(CommandError):
+                call_command('invalidar_referencias', stdout=StringIO())
+
+        versao = referencias.get_dados().versao
+        with override_settings(CACHE_COMPARTILHADO=True):
+            call_command('invalidar_referencias', stdout=StringIO())
+        self.assertNotEqual(caches[settings.REFERENCIAS_CACHE_ALIAS].get(referencias.CHAVE_VERSAO), versao)
+
+
+@override_settings(CATALOGO_CACHE=True)
+class CatalogoCacheTests(InscricoesTestCase):
+    def test_resposta_cacheada_e_304(self):
+        resposta = self.client.get('/api/polos/')
+        self.assertEqual(resposta.status_code, 200)
+
+        with self.assertNumQueries(0):
+            repetida = self.client.get('/api/polos/', HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_escrita_em_outro_processo_invalida_pelo_cache_compartilhado(self):
+        self.assertEqual(len(self.client.get('/api/polos/').json()), 1)
+
+        # Escrita feita por outro worker: o signal troca a versão no cache compartilhado após o commit
+        with self.captureOnCommitCallbacks(execute=True):
+            Polo.objects.create(nome='Polo Norte', logradouro='Rua', numero=2, bairro='Norte', cidade=self.cidade)
+
+        self.assertEqual(len(self.client.get('/api/polos/').json()), 2)
+
+    @override_settings(CATALOGO_CACHE=False)
+    def test_sem_cache(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/polos/')
+        with self.assertNumQueries(1):
+            self.client.get('/api/polos/')
+
+
+@override_settings(CATALOGO_CACHE=False)
+class PolosByCursoTests(InscricoesTestCase):
+    def test_polos_e_cidades_em_uma_consulta(self):
+        for i, cidade in enumerate((self.cidade, self.outra_cidade) * 5):
+            polo = Polo.objects.create(nome=f'Polo {i}', logradouro='Rua', numero=i, bairro='Centro', cidade=cidade)
+            CursoPolo.objects.create(curso=self.curso, polo=polo)
+
+        with self.assertNumQueries(1):
+            resposta = self.client.get(f'/api/cursos/{self.curso.id}/polos/')
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(resposta.json()), 11)
+        self.assertEqual({polo['cidade_nome'] for polo in resposta.json()}, {'Porto Alegre', 'Pelotas'})
+
+    def test_curso_inexistente(self):
+        with self.assertNumQueries(1):
+            resposta = self.client.get('/api/cursos/999/polos/')
+        self.assertEqual(resposta.status_code, 404)
+
+
+class DetalheInscricaoTests(InscricoesTestCase):
+    def test_detalhe_em_tres_consultas_e_polo_da_inscricao_selecionado(self):
+        outro_polo = Polo.objects.create(nome='Polo Norte', logradouro='Rua', numero=2, bairro='Norte', cidade=self.cidade)
+        CursoPolo.objects.create(curso=self.curso, polo=outro_polo)
+        self.inscrever()
+        inscricao = Inscricao.objects.get()
+        url = f'/api/inscricoes/{inscricao.id}/{inscricao.hash}/'
+        self.client.get(url)  # aquece o cache de referência
+
+        with self.assertNumQueries(3):
+            resposta = self.client.get(url)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['candidato']['endereco']['cidade'], 'Porto Alegre')
+        selecionados = {polo['id']: polo['selected'] for polo in resposta.json()['polo_options']}
+        self.assertEqual(selecionados, {self.polo.id: True, outro_polo.id: False})
+
+    def test_hash_incorreta(self):
+        self.inscrever()
+        inscricao = Inscricao.objects.get()
+        with self.assertNumQueries(1):
+            resposta = self.client.get(f'/api/inscricoes/{inscricao.id}/outra/')
+        self.assertEqual(resposta.status_code, 404)
+
+
+@override_settings(PORTAL_CACHE=True)
+class PortalCacheTests(InscricoesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.inscrever()
+        self.inscricao = Inscricao.objects.get()
+        self.url = f'/api/candidatos/{self.inscricao.hash}/'
+
+    def test_resumo_servido_do_cache(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            resposta = self.client.get(self.url)
+        self.assertEqual(resposta.json()[0]['inscricoes'][0]['status'], 0)
+
+    def test_update_expired_inscricoes_invalida_o_resumo(self):
+        from api.tasks import update_expired_inscricoes
+
+        UsuarioAdmin.objects.create(id=1, username='sistema', email='sistema@example.com')
+        self.assertEqual(self.client.get(self.url).json()[0]['inscricoes'][0]['status'], 0)
+
+        Curso.objects.filter(id=self.curso.id).update(prazo_validacao=timezone.now() - timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True), mock.patch('sys.stdout', new=StringIO()):
+            update_expired_inscricoes()
+
+        self.assertEqual(self.client.get(self.url).json()[0]['inscricoes'][0]['status'], 3)
+
+
+class AdminInscricoesTestCase(InscricoesTestCase):
+    """
+    Listagem administrativa de inscrições (/api/admin/inscricoes/), com um administrador autenticado.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = UsuarioAdmin.objects.create(username='admin', email='admin@example.com', nome_completo='Admin')
+        self.client.force_authenticate(self.admin)
+
+    def inscrever_varios(self, quantidade, inicio=0):
+        for i in range(inicio, inicio + quantidade):
+            self.inscrever(cpf=f'{i:011d}', nome_completo=f'Candidato {i}', email=f'candidato{i}@example.com')
+
+
+@override_settings(DOCUMENTOS_NORMALIZAR=True, DOCUMENTOS_TAMANHO_REVISAO=100)
+class DocumentosRevisaoTests(AdminInscricoesTestCase):
+    def test_miniaturas_gravadas_e_expostas(self):
+        anexo = anexo_base64(imagem_png((1200, 900)))
+        self.inscrever(**{campo: anexo for campo in ANEXOS})
+        inscricao = Inscricao.objects.get()
+
+        resultado = self.client.get('/api/admin/inscricoes/').json()['results'][0]
+        detalhe = self.client.get(f'/api/inscricoes/{inscricao.id}/{inscricao.hash}/').json()
+        for campo in ANEXOS:
+            with self.subTest(campo=campo):
+                nome = getattr(inscricao, campo).name
+                url = f'/api/media-image/{nome}/?variante=revisao'
+                self.assertEqual(resultado['anexos_revisao'][campo], f'http://testserver{url}')
+                self.assertEqual(detalhe['anexos_revisao'][campo], url)
+
+                # Só a miniatura de revisão é gravada ao lado do documento
+                base = os.path.splitext(nome)[0]
+                self.assertTrue(default_storage.exists(f'{base}_revisao.webp'))
+                self.assertFalse(default_storage.exists(f'{base}_classificador.png'))
+
+                resposta = self.client.get(url)
+                miniatura = Image.open(BytesIO(b''.join(resposta.streaming_content)))
+                self.assertEqual(max(miniatura.size), 100)
+
+
+class ExportacaoCSVTests(AdminInscricoesTestCase):
+    def exportar(self, **parametros):
+        resposta = self.client.get('/api/admin/inscricoes/', {'csv': 1, **parametros})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.streaming)
+        return b''.join(resposta.streaming_content).decode('utf-8')
+
+    def test_conteudo(self):
+        self.inscrever_varios(3)
+        linhas = list(csv.DictReader(StringIO(self.exportar())))
+
+        self.assertEqual([linha['cpf'] for linha in linhas], ['00000000000', '00000000001', '00000000002'])
+        self.assertEqual(linhas[0]['nome_completo'], 'Candidato 0')
+        self.assertEqual(linhas[0]['cidade'], 'Porto Alegre')
+        self.assertEqual(linhas[0]['curso'], self.curso.nome)
+        self.assertEqual(linhas[0]['polo'], 'Polo Centro')
+        self.assertEqual(linhas[0]['nacionalidade'], self.brasil.nome)
+
+    def test_filtros_da_listagem(self):
+        self.inscrever_varios(2)
+        self.inscrever(cpf='99999999999', curso=self.cursos[1])
+        linhas = list(csv.DictReader(StringIO(self.exportar(curso=self.cursos[1].id))))
+        self.assertEqual([linha['cpf'] for linha in linhas], ['99999999999'])
+
+    @override_settings(EXPORTACAO_LOTE=2)
+    def test_consultas_por_lote_e_nao_por_linha(self):
+        # Por lote: inscrições com candidato e curso, endereços e históricos; mais a consulta vazia do fim
+        self.inscrever_varios(4)
+        self.exportar()  # aquece o cache de referência
+        with self.assertNumQueries(2 * 3 + 1):
+            self.assertEqual(len(self.exportar().splitlines()), 5)
+
+        self.inscrever_varios(4, inicio=4)
+        with self.assertNumQueries(4 * 3 + 1):
+            self.assertEqual(len(self.exportar().splitlines()), 9)
+
+
+class ExportacaoSegundoPlanoTests(AdminInscricoesTestCase):
+    @override_settings(EXPORTACAO_LOTE=2)
+    def test_arquivo_igual_ao_csv_da_listagem(self):
+        self.inscrever_varios(3)
+        self.inscrever_varios(2, inicio=3)
+        for i in range(3, 5):
+            self.inscrever(cpf=f'{i:011d}', curso=self.cursos[1])
+
+        resposta = self.client.post(f'/api/admin/exportacoes/?curso={self.cursos[1].id}', {'formato': 'csv'})
+        self.assertEqual(resposta.status_code, 202)
+        call_command('processar_exportacoes', stdout=StringIO())
+
+        pedido = self.client.get(f'/api/admin/exportacoes/{resposta.data["id"]}/').json()
+        self.assertEqual((pedido['status'], pedido['linhas'], pedido['total']), (2, 2, 2))
+        arquivo = self.client.get(f'/api/admin/exportacoes/{pedido["id"]}/download/')
+        self.assertEqual(arquivo.status_code, 200)
+        conteudo = b''.join(arquivo.streaming_content).decode('utf-8')
+
+        listagem = self.client.get('/api/admin/inscricoes/', {'csv': 1, 'curso': self.cursos[1].id})
+        self.assertEqual(conteudo, b''.join(listagem.streaming_content).decode('utf-8'))
+
+    def test_filtro_invalido(self):
+        resposta = self.client.post('/api/admin/exportacoes/?curso=abc', {'formato': 'csv'})
+        self.assertEqual(resposta.status_code, 400)
+
+
+@mock.patch.object(PaginacaoCursorInscricoes, 'page_size', 2)
+class PaginacaoCursorTests(AdminInscricoesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.inscrever_varios(5)
+        # Mesma data em todas: a ordem e os cursores dependem do desempate pelo id
+        Inscricao.objects.update(data_criacao=timezone.now() - timedelta(days=1))
+        self.ids = list(Inscricao.objects.order_by('id').values_list('id', flat=True))
+
+    def pagina(self, url='/api/admin/inscricoes/?paginacao=cursor'):
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+
+    def ids_da(self, pagina):
+        return [inscricao['id'] for inscricao in pagina['results']]
+
+    def test_navega_para_frente_e_volta(self):
+        primeira = self.pagina()
+        self.assertEqual(self.ids_da(primeira), self.ids[0:2])
+        self.assertIsNone(primeira['previous'])
+        self.assertEqual(primeira['count'], 5)
+
+        segunda = self.pagina(primeira['next'])
+        self.assertEqual(self.ids_da(segunda), self.ids[2:4])
+        terceira = self.pagina(segunda['next'])
+        self.assertEqual(self.ids_da(terceira), self.ids[4:])
+        self.assertIsNone(terceira['next'])
+
+        voltando = self.pagina(terceira['previous'])
+        self.assertEqual(self.ids_da(voltando), self.ids[2:4])
+        self.assertEqual(self.ids_da(self.pagina(voltando['next'])), self.ids[4:])
+        inicio = self.pagina(voltando['previous'])
+        self.assertEqual(self.ids_da(inicio), self.ids[0:2])
+        self.assertIsNone(inicio['previous'])
+        self.assertEqual(self.ids_da(self.pagina(inicio['next'])), self.ids[2:4])
+
+    def test_filtros_mantidos_nos_links(self):
+        self.inscrever(cpf='00000000001', curso=self.cursos[1])
+        self.inscrever(cpf='00000000003', curso=self.cursos[1])
+        self.inscrever(cpf='00000000004', curso=self.cursos[1])
+
+        primeira = self.pagina(f'/api/admin/inscricoes/?paginacao=cursor&curso={self.cursos[1].id}')
+        segunda = self.pagina(primeira['next'])
+        self.assertEqual(primeira['count'], 3)
+        self.assertEqual(len(primeira['results']) + len(segunda['results']), 3)
+        self.assertEqual({inscricao['curso']['id'] for inscricao in primeira['results'] + segunda['results']}, {self.cursos[1].id})
+
+    def test_cursor_invalido(self):
+        lixo = base64.urlsafe_b64encode(b'{"d": "ontem"}').decode()
+        for cursor in ('abc', lixo):
+            with self.subTest(cursor):
+                resposta = self.client.get('/api/admin/inscricoes/', {'paginacao': 'cursor', 'cursor': cursor})
+                self.assertEqual(resposta.status_code, 404)
+
+
+class BuscaInscricoesTests(AdminInscricoesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.inscrever(cpf='11122233344', nome_completo='Ana Souza', email='ana.souza@example.com')
+        self.inscrever(cpf='55566677788', nome_completo='João Souzandro', email='joao@gmail.com')
+        self.inscrever(cpf='99988877766', nome_completo='Maria Silva', nome_social='Mari', email='maria@example.com')
+
+    def buscar(self, valor, parametro='busca'):
+        resposta = self.client.get('/api/admin/inscricoes/', {parametro: valor})
+        self.assertEqual(resposta.status_code, 200)
+        ids = [inscricao['id'] for inscricao in resposta.json()['results']]
+        cpfs = dict(Inscricao.objects.filter(id__in=ids).values_list('id', 'candidato__cpf'))
+        return [cpfs[id] for id in ids]
+
+    def test_prefixo_de_palavra(self):
+        self.assertEqual(self.buscar('Sou'), ['11122233344', '55566677788'])
+        self.assertEqual(self.buscar('mar'), ['99988877766'])
+
+    def test_trecho_do_meio_da_palavra_nao_casa(self):
+        # Só o início de cada termo está no índice; trechos do meio continuam no filtro `nome`
+        self.assertEqual(self.buscar('ouza'), [])
+        self.assertEqual(self.buscar('222333'), [])
+
+    def test_nome_continua_com_icontains(self):
+        self.assertEqual(sorted(self.buscar('ouza', parametro='nome')), ['11122233344', '55566677788'])
+        self.assertEqual(self.buscar('Maria Silva', parametro='nome'), ['99988877766'])
+        self.assertEqual(self.buscar('111.222', parametro='nome'), [])
+
+    def test_sem_acentos_nem_caixa_e_todas_as_palavras(self):
+        self.assertEqual(self.buscar('JOAO souz'), ['55566677788'])
+        self.assertEqual(self.buscar('ana silva'), [])
+
+    def test_termo_exato_e_mais_relevante(self):
+        self.assertEqual(self.buscar('souza'), ['11122233344', '55566677788'])
+        self.assertEqual(self.buscar('souzandro'), ['55566677788'])
+
+    def test_cpf_e_email(self):
+        self.assertEqual(self.buscar('111.222.333-44'), ['11122233344'])
+        self.assertEqual(self.buscar('555.666'), ['55566677788'])
+        self.assertEqual(self.buscar('gmail'), ['55566677788'])
+        self.assertEqual(self.buscar('ana.souza@example'), ['11122233344'])
+
+    def test_indice_acompanha_alteracoes_do_candidato(self):
+        candidato = Candidato.objects.get(cpf='99988877766')
+        candidato.nome_completo = 'Maria Pereira'
+        candidato.save()
+        self.assertEqual(self.buscar('pereira'), ['99988877766'])
+        self.assertEqual(self.buscar('silva'), [])
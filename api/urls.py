@@ -29,11 +29,15 @@ from .views import (
     InscricaoHistoricoView,
     ValidateRGView,
     ValidateCPFView,
+    CatalogoMetricasView,
+    ClassificadoresMetricasView,
+    PortalMetricasView,
 
     # ViewSets Administrativos
     TelaViewSet,
     UsuarioAdminViewSet,
     InscricaoViewSet,
+    ExportacaoViewSet,
     PoloViewSet,
     EstatisticasViewSet
 )
@@ -43,6 +47,7 @@ router = DefaultRouter()
 router.register(r'admin/usuarios', UsuarioAdminViewSet, basename='usuario-admin')
 router.register(r'admin/telas', TelaViewSet, basename='tela')
 router.register(r'admin/inscricoes', InscricaoViewSet, basename='inscricao')  # Adicionado ao router
+router.register(r'admin/exportacoes', ExportacaoViewSet, basename='exportacao')
 router.register(r'admin/polos', PoloViewSet, basename='polo')
 router.register(r'admin/estatisticas', EstatisticasViewSet, basename='estatisticas')
 # /api/admin/inscricoes/
@@ -73,6 +78,9 @@ urlpatterns = [
     path('admin/inscricoes/<int:pk>/aprovar/', AprovarInscricaoView.as_view(), name='aprovar-inscricao'),
     path('admin/inscricoes/<int:pk>/rejeitar/', RecusarInscricaoView.as_view(), name='rejeitar-inscricao'),
     path('admin/inscricoes/<int:inscricao_id>/historico/', InscricaoHistoricoView.as_view(), name='inscricao-historico'),
+    path('admin/classificadores/metricas/', ClassificadoresMetricasView.as_view(), name='classificadores-metricas'),
+    path('admin/catalogo/metricas/', CatalogoMetricasView.as_view(), name='catalogo-metricas'),
+    path('admin/portal/metricas/', PortalMetricasView.as_view(), name='portal-metricas'),
 
     # Inclusão das rotas do Router Administrativo
     path('', include(router.urls)),
@@ -1,8 +1,150 @@
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import get_template
 from django.conf import settings
+from django.utils import timezone
 import os
 
+from .models import EmailFila
+
+
+def enfileirar_email(assunto, mensagem, destinatarios, mensagem_html=None):
+    """
+    Grava o e-mail na fila (tabela email_fila) somente após o commit da transação atual.
+    O envio SMTP é feito pelo comando `enviar_emails`, fora do ciclo da requisição.
+    """
+    transaction.on_commit(lambda: EmailFila.objects.create(
+        assunto=assunto,
+        mensagem=mensagem,
+        mensagem_html=mensagem_html,
+        remetente=settings.DEFAULT_FROM_EMAIL,
+        destinatarios=destinatarios,
+    ))
+
+
+class ConexaoEmail:
+    """
+    Mantém uma conexão SMTP aberta entre envios e lotes, evitando um handshake TLS + login
+    por e-mail. A conexão é renovada após EMAIL_CONEXAO_MAX_MENSAGENS envios, quando não
+    responde ao NOOP depois de ociosa ou após qualquer erro.
+    """
+
+    def __init__(self):
+        self._conexao = None
+        self._mensagens = 0
+        self._ultimo_uso = 0
+
+    def _abrir(self):
+        self.fechar()
+        self._conexao = get_connection(fail_silently=False)
+        self._conexao.open()
+        self._mensagens = 0
+
+    def _viva(self):
+        if self._conexao is None or self._mensagens >= settings.EMAIL_CONEXAO_MAX_MENSAGENS:
+            return False
+        if time.monotonic() - self._ultimo_uso < settings.EMAIL_CONEXAO_OCIOSA_SEGUNDOS:
+            return True
+        # Ociosa há algum tempo: confirma com o servidor antes de reutilizar
+        smtp = getattr(self._conexao, 'connection', None)
+        if smtp is None:
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def enviar(self, mensagem):
+        if not self._viva():
+            self._abrir()
+        try:
+            # send_messages em uma conexão já aberta não reconecta nem refaz o login
+            self._conexao.send_messages([mensagem])
+        except Exception:
+            self.fechar()
+            raise
+        self._mensagens += 1
+        self._ultimo_uso = time.monotonic()
+
+    def fechar(self):
+        if self._conexao is not None:
+            try:
+                self._conexao.close()
+            except Exception:
+                pass
+            self._conexao = None
+
+
+def _montar_mensagem(email):
+    mensagem = EmailMultiAlternatives(
+        subject=email.assunto,
+        body=email.mensagem,
+        from_email=email.remetente or settings.DEFAULT_FROM_EMAIL,
+        to=email.destinatarios,
+    )
+    if email.mensagem_html:
+        mensagem.attach_alternative(email.mensagem_html, 'text/html')
+    return mensagem
+
+
+def enviar_emails_fila(emails, conexao):
+    """
+    Envia um lote de e-mails da fila pela mesma conexão SMTP, atualizando status, tentativas e
+    próxima tentativa (backoff exponencial) de cada um. Retorna quantos foram enviados.
+    """
+    enviados = 0
+    for email in emails:
+        email.tentativas += 1
+        try:
+            conexao.enviar(_montar_mensagem(email))
+        except Exception as e:
+            email.ultimo_erro = str(e)
+            if email.tentativas >= settings.EMAIL_FILA_MAX_TENTATIVAS:
+                email.status = 2
+            else:
+                espera = min(
+                    settings.EMAIL_FILA_BACKOFF_SEGUNDOS * 2 ** (email.tentativas - 1),
+                    settings.EMAIL_FILA_BACKOFF_MAXIMO_SEGUNDOS,
+                )
+                email.proxima_tentativa = timezone.now() + timedelta(seconds=espera)
+            email.save(update_fields=['status', 'tentativas', 'proxima_tentativa', 'ultimo_erro'])
+            continue
+
+        email.status = 1
+        email.data_envio = timezone.now()
+        email.save(update_fields=['status', 'tentativas', 'data_envio'])
+        enviados += 1
+    return enviados
+
+
+# Templates de e-mail compilados uma única vez por processo
+_templates = {}
+
+
+def _get_template(nome):
+    template = _templates.get(nome)
+    if template is None:
+        template = _templates[nome] = get_template(nome)
+    return template
+
+
+def renderizar_emails(nome, contextos):
+    """
+    Renderiza as partes texto (`nome`.txt) e HTML (`nome`.html) para cada contexto, compilando
+    os templates uma só vez. Retorna uma lista de tuplas (texto, html), útil para notificações em lote.
+    """
+    template_texto = _get_template(f'{nome}.txt')
+    template_html = _get_template(f'{nome}.html')
+    return [(template_texto.render(context), template_html.render(context)) for context in contextos]
+
+
+def renderizar_email(nome, context):
+    return renderizar_emails(nome, [context])[0]
+
+
 def enviar_email(candidato, hash, curso):
     # Renderiza o template HTML com o contexto necessário
     context = {
@@ -10,16 +152,15 @@ def enviar_email(candidato, hash, curso):
         'link_acesso': os.getenv('FRONT_END_URL') + "/acesso/{}".format(hash),
         'nome_curso': curso.nome
     }
-    
-    message_html = render_to_string('email_template.html', context)
-    
-    # Enviar o email
-    send_mail(
-        subject="Bem-vindo!",
-        message='Obrigado por se cadastrar. Ative sua conta usando o link.',  # Texto alternativo para clientes que não suportam HTML
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[candidato.email],
-        html_message=message_html  # Email em HTML
+
+    message_text, message_html = renderizar_email('email_template', context)
+
+    # Enfileira o email
+    enfileirar_email(
+        assunto="Bem-vindo!",
+        mensagem=message_text,  # Texto alternativo para clientes que não suportam HTML
+        destinatarios=[candidato.email],
+        mensagem_html=message_html  # Email em HTML
     )
 
 def enviar_email_recuperacao(usuario, token):
@@ -29,15 +170,14 @@ def enviar_email_recuperacao(usuario, token):
         'link_recuperacao': os.getenv('FRONT_END_URL') + "/admin/recuperar-senha/{}".format(token),
     }
 
-    message_html = render_to_string('email_template_recuperacao.html', context)
+    message_text, message_html = renderizar_email('email_template_recuperacao', context)
 
-    # Enviar o email
-    send_mail(
-        subject="Recuperação de Senha!",
-        message='Para redefinir sua senha, clique no botão abaixo.',  # Texto alternativo para clientes que não suportam HTML
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[usuario.email],
-        html_message=message_html  # Email em HTML
+    # Enfileira o email
+    enfileirar_email(
+        assunto="Recuperação de Senha!",
+        mensagem=message_text,  # Texto alternativo para clientes que não suportam HTML
+        destinatarios=[usuario.email],
+        mensagem_html=message_html  # Email em HTML
     )
 
 def enviar_email_aprovacao(candidato, curso):
@@ -45,16 +185,15 @@ def enviar_email_aprovacao(candidato, curso):
         'nome': candidato.nome_completo,
         'nome_curso': curso.nome
     }
-    
-    message_html = render_to_string('email_template_aprovacao.html', context)
-
-    # Enviar o email
-    send_mail(
-        subject="Sua inscrição foi aprovada!",
-        message='Parabéns! Sua inscrição foi aprovada.',  # Texto alternativo para clientes que não suportam HTML
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[candidato.email],
-        html_message=message_html  # Email em HTML
+
+    message_text, message_html = renderizar_email('email_template_aprovacao', context)
+
+    # Enfileira o email
+    enfileirar_email(
+        assunto="Sua inscrição foi aprovada!",
+        mensagem=message_text,  # Texto alternativo para clientes que não suportam HTML
+        destinatarios=[candidato.email],
+        mensagem_html=message_html  # Email em HTML
     )
 
 def enviar_email_rejeicao(candidato, curso, motivo, hash):
@@ -65,13 +204,12 @@ def enviar_email_rejeicao(candidato, curso, motivo, hash):
         'link_alterar': os.getenv('FRONT_END_URL') + "/acesso/{}".format(hash),
     }
 
-    message_html = render_to_string('email_template_rejeicao.html', context)
+    message_text, message_html = renderizar_email('email_template_rejeicao', context)
 
-    send_mail(
-        subject="Sua inscrição foi rejeitada!",
-        message='Infelizmente, sua inscrição foi rejeitada.',  # Texto alternativo para clientes que não suportam HTML
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[candidato.email],
-        html_message=message_html  # Email em HTML
+    enfileirar_email(
+        assunto="Sua inscrição foi rejeitada!",
+        mensagem=message_text,  # Texto alternativo para clientes que não suportam HTML
+        destinatarios=[candidato.email],
+        mensagem_html=message_html  # Email em HTML
     )
-    
\ No newline at end of file
+
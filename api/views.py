@@ -4,42 +4,48 @@ import os
 from datetime import datetime, date, timezone as datetime_timezone
 from decimal import Decimal
 
-import tensorflow as tf
-import numpy as np
 import base64
-from PIL import Image
-from io import BytesIO
+import json
+from contextlib import contextmanager
+import mimetypes
+import re
 from zoneinfo import ZoneInfo
 import csv
 
 # Importações de terceiros
 from django.conf import settings
 from django.contrib.auth import authenticate
-from django.db import transaction
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import connection, transaction
 from django.db.models import (
     Case,
     CharField,
     Count,
     F,
-    Prefetch,
     Q,
     Value,
     When,
     Count, 
     Avg,
-    DecimalField
+    DecimalField,
+    Exists,
+    OuterRef,
+    Subquery,
 )
-from django.db.models.functions import ExtractYear, Now
+from django.db.models.functions import Coalesce, ExtractYear, Now
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse, Http404, HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.http import http_date, parse_etags
 from django.utils.timezone import make_aware
+from django.views.static import was_modified_since
 
 from django_filters import rest_framework as filters
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import (
     generics,
+    mixins,
     serializers,
     status,
     viewsets,
@@ -47,6 +53,7 @@ from rest_framework import (
 )
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
@@ -55,14 +62,13 @@ from rest_framework_simplejwt.tokens import RefreshToken
 # Importações locais
 from .models import (
     Candidato,
-    Cidade,
     Curso,
     CursoPolo,
     Endereco,
+    Exportacao,
     HistoricoEducacional,
     Inscricao,
     InscricaoLog,
-    Pais,
     Polo,
     Tela,
     UsuarioAdmin,
@@ -73,6 +79,8 @@ from .serializers import (
     CandidatoSerializer,
     CidadeSerializer,
     CursoSerializer,
+    DocumentosInscricaoSerializer,
+    ExportacaoSerializer,
     HistoricoEducacionalSerializer,
     InscricaoLogSerializer,
     InscricaoSerializer,
@@ -92,26 +100,156 @@ from .utils import (
     enviar_email_rejeicao,
 )
 
-model_path_rg = os.path.join(settings.BASE_DIR, 'models', 'modelo_final_rg.h5')
-modelo_carregado_rg = tf.keras.models.load_model(model_path_rg)
+from . import catalogo, exportacao, referencias
+from .classificadores import metricas as metricas_classificadores, validar_documento
+from .exportacao import EcoCSV, linhas_inscricoes
+from .filtros import InscricaoFilter, inscricoes_listagem
+from .imagens import VARIANTE_REVISAO, nome_variante, remover_anexos_substituidos
+from .leituras import detalhe_inscricao, metricas_portal, resumo_candidato_cacheado
+from .paginacao import PaginacaoCursorInscricoes
 
-model_path_cpf = os.path.join(settings.BASE_DIR, 'models', 'modelo_final_cpf.h5')
-modelo_carregado_cpf = tf.keras.models.load_model(model_path_cpf)
+# Anexos do candidato que podem ser enviados como arquivos no modo multipart/form-data
+ANEXOS_CANDIDATO = ('anexo_cpf', 'anexo_rg', 'anexo_historico_escolar')
 
-def validate_image(image, model):
-    img_array = tf.keras.utils.img_to_array(image)
-    img_array = tf.image.resize(img_array, (224, 224))
-    img_array = np.expand_dims(img_array, axis=0)
-    img_array = img_array / 255.0
-    
-    prediction = model.predict(img_array)
-    return prediction[0][0] > 0.5
+
+class DadosInscricaoMixin:
+    """
+    Aceita o corpo da inscrição em JSON (anexos em base64) ou em multipart/form-data, com o
+    mesmo JSON no campo `dados` e os anexos como arquivos, gravados direto em disco.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Sem o MemoryFileUploadHandler os anexos nunca ficam inteiros em memória
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_dados(self):
+        if not hasattr(self, '_dados'):
+            self._dados = self._extrair_dados()
+        return self._dados
+
+    def _extrair_dados(self):
+        request = self.request
+        if not request.content_type.startswith('multipart/form-data'):
+            return request.data
+
+        try:
+            dados = json.loads(request.data.get('dados') or '{}')
+        except ValueError:
+            raise serializers.ValidationError({"error": "O campo 'dados' deve conter um JSON válido."})
+
+        candidato_data = dados.get('candidato') or {}
+        for campo in ANEXOS_CANDIDATO:
+            arquivo = request.FILES.get(campo)
+            if arquivo:
+                candidato_data[campo] = arquivo
+        dados['candidato'] = candidato_data
+        return dados
+
+
+class CacheCatalogoMixin:
+    """
+    Cacheia a resposta JSON dos GETs públicos do catálogo por rota e parâmetros normalizados,
+    responde 304 quando o ETag do cliente confere e envia Cache-Control para proxies/CDN.
+    A invalidação acontece nas escritas de cursos, polos e cidades (ver api/catalogo.py).
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not settings.CATALOGO_CACHE:
+            return self.listar(request, *args, **kwargs)
+
+        chave = catalogo.chave(request.path, request.query_params)
+        entrada = catalogo.obter(chave)
+        if entrada is None:
+            response = self.listar(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entrada = catalogo.guardar(chave, JSONRenderer().render(response.data), self.get_cache_timeout(response.data))
+
+        conteudo, etag, _ = entrada
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            catalogo.registrar_nao_modificado()
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(conteudo, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={catalogo.max_age(entrada)}'
+        return response
+
+    def listar(self, request, *args, **kwargs):
+        # Gera a resposta sem cache; views com handler próprio sobrescrevem este método em vez de get()
+        return super().get(request, *args, **kwargs)
+
+    def get_cache_timeout(self, data):
+        # Tempo (s) que a resposta fica no cache do servidor
+        return settings.CATALOGO_CACHE_TTL
+
+
+@contextmanager
+def bloqueio_cpf(cpf):
+    """
+    Lock nomeado do MySQL (GET_LOCK) por CPF, mantido enquanto o bloco executa.
+    Em outros bancos (ex.: SQLite em desenvolvimento) não bloqueia nada.
+    """
+    if connection.vendor != 'mysql':
+        yield
+        return
+
+    # Nomes de lock do MySQL têm no máximo 64 caracteres
+    nome = 'inscricao_cpf_' + hashlib.sha1(str(cpf).encode()).hexdigest()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT GET_LOCK(%s, %s)', [nome, settings.INSCRICAO_LOCK_TIMEOUT])
+        (obtido,) = cursor.fetchone()
+    if obtido != 1:
+        raise serializers.ValidationError(
+            {"error": "Outra inscrição para este CPF está em andamento. Tente novamente."}
+        )
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT RELEASE_LOCK(%s)', [nome])
+
+
+def _intervalo_bytes(range_header, tamanho):
+    """
+    Interpreta um cabeçalho `Range: bytes=inicio-fim` de intervalo único.
+    Retorna (inicio, fim) inclusivo, None se o cabeçalho for ignorável ou False se insatisfazível.
+    """
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', range_header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+
+    inicio, fim = match.groups()
+    if inicio == '':
+        # Sufixo: os últimos N bytes
+        sufixo = int(fim)
+        if sufixo == 0:
+            return False
+        return max(tamanho - sufixo, 0), tamanho - 1
+
+    inicio = int(inicio)
+    fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        return False
+    return inicio, fim
+
+
+def _ler_intervalo(arquivo, inicio, tamanho, bloco=64 * 1024):
+    with arquivo:
+        arquivo.seek(inicio)
+        while tamanho > 0:
+            dados = arquivo.read(min(bloco, tamanho))
+            if not dados:
+                break
+            tamanho -= len(dados)
+            yield dados
 
 
 """
 Retorna uma lista de cursos com filtros opcionais de nome e datas.
 """
-class CursoListView(generics.ListAPIView):
+class CursoListView(CacheCatalogoMixin, generics.ListAPIView):
     queryset = Curso.objects.all()
     serializer_class = CursoSerializer
     pagination_class = None  # Desativa a paginação
@@ -163,26 +301,34 @@ class CursoListView(generics.ListAPIView):
 
         return queryset
 
+    def get_cache_timeout(self, data):
+        timeout = super().get_cache_timeout(data)
+        if not self.request.query_params.get('candidato'):
+            return timeout
+        # A lista do candidato muda sozinha quando um prazo de inscrição vence: o cache não pode passar dele
+        agora = timezone.now()
+        for curso in data:
+            prazo = datetime.fromisoformat(curso['prazo_inscricoes'])
+            if prazo > agora:
+                timeout = min(timeout, int((prazo - agora).total_seconds()) + 1)
+        return timeout
+
     """
     Retorna os polos associados a um curso específico.
     """
-class PolosByCursoView(generics.GenericAPIView):
+class PolosByCursoView(CacheCatalogoMixin, generics.GenericAPIView):
     serializer_class = PoloSerializer
 
     def get_queryset(self):
-        curso_id = self.kwargs['curso_id']
-        try:
-            curso = Curso.objects.get(id=curso_id)
-        except Curso.DoesNotExist:
-            return CursoPolo.objects.none()  # Retorna um queryset vazio se o curso não for encontrado
-        return CursoPolo.objects.filter(curso=curso)
-
-    def get(self, request, curso_id):
-        queryset = self.get_queryset()
-        if not queryset.exists():
+        # Polos do curso com a cidade em um único JOIN (o serializer usa cidade.nome)
+        return Polo.objects.filter(cursopolo__curso_id=self.kwargs['curso_id']).select_related('cidade')
+
+    def listar(self, request, curso_id):
+        # Curso inexistente ou sem polos: a consulta volta vazia
+        polos = list(self.get_queryset())
+        if not polos:
             return Response({"erro": "Curso não encontrado."}, status=status.HTTP_404_NOT_FOUND)
-        
-        polos = [cp.polo for cp in queryset]
+
         serializer = self.get_serializer(polos, many=True)
         return Response(serializer.data)
 
@@ -190,71 +336,72 @@ class PolosByCursoView(generics.GenericAPIView):
     Cria uma nova inscrição para um candidato, incluindo validações e processamento
     de dados como nacionalidade, naturalidade, e polo.
     """
-class PostInscricao(generics.CreateAPIView):
+class PostInscricao(DadosInscricaoMixin, generics.CreateAPIView):
     queryset = Inscricao.objects.all()
     serializer_class = InscricaoSerializer
 
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=self.get_dados())
+        serializer.is_valid(raise_exception=True)
+        # Polo e anexos chegam junto com os dados do candidato, mas são gravados na inscrição
+        documentos = DocumentosInscricaoSerializer(data=self.get_dados().get('candidato') or {})
+        if not documentos.is_valid():
+            raise serializers.ValidationError({"candidato": documentos.errors})
+        # O lock por CPF cobre a transação inteira: inscrições simultâneas do mesmo CPF
+        # só verificam duplicidade e limite depois do commit da anterior
+        with bloqueio_cpf(serializer.validated_data['candidato']['cpf']):
+            self.perform_create(serializer, documentos.validated_data)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
     @transaction.atomic  # Garante que todas as operações aconteçam dentro de uma transação
-    def perform_create(self, serializer):
+    def perform_create(self, serializer, documentos):
         
-        data = self.request.data
+        data = self.get_dados()
         candidato_data = data.get('candidato')
         cpf = candidato_data.get('cpf')
 
-        # Processa a nacionalidade
-        nacionalidade_pk = candidato_data.get('nacionalidade')
-        if nacionalidade_pk:
-            try:
-                pais_instance = Pais.objects.get(pk=nacionalidade_pk)
-                candidato_data['nacionalidade'] = pais_instance
-            except Pais.DoesNotExist:
-                print(f"Pais com esse PK não existe.")
-               
-        # Processa a naturalidade
-        naturalidade_id = candidato_data.get('naturalidade')
-        if naturalidade_id:
-            try:
-                candidato_data['naturalidade'] = Cidade.objects.get(pk=naturalidade_id)
-            except Cidade.DoesNotExist:
-                print(f"Cidade incorreta.")
-                
-        # Processa o polo
-        polo_id = candidato_data.get('polo_ofertante')
-        if polo_id:
-            try:
-                candidato_data['polo_ofertante'] = Polo.objects.get(pk=polo_id)
-            except Polo.DoesNotExist:
-                print(f"Polo incorreto.")
-        
-        # Processa o curso
-        curso_id = data.get('curso')
-        if curso_id:
-            try:
-                curso_instance = Curso.objects.get(pk=curso_id)
-                data['curso'] = curso_instance
-            except Curso.DoesNotExist:
-                print(f"Curso com esse PK não existe.")
-
-        # Verifica se o candidato já está inscrito nesse curso
-        inscricao_existente = Inscricao.objects.filter(
-            candidato__cpf=cpf,
-            curso_id=curso_id
-        ).exists()
+        # Nacionalidade e naturalidade já foram resolvidas na validação do serializer
+        candidato_validado = serializer.validated_data['candidato']
+        for campo in ('nacionalidade', 'naturalidade'):
+            if campo in candidato_validado:
+                candidato_data[campo] = candidato_validado[campo]
 
-        if inscricao_existente:
+        # Busca o curso e verifica inscrição duplicada e limite de cursos em uma única consulta
+        curso_id = data.get('curso')
+        inscricoes_cpf = Inscricao.objects.filter(candidato__cpf=cpf)
+        curso_instance = Curso.objects.filter(pk=curso_id).annotate(
+            ja_inscrito=Exists(inscricoes_cpf.filter(curso_id=OuterRef('pk'))),
+            # COUNT agrupado pelo CPF; sem inscrições a subconsulta não retorna linha
+            total_inscricoes=Coalesce(Subquery(
+                inscricoes_cpf.order_by().values('candidato__cpf').annotate(total=Count('id')).values('total')[:1]
+            ), 0),
+        ).first() if curso_id else None
+
+        if curso_instance is None:
+            raise serializers.ValidationError({"error": "Curso com esse PK não existe."})
+        data['curso'] = curso_instance
+
+        if curso_instance.ja_inscrito:
             raise serializers.ValidationError({"error": "O CPF já está inscrito nesse curso."})
 
-        # Verifica quantas inscrições o candidato já tem
-        inscricoes_count = Inscricao.objects.filter(candidato__cpf=cpf).count()
-        if inscricoes_count >= 3:
+        if curso_instance.total_inscricoes >= 3:
             raise serializers.ValidationError({"error": "CPF já inscrito em 3 ou mais cursos."})
 
         # Filtra apenas os campos válidos para o modelo Candidato
         candidato_fields = {field.name for field in Candidato._meta.get_fields()}
         filtered_candidato_data = {key: value for key, value in candidato_data.items() if key in candidato_fields}
 
-        # Cria o candidato
-        candidato = Candidato.objects.create(**filtered_candidato_data)
+        # Um candidato por CPF: uma nova inscrição atualiza os dados pessoais já cadastrados;
+        # polo e anexos ficam na nova inscrição, sem alterar as anteriores
+        candidato = Candidato.objects.filter(cpf=cpf).first()
+        candidato_existente = candidato is not None
+        if candidato_existente:
+            for campo, valor in filtered_candidato_data.items():
+                setattr(candidato, campo, valor)
+            candidato.save()
+        else:
+            candidato = Candidato.objects.create(**filtered_candidato_data)
 
         # Gera hash
         salt = os.urandom(16).hex()
@@ -266,14 +413,12 @@ class PostInscricao(generics.CreateAPIView):
         cidade_nome = candidato_data.get('cidade')
         cidade_instance = None
         if cidade_nome:
-            try:
-                cidade_instance = Cidade.objects.get(nome=cidade_nome)
-            except Cidade.DoesNotExist:
+            cidade_instance = referencias.cidade_por_nome(cidade_nome)
+            if cidade_instance is None:
                 raise serializers.ValidationError({"error": f"Cidade '{cidade_nome}' não encontrada."})
 
-        # Salva o endereço
-        Endereco.objects.create(
-            candidato=candidato,  # Associa o candidato ao endereço
+        # Salva o endereço (substitui o anterior se o candidato já existia)
+        dados_endereco = dict(
             area=candidato_data.get('area'),
             cep=candidato_data.get('cep'),
             estado=candidato_data.get('estado'),
@@ -284,17 +429,22 @@ class PostInscricao(generics.CreateAPIView):
             numero=candidato_data.get('numero'),
             complemento=candidato_data.get('complemento', '')  # Campo opcional
         )
+        endereco = Endereco.objects.filter(candidato=candidato).order_by('-id').first() if candidato_existente else None
+        if endereco:
+            for campo, valor in dados_endereco.items():
+                setattr(endereco, campo, valor)
+            endereco.save()
+        else:
+            Endereco.objects.create(candidato=candidato, **dados_endereco)  # Associa o candidato ao endereço
 
         historico_data = {
             'tipo_escola': candidato_data.get('tipo_escola'),
             'nivel_escolaridade': candidato_data.get('nivel_escolaridade'),
-            'anexo_historico_escolar': candidato_data.get('anexo_historico_escolar'),
-            'candidato': candidato.id,
-            'cpf' : candidato.cpf
-        } 
+        }  # O candidato é passado direto no save(), sem revalidar a PK
 
-         # Use o serializer de HistoricoEducacional para criar o registro e processar o base64 corretamente
-        historico_serializer = HistoricoEducacionalSerializer(data=historico_data)
+         # Use o serializer de HistoricoEducacional para criar (ou atualizar o mais recente) o registro
+        historico = HistoricoEducacional.objects.filter(candidato=candidato).order_by('-id').first() if candidato_existente else None
+        historico_serializer = HistoricoEducacionalSerializer(instance=historico, data=historico_data)
         if historico_serializer.is_valid():
             historico_serializer.save(candidato=candidato)
         else:
@@ -302,7 +452,7 @@ class PostInscricao(generics.CreateAPIView):
 
 
         # Cria a inscrição para o candidato
-        serializer.save(candidato=candidato, hash=hash_value, status=0, data_criacao=data_criacao, data_modificacao=data_criacao, curso=data['curso'])
+        serializer.save(candidato=candidato, hash=hash_value, status=0, data_criacao=data_criacao, data_modificacao=data_criacao, curso=data['curso'], **documentos)
 
         # Envia e-mail de confirmação
         enviar_email(
@@ -311,34 +461,33 @@ class PostInscricao(generics.CreateAPIView):
 
 
     """
-    Filtra e retorna uma lista de cidades com base no nome fornecido.
+    Autocompletar de cidades pelo nome (sem acentos nem caixa), servido pelo índice em memória
+    do cache de referência. Retorna no máximo `limite` cidades; `uf` (sigla ou id) prioriza um estado.
     """
-class GetSearchCidade(generics.GenericAPIView):
+class GetSearchCidade(CacheCatalogoMixin, generics.GenericAPIView):
     serializer_class = CidadeSerializer
 
-    def get_queryset(self):
-        """
-        Sobrescreve o método para aplicar o filtro baseado no parâmetro 'nome'
-        """
-        nome_cidade = self.request.query_params.get('nome', None)
-        if nome_cidade:
-            # Filtra as cidades pelo nome, usando icontains para busca parcial
-            return Cidade.objects.filter(nome__icontains=nome_cidade)
-        else:
-            # Retorna uma queryset vazia se o parâmetro 'nome' não for fornecido
-            return Cidade.objects.all()
-
-    def get(self, request, *args, **kwargs):
+    def listar(self, request, *args, **kwargs):
         """
         Lida com a requisição GET e retorna os dados das cidades filtradas
         """
-        queryset = self.get_queryset()  # Usa o método get_queryset para obter os resultados filtrados
-        if queryset.exists():
-            serializer = self.get_serializer(queryset, many=True)
+        nome_cidade = request.query_params.get('nome', '')
+
+        try:
+            limite = int(request.query_params.get('limite', settings.CIDADES_BUSCA_LIMITE))
+        except ValueError:
+            return Response({"error": "O parâmetro 'limite' deve ser um número."}, status=status.HTTP_400_BAD_REQUEST)
+        limite = max(1, min(limite, settings.CIDADES_BUSCA_LIMITE_MAXIMO))
+
+        uf = request.query_params.get('uf')
+        estado = (referencias.estado(uf) or referencias.estado_por_uf(uf)) if uf else None
+
+        cidades = referencias.buscar_cidades(nome_cidade, uf=estado.pk if estado else None, limite=limite)
+        if cidades:
+            serializer = self.get_serializer(cidades, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             return Response({"error": "O parâmetro 'nome' é obrigatório ou não foi encontrada nenhuma cidade."}, status=status.HTTP_400_BAD_REQUEST)
-        
 
 
     """
@@ -346,41 +495,10 @@ class GetSearchCidade(generics.GenericAPIView):
     """
 class CandidatoPorHashView(APIView):
     def get(self, request, hash, format=None):
-        # Passo 1: Buscar a inscrição usando a hash
-        inscricao = get_object_or_404(Inscricao, hash=hash)
-
-        # Passo 2: Obter o CPF do candidato vinculado a essa inscrição
-        cpf_candidato = inscricao.candidato.cpf
-
-        # Passo 3: Buscar todos os candidatos que possuem o mesmo CPF
-        candidatos = Candidato.objects.filter(cpf=cpf_candidato)
-
-        # Passo 4: Buscar todas as inscrições de todos esses candidatos
-        # Prefetch as inscrições para evitar consultas extras
-        candidatos_com_inscricoes = candidatos.prefetch_related(
-            Prefetch('inscricao_set', queryset=Inscricao.objects.select_related('curso'))
-        )
-
-        # Serializar os candidatos e suas inscrições
-        candidato_data = []
-        for candidato in candidatos_com_inscricoes:
-            inscricoes = candidato.inscricao_set.all()
-            candidato_data.append({
-                "id": candidato.id,
-                "nome": candidato.nome_completo,
-                "cpf": candidato.cpf,
-                "inscricoes": [
-                    {
-                        "id": inscricao.id,
-                        "curso": inscricao.curso.nome,
-                        "descricao": inscricao.curso.descricao,
-                        "data_inscricao": inscricao.data_criacao,
-                        "status": inscricao.status,
-                        "carga_horaria": inscricao.curso.carga_horaria
-                    }
-                    for inscricao in inscricoes
-                ]
-            })
+        # Resumo do candidato e de todas as suas inscrições, cacheado por hash (api/leituras.py)
+        candidato_data = resumo_candidato_cacheado(hash)
+        if candidato_data is None:
+            raise Http404
 
         return Response(candidato_data, status=status.HTTP_200_OK)
     
@@ -389,124 +507,105 @@ class CandidatoPorHashView(APIView):
     """
 class InscricaoDetailView(APIView):
     def get(self, request, inscricao_id, hash, format=None):
-        # Obtendo a inscrição específica
-        inscricao = get_object_or_404(Inscricao, id=inscricao_id, hash=hash)
-        
-        # Serializando os dados da inscrição para obter a estrutura básica
-        serializer = InscricaoSerializer(inscricao)
-        inscricao_data = serializer.data
-        
-
-        # Obtendo o curso relacionado e adicionando manualmente os dados
-        if inscricao.curso:
-            curso = inscricao.curso
-            inscricao_data['curso'] = {
-                "id": curso.id,
-                "nome": curso.nome,
-                # Inclua outros campos se necessário
-            }
-
-        # Adicionando manualmente o campo 'uf' da nacionalidade do candidato, se disponível
-        candidato_data = inscricao_data.get('candidato', None)
-        if candidato_data:
-            if 'anexo_cpf' in candidato_data and candidato_data['anexo_cpf']:
-                candidato_data['anexo_cpf'] = candidato_data['anexo_cpf'].replace('/media/', '')
-            if 'anexo_rg' in candidato_data and candidato_data['anexo_rg']:
-                candidato_data['anexo_rg'] = candidato_data['anexo_rg'].replace('/media/', '')
-
-        if candidato_data and 'nacionalidade' in candidato_data:
-            nacionalidade_id = candidato_data['nacionalidade']
-            try:
-                # Busca o país com base no ID armazenado em 'nacionalidade'
-                pais = Pais.objects.get(id=nacionalidade_id)
-                candidato_data['nacionalidade'] = pais.sigla
-            except Pais.DoesNotExist:
-                # Se o país não for encontrado, mantém a informação original
-                candidato_data['nacionalidade'] = None
-
-        # Atualizar a naturalidade com nome e outras informações
-        if 'naturalidade' in candidato_data:
-            naturalidade_id = candidato_data['naturalidade']
-            try:
-                cidade = Cidade.objects.get(id=naturalidade_id)
-                candidato_data['naturalidade'] = cidade.nome
-            except Cidade.DoesNotExist:
-                candidato_data['naturalidade'] = None
-
-        # Buscando todos os polos que oferecem o curso relacionado à inscrição
-        curso_id = inscricao_data['curso']['id']
-        polos_curso = CursoPolo.objects.filter(curso_id=curso_id).select_related('polo')
-        polo_options = []
-
-        for curso_polo in polos_curso:
-            polo = curso_polo.polo
-            polo_options.append({
-                "id": polo.id,
-                "label": polo.nome,
-                "selected": True if polo.id == curso_id else False,
-                "logradouro": polo.logradouro or "não definido",
-                "numero": polo.numero or 0,
-                "bairro": polo.bairro or "não definido",
-                "cidade": polo.cidade.id  # Assumindo que cidade tem uma FK para `Cidade`
-            })
-
-        # Adicionando os polos à resposta
-        inscricao_data['polo_options'] = polo_options
-
-        endereco = Endereco.objects.get(candidato_id=candidato_data['id'])
-        candidato_data['endereco'] = {
-                            "logradouro": endereco.logradouro,
-                            "numero": endereco.numero,
-                            "bairro": endereco.bairro,
-                            "cidade": endereco.cidade,  
-                            "estado": endereco.estado,
-                            "cep": endereco.cep,
-                            "area": endereco.area,
-                            "complemento": endereco.complemento
-                        }
-        
-        try:
-            historico = HistoricoEducacional.objects.get(candidato=candidato_data['id'])
-            
-            # Adicionando os detalhes do histórico educacional
-            candidato_data['historico_educacional'] = {
-                "tipo_escola": historico.tipo_escola,
-                "nivel_escolaridade": historico.nivel_escolaridade,
-                "anexo_historico_escolar": historico.anexo_historico_escolar.url.replace('/media/', '') if historico.anexo_historico_escolar else None
-            }
-        except HistoricoEducacional.DoesNotExist:
-            candidato_data['historico_educacional'] = None
-
+        # Inscrição, candidato, curso, endereço e histórico montados de uma vez (api/leituras.py)
+        inscricao_data = detalhe_inscricao(inscricao_id, hash)
+        if inscricao_data is None:
+            raise Http404
 
         return Response(inscricao_data, status=status.HTTP_200_OK)
     
 
     """
     Busca e retorna um arquivo de mídia (imagem) com base no nome do arquivo.
+    Os nomes são hashes únicos, então servem de ETag forte e permitem cache de longa duração;
+    suporta 304 condicional, Range e offload via X-Accel-Redirect/X-Sendfile (MEDIA_ACCEL).
     """
 class MediaImageView(APIView):
     def get(self, request, filename, format=None):
         # Cria o caminho completo para o arquivo de mídia
         file_path = os.path.join(settings.MEDIA_ROOT, filename)
 
-        # Verifica se o arquivo existe e retorna a resposta
-        if os.path.exists(file_path):
-            try:
-                return FileResponse(open(file_path, 'rb'), content_type='image/jpeg')
-            except IOError:
-                raise Http404
-        else:
+        # ?variante=revisao serve a miniatura gerada no upload, quando existir
+        variante = request.query_params.get('variante')
+        if variante == VARIANTE_REVISAO:
+            file_path_variante = os.path.join(settings.MEDIA_ROOT, nome_variante(filename, variante))
+            if os.path.exists(file_path_variante):
+                file_path = file_path_variante
+
+        # Arquivo removido (ex.: anexo substituído) responde 404 mesmo a um ETag conhecido pelo cliente
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+        if not os.path.isfile(file_path):
             return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # O conteúdo nunca muda para um mesmo nome: o nome do arquivo é o ETag
+        nome = os.path.basename(file_path)
+        etag = f'"{nome}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return self._cabecalhos_cache(HttpResponseNotModified(), etag, stat.st_mtime)
+
+        if not was_modified_since(request.headers.get('If-Modified-Since'), int(stat.st_mtime)):
+            return self._cabecalhos_cache(HttpResponseNotModified(), etag, stat.st_mtime)
+
+        content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+
+        if settings.MEDIA_ACCEL == 'nginx':
+            # O nginx lê e envia o arquivo (incluindo Range) a partir de uma location `internal`
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + os.path.relpath(file_path, settings.MEDIA_ROOT)
+            return self._cabecalhos_cache(response, etag, stat.st_mtime)
+        if settings.MEDIA_ACCEL == 'sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = file_path
+            return self._cabecalhos_cache(response, etag, stat.st_mtime)
+
+        intervalo = None
+        range_header = request.headers.get('Range')
+        if range_header and request.headers.get('If-Range', etag) in (etag, http_date(stat.st_mtime)):
+            intervalo = _intervalo_bytes(range_header, stat.st_size)
+
+        if intervalo is False:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+        try:
+            arquivo = open(file_path, 'rb')
+        except IOError:
+            raise Http404
+
+        if intervalo:
+            inicio, fim = intervalo
+            response = StreamingHttpResponse(
+                _ler_intervalo(arquivo, inicio, fim - inicio + 1),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type=content_type,
+            )
+            response['Content-Length'] = fim - inicio + 1
+            response['Content-Range'] = f'bytes {inicio}-{fim}/{stat.st_size}'
+        else:
+            response = FileResponse(arquivo, content_type=content_type)
+        return self._cabecalhos_cache(response, etag, stat.st_mtime)
+
+    def _cabecalhos_cache(self, response, etag, mtime=None):
+        response['ETag'] = etag
+        response['Cache-Control'] = f'private, max-age={settings.MEDIA_CACHE_MAX_AGE}, immutable'
+        response['Accept-Ranges'] = 'bytes'
+        if mtime is not None:
+            response['Last-Modified'] = http_date(mtime)
+        return response
         
 
     """
     Atualiza os dados de uma inscrição e do candidato, incluindo dados de endereço e histórico educacional.
     """
-class UpdateInscricao(APIView):
+class UpdateInscricao(DadosInscricaoMixin, APIView):
     @transaction.atomic  # Garante que todas as operações aconteçam dentro de uma transação
     def put(self, request, format=None):
-        # Obtendo o ID da inscrição do corpo da requisição
-        data = request.data
+        # Obtendo o ID da inscrição do corpo da requisição (JSON ou multipart)
+        data = self.get_dados()
         inscricao_id = data.get('inscricao_id')
 
         if not inscricao_id:
@@ -521,10 +620,10 @@ class UpdateInscricao(APIView):
         # Processa a naturalidade
         naturalidade_nome = candidato_data.get('naturalidade_nome')
         if naturalidade_nome:
-            try:
-                candidato_data['naturalidade'] = Cidade.objects.get(nome=naturalidade_nome).id
-            except Cidade.DoesNotExist:
+            naturalidade = referencias.cidade_por_nome(naturalidade_nome)
+            if naturalidade is None:
                 raise serializers.ValidationError({"error": "Cidade incorreta."})
+            candidato_data['naturalidade'] = naturalidade.id
 
         # Processa o curso
         curso_id = data.get('curso')
@@ -545,16 +644,23 @@ class UpdateInscricao(APIView):
             raise serializers.ValidationError(candidato_serializer.errors)
         candidato_serializer.save()
 
+        # Polo e anexos enviados substituem apenas os desta inscrição
+        documentos = DocumentosInscricaoSerializer(inscricao, data=candidato_data, partial=True)
+        if not documentos.is_valid():
+            raise serializers.ValidationError(documentos.errors)
+        remover_anexos_substituidos(inscricao, documentos.validated_data)
+        for campo, valor in documentos.validated_data.items():
+            setattr(inscricao, campo, valor)
+
         # Atualiza o Endereço
         cidade_nome = candidato_data.get('cidade')
         cidade_instance = None
         if cidade_nome:
-            try:
-                cidade_instance = Cidade.objects.get(nome=cidade_nome)
-            except Cidade.DoesNotExist:
+            cidade_instance = referencias.cidade_por_nome(cidade_nome)
+            if cidade_instance is None:
                 raise serializers.ValidationError({"error": f"Cidade '{cidade_nome}' não encontrada."})
 
-        endereco = Endereco.objects.filter(candidato=inscricao.candidato).first()
+        endereco = Endereco.objects.filter(candidato=inscricao.candidato).order_by('-id').first()
         if endereco:
             endereco.area = candidato_data.get('area')
             endereco.cep = candidato_data.get('cep')
@@ -570,10 +676,9 @@ class UpdateInscricao(APIView):
         historico_data = {
             'tipo_escola': candidato_data.get('tipo_escola'),
             'nivel_escolaridade': candidato_data.get('nivel_escolaridade'),
-            'anexo_historico_escolar': candidato_data.get('anexo_historico_escolar'),
         }
 
-        historico = HistoricoEducacional.objects.filter(candidato=inscricao.candidato).first()
+        historico = HistoricoEducacional.objects.filter(candidato=inscricao.candidato).order_by('-id').first()
 
         if historico:
             # Atualizar um histórico existente
@@ -725,13 +830,18 @@ class GraficosView(APIView):
         endereco_queryset = Endereco.objects.all()
         historico_queryset = HistoricoEducacional.objects.all()
 
+        inscricoes_queryset = Inscricao.objects.all()
+
         if id_polo:
-            base_queryset = base_queryset.filter(polo_ofertante_id=id_polo)
-            endereco_queryset = endereco_queryset.filter(candidato__polo_ofertante_id=id_polo)
-            historico_queryset = historico_queryset.filter(candidato__polo_ofertante_id=id_polo)
+            # O polo é de cada inscrição: candidatos com alguma inscrição no polo
+            inscricoes_queryset = inscricoes_queryset.filter(polo_ofertante_id=id_polo)
+            candidatos_do_polo = inscricoes_queryset.values('candidato_id')
+            base_queryset = base_queryset.filter(id__in=candidatos_do_polo)
+            endereco_queryset = endereco_queryset.filter(candidato_id__in=candidatos_do_polo)
+            historico_queryset = historico_queryset.filter(candidato_id__in=candidatos_do_polo)
 
         # Inscrições por Polo Ofertante
-        inscricoes_por_polo = base_queryset.values('polo_ofertante__nome').annotate(
+        inscricoes_por_polo = inscricoes_queryset.values('polo_ofertante__nome').annotate(
             total=Count('id')
         ).order_by('polo_ofertante__nome')
         
@@ -860,8 +970,8 @@ class CursoCreateView(generics.CreateAPIView):
     """
     Retorna uma lista de todos os polos.
     """
-class PoloListView(generics.ListAPIView):
-    queryset = Polo.objects.all()
+class PoloListView(CacheCatalogoMixin, generics.ListAPIView):
+    queryset = Polo.objects.select_related('cidade')
     serializer_class = PoloSerializer
     pagination_class = None  # Desativa a paginação
 
@@ -1082,77 +1192,23 @@ class UsuarioAdminViewSet(viewsets.ModelViewSet):
         
         return Response(data)
     
-    """
-    Filtros para buscar inscrições com base no candidato, curso, polo e data.
-    """
-class InscricaoFilter(filters.FilterSet):
-    nome = filters.CharFilter(field_name='candidato__nome_completo', lookup_expr='icontains')
-    curso = filters.NumberFilter(field_name='curso__id')
-    polo = filters.NumberFilter(field_name='candidato__polo_ofertante__id')
-    data_inicial = filters.DateFilter(field_name='data_criacao', lookup_expr='gte')
-    data_final = filters.DateFilter(field_name='data_criacao', lookup_expr='lte')
-    
-    class Meta:
-        model = Inscricao
-        fields = ['status']
-
-
     """
     Permite gerenciar inscrições, incluindo listagem, visualização detalhada, e atualização.
     """
 class InscricaoViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
-    queryset = Inscricao.objects.all().select_related(
-        'candidato', 'curso', 'candidato__polo_ofertante',
-        'candidato__nacionalidade', 'candidato__naturalidade'
-    ).prefetch_related(
-        'candidato__endereco_set', 'candidato__historicoeducacional_set'
-    ).annotate(
-    genero_descricao=Case(
-        When(candidato__genero=0, then=Value('Não informado')),
-        When(candidato__genero=1, then=Value('Masculino')),
-        When(candidato__genero=2, then=Value('Feminino')),
-        When(candidato__genero=3, then=Value('Outro')),
-        default=Value('Desconhecido'),
-        output_field=CharField(),
-        )
-    ).annotate(
-    estado_civil=Case(
-        When(candidato__estado_civil=0, then=Value('Solteiro(a)')),
-        When(candidato__estado_civil=1, then=Value('Casado(a)')),
-        When(candidato__estado_civil=2, then=Value('Divorciado(a)')),
-        When(candidato__estado_civil=3, then=Value('Viúvo(a)')),
-        output_field=CharField(),
-        )
-    ).annotate(
-    renda_percapita=Case(
-            When(candidato__renda_per_capita=1, then=Value('Até 0,5 salário mínimo')),
-            When(candidato__renda_per_capita=2, then=Value('0,5 a 1,0 salário mínimo')),
-            When(candidato__renda_per_capita=3, then=Value('1,0 a 1,5 salário mínimo')),
-            When(candidato__renda_per_capita=4, then=Value('1,5 a 2,5 salários mínimos')),
-            When(candidato__renda_per_capita=5, then=Value('2,5 a 3,5 salários mínimos')),
-            When(candidato__renda_per_capita=6, then=Value('Acima de 3,5 salários mínimos')),
-            When(candidato__renda_per_capita=0, then=Value('Prefiro não informar')),
-            output_field=CharField(),
-        )
-    ).annotate(
-    escolaridade=Case(
-        When(candidato__historicoeducacional__nivel_escolaridade=0, then=Value('Fundamental I - Completo (1º a 5º)')),
-        When(candidato__historicoeducacional__nivel_escolaridade=1, then=Value('Fundamental I - Incompleto (1º a 5º)')),
-        When(candidato__historicoeducacional__nivel_escolaridade=2, then=Value('Fundamental II - Completo (6º a 9º)')),
-        When(candidato__historicoeducacional__nivel_escolaridade=3, then=Value('Fundamental II - Incompleto (6º a 9º)')),
-        When(candidato__historicoeducacional__nivel_escolaridade=4, then=Value('Médio - Completo')),
-        When(candidato__historicoeducacional__nivel_escolaridade=5, then=Value('Médio - Incompleto')),
-        When(candidato__historicoeducacional__nivel_escolaridade=6, then=Value('Superior - Completo')),
-        When(candidato__historicoeducacional__nivel_escolaridade=7, then=Value('Superior - Incompleto')),
-        When(candidato__historicoeducacional__nivel_escolaridade=8, then=Value('Pós-graduação - Completo')),
-        When(candidato__historicoeducacional__nivel_escolaridade=9, then=Value('Pós-graduação - Incompleto')),
-        output_field=CharField(),
-        )
-    )
+    # Queryset e filtros compartilhados com as exportações em segundo plano (api/filtros.py)
+    queryset = inscricoes_listagem()
     serializer_class = InscricaoSerializer
     filterset_class = InscricaoFilter
 
+    @property
+    def paginator(self):
+        # ?paginacao=cursor troca a paginação por número de página pela paginação por cursor
+        if not hasattr(self, '_paginator') and self.request.query_params.get('paginacao') == 'cursor':
+            self._paginator = PaginacaoCursorInscricoes()
+        return super().paginator
+
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
 
@@ -1172,92 +1228,26 @@ class InscricaoViewSet(viewsets.ModelViewSet):
         return Response(response_data)
 
     def generate_csv_response(self, queryset):
-        data = self._prepare_data_for_csv(queryset)
-
-        response = HttpResponse(content_type='text/csv')
+        # As linhas são geradas e enviadas uma a uma, sem montar o arquivo em memória
+        response = StreamingHttpResponse(self._stream_csv(queryset), content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename="inscricoes.csv"'
-
-        writer = csv.writer(response)
-
-        if data:
-            header = data[0].keys()
-            writer.writerow(header)
-
-            for item in data:
-                writer.writerow([item.get(key, '') for key in header])
-
         return response
 
-    def _prepare_data_for_csv(self, queryset):
-        result = []
-        for instance in queryset:
-            candidato = instance.candidato
-            genero_descricao = getattr(instance, 'genero_descricao', 'Não informado')
-            estado_civil = getattr(instance, 'estado_civil', 'Não informado')
-            renda_percapita = getattr(instance, 'renda_percapita', 'Não informado')
-            endereco = candidato.endereco_set.first() if hasattr(candidato, 'endereco_set') and candidato.endereco_set.exists() else None
-            historico = candidato.historicoeducacional_set.first() if hasattr(candidato, 'historicoeducacional_set') and candidato.historicoeducacional_set.exists() else None
-            polo = getattr(candidato, 'polo_ofertante', None)
-            nacionalidade = getattr(candidato, 'nacionalidade', None)
-            naturalidade = getattr(candidato, 'naturalidade', None)
-            curso = instance.curso
+    def _stream_csv(self, queryset):
+        writer = csv.writer(EcoCSV())
+        header = None
+        for item in self._prepare_data_for_csv(queryset):
+            if header is None:
+                header = item.keys()
+                yield writer.writerow(header)
+            yield writer.writerow([item.get(key, '') for key in header])
 
-            cidade_nome = None
-            if endereco and endereco.cidade:
-                if isinstance(endereco.cidade, str):
-                    cidade_nome = endereco.cidade 
-                elif hasattr(endereco.cidade, 'nome'):
-                    cidade_nome = endereco.cidade.nome  
-
-            estado_nome = None
-            if endereco and hasattr(endereco.cidade, 'estado'):
-                estado = endereco.cidade.estado
-                estado_nome = estado.nome if hasattr(estado, 'nome') else None
-            
-            item = {
-                # Dados pessoais
-                'nome_completo': candidato.nome_completo,
-                'nome_social': candidato.nome_social,
-                'nome_mae': candidato.nome_mae,
-                'cpf': candidato.cpf,
-                'registro_geral': candidato.registro_geral,
-                'data_nascimento': candidato.data_nascimento,
-                'genero': genero_descricao,
-                'telefone': candidato.telefone_celular,
-                'estado_civil': estado_civil,
-                'portador_necessidades_especiais': 'Sim' if candidato.portador_necessidades_especiais else 'Não',
-                'necessidade_especial': candidato.necessidade_especial if  candidato.necessidade_especial else 'Nenhuma',
-                'renda_percapita': renda_percapita,
-                'nacionalidade': nacionalidade.nome,
-                'naturalidade': naturalidade.nome,
-
-                # Endereço
-                'cep': endereco.cep if endereco else "Não informado",
-                'cidade': cidade_nome if cidade_nome else "Não informado",
-                'estado': estado_nome if estado_nome else "Não informado",
-                'bairro': endereco.bairro if endereco else "Não informado",
-                'logradouro': endereco.logradouro if endereco else "Não informado",
-                'numero': endereco.numero if endereco else "Não informado",
-                'complemento': endereco.complemento if endereco else "Não informado",
-
-                # Histórico educacional
-                'tipo_escola': historico.tipo_escola if historico else "Não informado",
-                'nivel_escolaridade': getattr(instance, 'escolaridade', 'Não informado'),
-
-                # Curso
-                'curso': curso.nome if curso else None,
-                'prazo_inscricoes': curso.prazo_inscricoes if curso else None,
-
-                # Polo
-                'polo': polo.nome if polo else None,
-            }
-            result.append(item)
-        return result
+    def _prepare_data_for_csv(self, queryset):
+        return linhas_inscricoes(queryset)
 
     def _add_polo_and_curso_data(self, serialized_data, instances):
         for item, instance in zip(serialized_data, instances):
-            candidato = instance.candidato
-            polo = getattr(candidato, 'polo_ofertante', None)
+            polo = referencias.polo(instance.polo_ofertante_id)
             if polo:
                 item['polo'] = {
                     'id': polo.id,
@@ -1276,6 +1266,62 @@ class InscricaoViewSet(viewsets.ModelViewSet):
                 item['curso'] = None
         return serialized_data
 
+    """
+    Exportações das inscrições em segundo plano (worker: manage.py processar_exportacoes).
+    POST com os mesmos filtros da listagem (InscricaoFilter) na query string e `formato`
+    (csv, xlsx ou parquet); GET /<id>/ acompanha o progresso e /<id>/download/ entrega o arquivo.
+    """
+class ExportacaoViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    permission_classes = [IsAuthenticated]
+    queryset = Exportacao.objects.all()
+    serializer_class = ExportacaoSerializer
+
+    def create(self, request, *args, **kwargs):
+        formato = request.data.get('formato') or request.query_params.get('formato', 'csv')
+        if formato not in dict(Exportacao.FORMATO_CHOICES):
+            return Response({'erro': 'Formato inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not exportacao.formato_disponivel(formato):
+            return Response({'erro': f'Formato {formato} indisponível neste servidor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        filtros = {
+            campo: request.query_params[campo]
+            for campo in InscricaoFilter.base_filters
+            if request.query_params.get(campo) not in (None, '')
+        }
+        filtro = InscricaoFilter(filtros, queryset=Inscricao.objects.none())
+        if not filtro.is_valid():
+            return Response(filtro.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        pedido, criada = exportacao.solicitar(formato, filtros, usuario=request.user)
+        serializer = self.get_serializer(pedido)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED if criada else status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        pedido = self.get_object()
+        if pedido.status != 2:
+            return Response({'erro': 'Exportação não concluída.', 'status': pedido.get_status_display()}, status=status.HTTP_409_CONFLICT)
+
+        caminho = os.path.join(settings.MEDIA_ROOT, pedido.arquivo.name)
+        if not os.path.isfile(caminho):
+            return Response({'erro': 'Arquivo não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+
+        nome = os.path.basename(caminho)
+        content_type = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+        if settings.MEDIA_ACCEL in ('nginx', 'sendfile'):
+            response = HttpResponse(content_type=content_type)
+            if settings.MEDIA_ACCEL == 'nginx':
+                response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + pedido.arquivo.name
+            else:
+                response['X-Sendfile'] = caminho
+            response['Content-Disposition'] = f'attachment; filename="{nome}"'
+            return response
+        return FileResponse(open(caminho, 'rb'), as_attachment=True, filename=nome, content_type=content_type)
+
+    @action(detail=False, methods=['get'])
+    def metricas(self, request):
+        return Response(exportacao.metricas(), status=status.HTTP_200_OK)
+
     """
     Aprova uma inscrição, atualizando seu status e registrando um log.
     """
@@ -1378,10 +1424,9 @@ class ValidateRGView(APIView):
             header, data = base64_image.split(';base64,')
             img_format = header.split('/')[-1]
             img_data = base64.b64decode(data)
-            image = Image.open(BytesIO(img_data)).convert('RGB')
-            
-            # Validar a imagem
-            is_rg = validate_image(image, modelo_carregado_rg)
+
+            # Validar a imagem (resultados repetidos vêm do cache de predições)
+            is_rg = validar_documento(img_data, 'rg')
             
             return Response({'is_rg': is_rg}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -1399,15 +1444,41 @@ class ValidateCPFView(APIView):
             header, data = base64_image.split(';base64,')
             img_format = header.split('/')[-1]
             img_data = base64.b64decode(data)
-            image = Image.open(BytesIO(img_data)).convert('RGB')
-            
-            # Validar a imagem
-            is_cpf = validate_image(image, modelo_carregado_cpf)
+
+            # Validar a imagem (resultados repetidos vêm do cache de predições)
+            is_cpf = validar_documento(img_data, 'cpf')
             
             return Response({'is_cpf': is_cpf}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+    """
+    Retorna as métricas dos micro-lotes de inferência dos classificadores de RG e CPF.
+    """
+class ClassificadoresMetricasView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(metricas_classificadores(), status=status.HTTP_200_OK)
+
+    """
+    Retorna a taxa de acerto do cache das respostas públicas do catálogo neste processo.
+    """
+class CatalogoMetricasView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(catalogo.metricas(), status=status.HTTP_200_OK)
+
+    """
+    Retorna a taxa de acerto do cache do portal do candidato (CandidatoPorHashView) neste processo.
+    """
+class PortalMetricasView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(metricas_portal(), status=status.HTTP_200_OK)
+
 class PoloFilter(filters.FilterSet):
     nome = filters.CharFilter(lookup_expr='icontains')
     cidade = filters.NumberFilter()
@@ -1443,7 +1514,7 @@ class EstatisticasViewSet(viewsets.ViewSet):
         
         # Filtrar por polo se fornecido
         if polo_id:
-            queryset = queryset.filter(candidato__polo_ofertante=polo_id)
+            queryset = queryset.filter(polo_ofertante=polo_id)
         
         # Calcular estatísticas
         hoje = date.today()
@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.CLASSIFICADORES_PRELOAD:
+    from api.classificadores import carregar_modelos
+
+    carregar_modelos()
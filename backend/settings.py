@@ -63,13 +63,23 @@ CORS_ALLOW_ALL_ORIGINS = True  # Permitir todas as origens, ou especifique as pe
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Entrega de mídia pelo proxy: '' (Django serve o arquivo), 'nginx' (X-Accel-Redirect) ou 'sendfile' (X-Sendfile)
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', str(60 * 60 * 24 * 365)))
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Cache de templates compilados explícito, inclusive com DEBUG=True
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -160,6 +170,94 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 
+# Fila de e-mails (tabela email_fila), enviada pelo comando `manage.py enviar_emails`
+EMAIL_FILA_MAX_TENTATIVAS = int(os.getenv('EMAIL_FILA_MAX_TENTATIVAS', '8'))
+EMAIL_FILA_BACKOFF_SEGUNDOS = int(os.getenv('EMAIL_FILA_BACKOFF_SEGUNDOS', '60'))
+EMAIL_FILA_BACKOFF_MAXIMO_SEGUNDOS = int(os.getenv('EMAIL_FILA_BACKOFF_MAXIMO_SEGUNDOS', '3600'))
+EMAIL_FILA_RESERVA_SEGUNDOS = int(os.getenv('EMAIL_FILA_RESERVA_SEGUNDOS', '300'))
+# Conexão SMTP persistente do worker: mensagens por conexão e ociosidade antes de checar com NOOP
+EMAIL_CONEXAO_MAX_MENSAGENS = int(os.getenv('EMAIL_CONEXAO_MAX_MENSAGENS', '100'))
+EMAIL_CONEXAO_OCIOSA_SEGUNDOS = int(os.getenv('EMAIL_CONEXAO_OCIOSA_SEGUNDOS', '30'))
+
+# Classificadores de documentos (RG/CPF): carregados sob demanda ou na subida do worker
+CLASSIFICADORES_PRELOAD = os.getenv('CLASSIFICADORES_PRELOAD', 'False') == 'True'
+# Runtime de inferência: 'keras' (models/*.h5) ou 'tflite' (models/*.tflite, gerados por manage.py exportar_classificadores)
+CLASSIFICADORES_RUNTIME = os.getenv('CLASSIFICADORES_RUNTIME', 'keras')
+# Micro-lotes de inferência: tamanho máximo do lote e espera máxima (ms) pela próxima imagem
+CLASSIFICADORES_LOTE_MAXIMO = int(os.getenv('CLASSIFICADORES_LOTE_MAXIMO', '16'))
+CLASSIFICADORES_ESPERA_MAXIMA_MS = float(os.getenv('CLASSIFICADORES_ESPERA_MAXIMA_MS', '5'))
+# Socket Unix do serviço de classificadores (manage.py servidor_classificadores); vazio = inferência no próprio worker
+CLASSIFICADORES_SOCKET = os.getenv('CLASSIFICADORES_SOCKET', '')
+CLASSIFICADORES_TIMEOUT = float(os.getenv('CLASSIFICADORES_TIMEOUT', '30'))
+# Cache de predições por hash da imagem: 'memoria' (LRU local), 'django' (CACHES[CLASSIFICADORES_CACHE_ALIAS]) ou vazio para desativar
+CLASSIFICADORES_CACHE = os.getenv('CLASSIFICADORES_CACHE', 'memoria')
+CLASSIFICADORES_CACHE_ALIAS = os.getenv('CLASSIFICADORES_CACHE_ALIAS', 'default')
+CLASSIFICADORES_CACHE_TAMANHO = int(os.getenv('CLASSIFICADORES_CACHE_TAMANHO', '1024'))
+CLASSIFICADORES_CACHE_TTL = int(os.getenv('CLASSIFICADORES_CACHE_TTL', '86400'))
+# Intervalo (s) entre consultas à data de modificação dos modelos: arquivo trocado = modelo recarregado e cache renovado
+CLASSIFICADORES_VERSAO_VERIFICAR_SEGUNDOS = float(os.getenv('CLASSIFICADORES_VERSAO_VERIFICAR_SEGUNDOS', '30'))
+
+# Cache compartilhado (Redis) entre web, cron e workers: as invalidações dos caches de referência, catálogo
+# e portal só chegam a todos os processos por ele. Sem REDIS_URL cada processo tem o próprio cache em memória
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHE_COMPARTILHADO = bool(REDIS_URL)
+if CACHE_COMPARTILHADO:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'fic'),
+        }
+    }
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Cache local dos dados de referência (países, estados, cidades e polos); a versão fica em CACHES[REFERENCIAS_CACHE_ALIAS].
+# Sem cache compartilhado uma alteração feita em outro processo só aparece quando o retrato expira, então o TTL cai para 60 s
+REFERENCIAS_CACHE_ALIAS = os.getenv('REFERENCIAS_CACHE_ALIAS', 'default')
+REFERENCIAS_VERIFICAR_SEGUNDOS = float(os.getenv('REFERENCIAS_VERIFICAR_SEGUNDOS', '5'))
+REFERENCIAS_TTL = int(os.getenv('REFERENCIAS_TTL', '3600' if CACHE_COMPARTILHADO else '60'))
+
+# Cache das respostas públicas do catálogo (cursos, polos e cidades): TTL no servidor e max-age enviado a proxies/CDN.
+# Ligado por padrão só com cache compartilhado: a invalidação de uma escrita precisa chegar a todos os processos
+CATALOGO_CACHE = os.getenv('CATALOGO_CACHE', str(CACHE_COMPARTILHADO)) == 'True'
+CATALOGO_CACHE_ALIAS = os.getenv('CATALOGO_CACHE_ALIAS', 'default')
+CATALOGO_CACHE_TTL = int(os.getenv('CATALOGO_CACHE_TTL', '300'))
+CATALOGO_CACHE_MAX_AGE = int(os.getenv('CATALOGO_CACHE_MAX_AGE', '60'))
+
+# Cache do portal do candidato (CandidatoPorHashView), por hash; invalidado quando as inscrições ou os cursos mudam.
+# Ligado por padrão só com cache compartilhado: o cron (update_expired_inscricoes) invalida de outro processo
+PORTAL_CACHE = os.getenv('PORTAL_CACHE', str(CACHE_COMPARTILHADO)) == 'True'
+PORTAL_CACHE_ALIAS = os.getenv('PORTAL_CACHE_ALIAS', 'default')
+PORTAL_CACHE_TTL = int(os.getenv('PORTAL_CACHE_TTL', '600'))
+
+# Exportação de inscrições: linhas lidas do banco por lote
+EXPORTACAO_LOTE = int(os.getenv('EXPORTACAO_LOTE', '2000'))
+# Exportações em segundo plano (manage.py processar_exportacoes): reserva do worker, tentativas,
+# janela em que pedidos idênticos reaproveitam um arquivo pronto e retenção dos arquivos
+EXPORTACAO_RESERVA_SEGUNDOS = int(os.getenv('EXPORTACAO_RESERVA_SEGUNDOS', '300'))
+EXPORTACAO_MAX_TENTATIVAS = int(os.getenv('EXPORTACAO_MAX_TENTATIVAS', '3'))
+EXPORTACAO_REAPROVEITAR_SEGUNDOS = int(os.getenv('EXPORTACAO_REAPROVEITAR_SEGUNDOS', '600'))
+EXPORTACAO_RETENCAO_SEGUNDOS = int(os.getenv('EXPORTACAO_RETENCAO_SEGUNDOS', '86400'))
+
+# Total da listagem de inscrições na paginação por cursor (?paginacao=cursor): COUNT cacheado por filtros
+INSCRICOES_CONTAGEM_CACHE_ALIAS = os.getenv('INSCRICOES_CONTAGEM_CACHE_ALIAS', 'default')
+INSCRICOES_CONTAGEM_TTL = int(os.getenv('INSCRICOES_CONTAGEM_TTL', '60'))
+
+# Autocompletar de cidades (GetSearchCidade): quantidade padrão e máxima de resultados por busca
+CIDADES_BUSCA_LIMITE = int(os.getenv('CIDADES_BUSCA_LIMITE', '10'))
+CIDADES_BUSCA_LIMITE_MAXIMO = int(os.getenv('CIDADES_BUSCA_LIMITE_MAXIMO', '50'))
+
+# Tempo máximo (s) de espera pelo lock por CPF em inscrições simultâneas (MySQL GET_LOCK)
+INSCRICAO_LOCK_TIMEOUT = int(os.getenv('INSCRICAO_LOCK_TIMEOUT', '10'))
+
+# Normalização dos documentos enviados (orientação, resolução e recompressão) e variantes de revisão
+DOCUMENTOS_NORMALIZAR = os.getenv('DOCUMENTOS_NORMALIZAR', 'True') == 'True'
+DOCUMENTOS_FORMATO = os.getenv('DOCUMENTOS_FORMATO', 'WEBP')
+DOCUMENTOS_QUALIDADE = int(os.getenv('DOCUMENTOS_QUALIDADE', '80'))
+DOCUMENTOS_RESOLUCAO_MAXIMA = int(os.getenv('DOCUMENTOS_RESOLUCAO_MAXIMA', '2048'))
+DOCUMENTOS_TAMANHO_REVISAO = int(os.getenv('DOCUMENTOS_TAMANHO_REVISAO', '800'))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -8,6 +8,8 @@ export DATABASE_HOST=$(echo "${DATABASE_HOST}" | tr -d '\r')
 export DATABASE_NAME=$(echo "${DATABASE_NAME}" | tr -d '\r')
 export DATABASE_USER=$(echo "${DATABASE_USER}" | tr -d '\r')
 export DATABASE_PASSWORD=$(echo "${DATABASE_PASSWORD}" | tr -d '\r')
+# O cron não herda o ambiente do container: usa o mesmo Redis do web para que as invalidações do portal cheguem a ele
+export REDIS_URL=$(echo "${REDIS_URL:-redis://redis:6379/0}" | tr -d '\r')
 
 log() {
     echo "[$(date)] $1" >> /var/log/cron.log
@@ -18,6 +20,7 @@ log_env_variables() {
     log "DATABASE_HOST='${DATABASE_HOST}'"
     log "DATABASE_NAME='${DATABASE_NAME}'"
     log "DATABASE_USER='${DATABASE_USER}'"
+    log "REDIS_URL='${REDIS_URL}'"
     if [ -z "${DATABASE_PASSWORD}" ]; then
         log "DATABASE_PASSWORD não está definida."
     else